@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from .config import get_settings
+from .metrics import registry
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+ANTHROPIC_VERSION = "2023-06-01"
+BATCHES_BETA = "message-batches-2024-09-24"
+
+
+class BatchRequestFailed(RuntimeError):
+    """A request of a message batch ended without a message (errored, canceled or expired)."""
+
+
+@dataclass
+class _QueuedRequest:
+    custom_id: str
+    params: dict[str, Any]
+    future: asyncio.Future
+
+
+class BatchSubmissionQueue:
+    """
+    Collects Messages API requests from many analyses and submits them
+    together through the Message Batches API, trading latency for throughput
+    on bulk work.
+
+    Requests accumulate until ``max_requests`` are pending or
+    ``flush_seconds`` have passed since the first one, are then sent as one
+    batch, and the batch is polled every ``poll_seconds`` until it ends. Each
+    caller of ``submit`` is suspended until its own result arrives, so the
+    analysis pipeline resumes where it left off. A batch still running after
+    ``timeout_seconds`` is canceled and its requests fail.
+    """
+
+    def __init__(
+        self, max_requests: int, flush_seconds: float, poll_seconds: float, timeout_seconds: float
+    ) -> None:
+        self.max_requests = max(1, max_requests)
+        self.flush_seconds = flush_seconds
+        self.poll_seconds = poll_seconds
+        self.timeout_seconds = timeout_seconds
+        self.http_client: "httpx.AsyncClient | None" = None
+        self._pending: list[_QueuedRequest] = []
+        self._flush_task: asyncio.Task | None = None
+        self._batches: set[asyncio.Task] = set()
+        self.batches_submitted = 0
+        self.requests_submitted = 0
+        self.requests_failed = 0
+
+    def _client(self) -> "httpx.AsyncClient":
+        if self.http_client is None:
+            import httpx
+
+            self.http_client = httpx.AsyncClient(
+                base_url=settings.anthropic_base_url or "https://api.anthropic.com", timeout=60.0
+            )
+        return self.http_client
+
+    @staticmethod
+    def _headers() -> dict[str, str]:
+        betas = [BATCHES_BETA]
+        if settings.prompt_cache_enabled:
+            betas.append("prompt-caching-2024-07-31")
+        return {
+            "x-api-key": settings.anthropic_api_key or "",
+            "anthropic-version": ANTHROPIC_VERSION,
+            "anthropic-beta": ",".join(betas),
+        }
+
+    async def submit(self, params: dict[str, Any]) -> dict[str, Any]:
+        """Queue one Messages API request (``model``, ``messages``, ...); return its message."""
+        item = _QueuedRequest(f"req_{uuid.uuid4().hex}", params, asyncio.get_running_loop().create_future())
+        self._pending.append(item)
+        if len(self._pending) >= self.max_requests:
+            self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await item.future
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_seconds)
+        self._flush_task = None
+        self.flush()
+
+    def flush(self) -> None:
+        """Submit whatever is pending now instead of waiting for ``flush_seconds``."""
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+        self._flush_task = None
+        items, self._pending = self._pending, []
+        if not items:
+            return
+        task = asyncio.create_task(self._run_batch(items))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, items: list[_QueuedRequest]) -> None:
+        client = self._client()
+        try:
+            response = await client.post(
+                "/v1/messages/batches",
+                headers=self._headers(),
+                json={"requests": [{"custom_id": item.custom_id, "params": item.params} for item in items]},
+            )
+            response.raise_for_status()
+            batch = response.json()
+            self.batches_submitted += 1
+            self.requests_submitted += len(items)
+            logger.info("Submitted message batch %s with %d requests", batch["id"], len(items))
+            deadline = time.monotonic() + self.timeout_seconds
+            while batch["processing_status"] != "ended":
+                if time.monotonic() > deadline:
+                    await client.post(f"/v1/messages/batches/{batch['id']}/cancel", headers=self._headers())
+                    raise BatchRequestFailed(f"Message batch {batch['id']} timed out")
+                await asyncio.sleep(self.poll_seconds)
+                response = await client.get(f"/v1/messages/batches/{batch['id']}", headers=self._headers())
+                response.raise_for_status()
+                batch = response.json()
+            response = await client.get(batch["results_url"], headers=self._headers())
+            response.raise_for_status()
+            results = {}
+            for line in response.text.splitlines():
+                if line.strip():
+                    row = json.loads(line)
+                    results[row["custom_id"]] = row["result"]
+            for item in items:
+                result = results.get(item.custom_id) or {"type": "missing"}
+                if item.future.done():
+                    continue
+                if result["type"] == "succeeded":
+                    item.future.set_result(result["message"])
+                else:
+                    error = BatchRequestFailed(f"Batch request {item.custom_id} {result['type']}: {result.get('error')}")
+                    self._fail([item], error)
+        except Exception as exc:
+            logger.exception("Message batch of %d requests failed: %s", len(items), exc)
+            self._fail(items, exc)
+        finally:
+            # Canceled on shutdown: callers must not wait forever.
+            self._fail(items, BatchRequestFailed("Message batch was abandoned before it ended"))
+
+    def _fail(self, items: list[_QueuedRequest], exc: BaseException) -> None:
+        for item in items:
+            if not item.future.done():
+                self.requests_failed += 1
+                item.future.set_exception(exc)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending_requests": len(self._pending),
+            "batches_in_flight": len(self._batches),
+            "batches_submitted": self.batches_submitted,
+            "requests_submitted": self.requests_submitted,
+            "requests_failed": self.requests_failed,
+        }
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        for task in list(self._batches):
+            task.cancel()
+        self._fail(self._pending, BatchRequestFailed("Batch queue closed"))
+        self._pending = []
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
+
+batch_queue = BatchSubmissionQueue(
+    settings.batch_queue_max_requests,
+    settings.batch_queue_flush_seconds,
+    settings.batch_queue_poll_seconds,
+    settings.batch_queue_timeout_seconds,
+)
+
+registry.gauge(
+    "analyzer_llm_batch_pending_requests",
+    "LLM requests waiting to be submitted in a message batch.",
+    callback=lambda: float(len(batch_queue._pending)),
+)
+registry.gauge(
+    "analyzer_llm_batches_in_flight",
+    "Message batches submitted and not yet ended.",
+    callback=lambda: float(len(batch_queue._batches)),
+)
@@ -0,0 +1,346 @@
+"""
+Bulk import of contracts from disk, for onboarding a client's archive without
+one ``POST /analyze`` per file.
+
+    python -m backend.app.bulk ./archive --analysis-type risks --workers 8 --batch-size 100
+
+Files matching ``--pattern`` under the directory are hashed and
+deduplicated; a file whose hash was already imported for the same analysis
+type and playbook version is skipped, so an interrupted run resumes where it
+stopped. Guardrails and clause extraction run in a process pool, retrieval
+once per batch for every distinct clause in it, and each batch is written
+with one bulk ``INSERT`` and committed. LLM review is off unless
+``--llm-mode`` asks for it (``batch`` goes through the Message Batches
+queue). A JSON throughput report is printed at the end.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import database
+from .batch import batch_queue
+from .config import get_settings
+from .guards import filter_malicious_segments
+from .llm import AnthropicClient, LLMUsage, close_sdk_clients
+from .models import Analysis, PlaybookChunk, default_uuid
+from .pipeline import (
+    ANALYSIS_MODES,
+    PendingReview,
+    _budget_warnings,
+    _build_findings,
+    _build_result,
+    _extract_clauses,
+    _merge_findings,
+    _review_batched,
+    _risk_prompt_prefix,
+    analysis_modes,
+)
+from .playbook import playbook_cache
+from .schemas import Finding, GuardrailWarning
+from .tokens import TokenBudget
+from .workers import run_blocking
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Hashes per ``IN`` clause when looking up contracts imported by earlier runs.
+HASH_LOOKUP_CHUNK = 500
+
+
+@dataclass
+class ImportReport:
+    files: int = 0
+    duplicates: int = 0
+    already_imported: int = 0
+    imported: int = 0
+    failed: int = 0
+    clauses: int = 0
+    bytes: int = 0
+    elapsed_seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        seconds = max(self.elapsed_seconds, 1e-9)
+        return {
+            **asdict(self),
+            "elapsed_seconds": round(self.elapsed_seconds, 2),
+            "contracts_per_s": round(self.imported / seconds, 2),
+            "clauses_per_s": round(self.clauses / seconds, 1),
+            "mb_per_s": round(self.bytes / (1024 * 1024) / seconds, 3),
+        }
+
+
+@dataclass
+class _Contract:
+    path: str
+    content_hash: str
+    size: int
+
+
+@dataclass
+class _Prepared:
+    contract: _Contract
+    text: str
+    guardrails: list[dict[str, Any]]
+    clauses: list[dict[str, Any]]
+
+
+def _hash_file(path: str) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+def _prepare(path: str) -> tuple[str, list[dict[str, Any]], list[dict[str, Any]]]:
+    """Process-pool stage: sanitized text, guardrail warnings and extracted clauses of one file."""
+    text = Path(path).read_bytes().decode("utf-8", errors="replace").strip()
+    if len(text) < 10:
+        raise ValueError("contract is empty")
+    sanitized, warnings = filter_malicious_segments(text)
+    return sanitized, [w.dict() for w in warnings], _extract_clauses(sanitized)
+
+
+def discover(root: Path, patterns: list[str]) -> list[str]:
+    paths = {str(path) for pattern in patterns for path in root.rglob(pattern) if path.is_file()}
+    return sorted(paths)
+
+
+async def _imported_hashes(hashes: list[str], analysis_type: str, version_id: str) -> set[str]:
+    found: set[str] = set()
+    async with database.get_session() as session:
+        for start in range(0, len(hashes), HASH_LOOKUP_CHUNK):
+            rows = await session.execute(
+                select(Analysis.content_hash).where(
+                    Analysis.content_hash.in_(hashes[start : start + HASH_LOOKUP_CHUNK]),
+                    Analysis.analysis_type == analysis_type,
+                    Analysis.playbook_version_id == version_id,
+                    Analysis.status == "completed",
+                )
+            )
+            found.update(rows.scalars().all())
+    return found
+
+
+async def _resolve_version(session: AsyncSession, version_id: str | None) -> str:
+    """``version_id`` or the current playbook version, indexed for retrieval if it is not yet."""
+    if not version_id:
+        current = await playbook_cache.get_current(session)
+        if current is None:
+            raise SystemExit("No playbook version published; pass --playbook-version")
+        version_id = current.id
+    rag = playbook_cache.rag
+    if await run_blocking(rag.collection_count, version_id) == 0:
+        chunks = (
+            await session.execute(select(PlaybookChunk).where(PlaybookChunk.version_id == version_id))
+        ).scalars().all()
+        if not chunks:
+            raise SystemExit(f"Playbook version {version_id} has no chunks")
+        await run_blocking(rag.reset_version, version_id, [(c.id, c.content) for c in chunks])
+    return version_id
+
+
+async def _score(
+    item: _Prepared,
+    analysis_type: str,
+    version_id: str,
+    retrieved: dict[str, list],
+    llm_mode: str,
+    prompt_prefix: str | None,
+) -> dict[str, Any]:
+    """The ``analyses`` row for one prepared contract, scored like ``_rescore_batch`` does."""
+    analysis = Analysis(id=default_uuid(), analysis_type=analysis_type)
+    modes = analysis_modes(analysis_type)
+    llm_client = AnthropicClient(budget=TokenBudget.for_analysis(), batch=llm_mode == "batch")
+    total_usage = LLMUsage(0, 0)
+    batched = llm_mode == "batch" or settings.llm_review_mode == "batched"
+    findings: list[Finding] = []
+    reviews: list[PendingReview] = []
+    for clause in item.clauses:
+        chunks = retrieved.get(clause["source_text"]) or []
+        if not chunks:
+            continue
+        clause_findings = await _build_findings(
+            modes,
+            clause,
+            chunks,
+            llm_client,
+            total_usage,
+            use_llm=llm_mode == "interactive" and not batched,
+            prompt_prefix=prompt_prefix,
+        )
+        if llm_mode != "none" and batched and "risks" in modes:
+            reviews.append(PendingReview(clause, chunks, [f for f in clause_findings if f.mode == "risks"]))
+        findings.extend(clause_findings)
+    if reviews:
+        await _review_batched(reviews, llm_client, total_usage, prompt_prefix)
+    guardrails = [GuardrailWarning(**w) for w in item.guardrails] + _budget_warnings(llm_client)
+    analysis.set_clause_findings(findings)
+    result = _build_result(analysis, _merge_findings(findings), guardrails, total_usage, version_id)
+    analysis.set_result(json.loads(result.json()))
+    analysis.set_guardrails([w.dict() for w in result.guardrail_warnings])
+    analysis.set_usage(result.usage.dict() if result.usage else {})
+    return {
+        "id": analysis.id,
+        "analysis_type": analysis_type,
+        "contract_text": item.text,
+        "status": "completed",
+        "playbook_version_id": version_id,
+        "content_hash": item.contract.content_hash,
+        "result_json": analysis.result_json,
+        "guardrail_warnings": analysis.guardrail_warnings,
+        "usage_json": analysis.usage_json,
+        "clause_findings_json": analysis.clause_findings_json,
+    }
+
+
+async def _prepare_batch(pool: Executor, batch: list[_Contract], report: ImportReport) -> list[_Prepared]:
+    loop = asyncio.get_running_loop()
+    outcomes = await asyncio.gather(
+        *(loop.run_in_executor(pool, _prepare, contract.path) for contract in batch), return_exceptions=True
+    )
+    prepared = []
+    for contract, outcome in zip(batch, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.warning("Skipping %s: %s", contract.path, outcome)
+            report.failed += 1
+            continue
+        prepared.append(_Prepared(contract, *outcome))
+    return prepared
+
+
+async def _import_batch(
+    prepared: list[_Prepared],
+    analysis_type: str,
+    version_id: str,
+    llm_mode: str,
+    prompt_prefix: str | None,
+    report: ImportReport,
+) -> None:
+    texts = list(dict.fromkeys(clause["source_text"] for item in prepared for clause in item.clauses))
+    retrieved = dict(zip(texts, await run_blocking(playbook_cache.rag.query_many, version_id, texts)))
+    scored = [_score(item, analysis_type, version_id, retrieved, llm_mode, prompt_prefix) for item in prepared]
+    if llm_mode == "batch":
+        # Every contract's review has to be queued before any can finish.
+        rows = await asyncio.gather(*scored)
+    else:
+        rows = [await row for row in scored]
+    if rows:
+        async with database.get_session() as session:
+            await session.execute(insert(Analysis), rows)
+    report.imported += len(rows)
+    report.clauses += sum(len(item.clauses) for item in prepared)
+    report.bytes += sum(item.contract.size for item in prepared)
+
+
+async def run_import(
+    root: Path,
+    analysis_type: str = "risks",
+    version_id: str | None = None,
+    workers: int | None = None,
+    batch_size: int = 50,
+    patterns: list[str] | None = None,
+    llm_mode: str = "none",
+) -> ImportReport:
+    started = time.perf_counter()
+    report = ImportReport()
+    paths = discover(root, patterns or ["*.txt", "*.md"])
+    report.files = len(paths)
+    async with database.get_session() as session:
+        version_id = await _resolve_version(session, version_id)
+    prompt_prefix = None
+    if llm_mode != "none" and "risks" in analysis_modes(analysis_type):
+        prompt_prefix = await run_blocking(_risk_prompt_prefix, playbook_cache.rag, version_id)
+
+    with ProcessPoolExecutor(max_workers=workers or min(os.cpu_count() or 1, 8)) as pool:
+        loop = asyncio.get_running_loop()
+        hashed = await asyncio.gather(*(loop.run_in_executor(pool, _hash_file, path) for path in paths))
+        unique: dict[str, _Contract] = {}
+        for path, (content_hash, size) in zip(paths, hashed):
+            if content_hash in unique:
+                report.duplicates += 1
+                continue
+            unique[content_hash] = _Contract(path, content_hash, size)
+        done = await _imported_hashes(list(unique), analysis_type, version_id)
+        report.already_imported = len(done)
+        pending = [contract for content_hash, contract in unique.items() if content_hash not in done]
+        batches = [pending[start : start + batch_size] for start in range(0, len(pending), batch_size)]
+
+        # Extraction of the next batch overlaps retrieval and inserts of the current one.
+        upcoming = asyncio.ensure_future(_prepare_batch(pool, batches[0], report)) if batches else None
+        for index in range(len(batches)):
+            prepared = await upcoming
+            upcoming = (
+                asyncio.ensure_future(_prepare_batch(pool, batches[index + 1], report))
+                if index + 1 < len(batches)
+                else None
+            )
+            await _import_batch(prepared, analysis_type, version_id, llm_mode, prompt_prefix, report)
+            elapsed = time.perf_counter() - started
+            logger.info(
+                "Imported %d of %d contracts (%.1f/s)", report.imported, len(pending), report.imported / elapsed
+            )
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
+
+
+async def _main(args: argparse.Namespace) -> ImportReport:
+    from .main import _create_tables
+
+    await _create_tables()
+    try:
+        return await run_import(
+            Path(args.directory),
+            analysis_type=args.analysis_type,
+            version_id=args.playbook_version,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            patterns=args.pattern,
+            llm_mode=args.llm_mode,
+        )
+    finally:
+        await batch_queue.close()
+        await close_sdk_clients()
+        await database.engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="directory searched recursively for contracts")
+    parser.add_argument("--analysis-type", default="risks", help="comma-separated modes, as in POST /analyze")
+    parser.add_argument("--playbook-version", help="playbook version id; the current version when omitted")
+    parser.add_argument("--workers", type=int, help="extraction processes; min(cpu_count, 8) by default")
+    parser.add_argument("--batch-size", type=int, default=50, help="contracts retrieved and inserted together")
+    parser.add_argument("--pattern", action="append", help="file glob, repeatable; *.txt and *.md by default")
+    parser.add_argument("--llm-mode", choices=["none", "interactive", "batch"], default="none")
+    args = parser.parse_args()
+    modes = [mode.strip() for mode in args.analysis_type.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in ANALYSIS_MODES]
+    if unknown or not modes:
+        parser.error(f"unknown analysis type: {', '.join(unknown) or args.analysis_type}")
+    args.analysis_type = ",".join(dict.fromkeys(modes))
+    if args.batch_size < 1:
+        parser.error("--batch-size must be positive")
+
+    logging.basicConfig(level=logging.INFO)
+    report = asyncio.run(_main(args))
+    print(json.dumps(report.as_dict()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any
+
+from .models import Analysis
+from .schemas import Finding, GuardrailWarning, RetrievedChunk
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class PipelineCheckpoint:
+    """
+    Stage outputs of an unfinished ``run_analysis_pipeline`` run, stored in
+    ``Analysis.checkpoint_json`` when the run stops early (a failure, or
+    cancellation on shutdown) so a retry resumes where it stopped.
+
+    ``text_hash`` is the SHA-256 of the sanitized contract: a retry whose
+    sanitized text hashes differently starts over. Per-clause entries are
+    keyed by the clause's position in ``clauses``; a clause in ``findings``
+    is done (including its LLM validation) and is not scored again, while
+    one only in ``retrieval`` skips the playbook query.
+    """
+
+    text_hash: str | None = None
+    guardrails: list[dict[str, Any]] = field(default_factory=list)
+    clauses: list[dict[str, Any]] | None = None
+    version_id: str | None = None
+    retrieval: dict[int, list[dict[str, Any]]] = field(default_factory=dict)
+    findings: dict[int, list[dict[str, Any]]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, analysis: Analysis) -> "PipelineCheckpoint":
+        if not analysis.checkpoint_json:
+            return cls()
+        data = json.loads(analysis.checkpoint_json)
+        return cls(
+            text_hash=data.get("text_hash"),
+            guardrails=data.get("guardrails") or [],
+            clauses=data.get("clauses"),
+            version_id=data.get("version_id"),
+            retrieval={int(key): chunks for key, chunks in (data.get("retrieval") or {}).items()},
+            findings={int(key): findings for key, findings in (data.get("findings") or {}).items()},
+        )
+
+    def save(self, analysis: Analysis) -> None:
+        if self.text_hash is None:
+            # Stopped before sanitizing finished; nothing worth resuming from.
+            analysis.checkpoint_json = None
+            return
+        analysis.checkpoint_json = json.dumps(
+            {
+                "text_hash": self.text_hash,
+                "guardrails": self.guardrails,
+                "clauses": self.clauses,
+                "version_id": self.version_id,
+                "retrieval": self.retrieval,
+                "findings": self.findings,
+            }
+        )
+
+    def matches(self, sanitized_text: str) -> bool:
+        return self.text_hash == text_hash(sanitized_text)
+
+    def reset(self, sanitized_text: str, guardrails: list[GuardrailWarning]) -> None:
+        """Start over from a freshly sanitized contract."""
+        self.text_hash = text_hash(sanitized_text)
+        self.guardrails = [warning.dict() for warning in guardrails]
+        self.clauses = None
+        self.version_id = None
+        self.retrieval.clear()
+        self.findings.clear()
+
+    def use_version(self, version_id: str | None) -> None:
+        """Drop per-clause results retrieved against a different playbook version."""
+        if version_id != self.version_id:
+            self.version_id = version_id
+            self.retrieval.clear()
+            self.findings.clear()
+
+    def sanitize_warnings(self) -> list[GuardrailWarning]:
+        return [GuardrailWarning(**warning) for warning in self.guardrails]
+
+    def retrieved(self, index: int) -> list[RetrievedChunk] | None:
+        chunks = self.retrieval.get(index)
+        return None if chunks is None else [RetrievedChunk(**chunk) for chunk in chunks]
+
+    def record_retrieval(self, index: int, chunks: list[RetrievedChunk]) -> None:
+        self.retrieval[index] = [chunk.dict() for chunk in chunks]
+
+    def completed(self, index: int) -> list[Finding] | None:
+        findings = self.findings.get(index)
+        return None if findings is None else [Finding(**finding) for finding in findings]
+
+    def record_findings(self, index: int, findings: list[Finding]) -> None:
+        self.findings[index] = [finding.dict() for finding in findings]
+        # The findings carry their chunks; the retrieval entry is no longer needed.
+        self.retrieval.pop(index, None)
@@ -7,6 +7,14 @@ class Settings:
     app_name: str = "Contract Clause Analyzer"
     anthropic_api_key: str | None = os.getenv("ANTHROPIC_API_KEY")
     anthropic_model: str = os.getenv("ANTHROPIC_MODEL", "claude-3-opus-20240229")
+    anthropic_base_url: str | None = os.getenv("ANTHROPIC_BASE_URL") or None
+    anthropic_max_retries: int = int(os.getenv("ANTHROPIC_MAX_RETRIES", "2"))
+    tokenizer_path: str | None = os.getenv("TOKENIZER_PATH") or None
+    analysis_token_budget: int = int(os.getenv("ANALYSIS_TOKEN_BUDGET", "0"))
+    client_token_budget: int = int(os.getenv("CLIENT_TOKEN_BUDGET", "0"))
+    client_token_budget_window_seconds: float = float(
+        os.getenv("CLIENT_TOKEN_BUDGET_WINDOW_SECONDS", "3600")
+    )
 
     _in_container = os.path.exists("/.dockerenv")
     _default_db = (
@@ -21,6 +29,14 @@ class Settings:
     rate_limit_stream_per_minute: int = int(
         os.getenv("RATE_LIMIT_STREAM_PER_MINUTE", "60")
     )
+    # Token buckets: a request costs one unit plus one per RATE_LIMIT_TOKENS_PER_UNIT
+    # estimated contract tokens; RATE_LIMIT_STORE is "database" or "memory".
+    rate_limit_tokens_per_unit: int = int(os.getenv("RATE_LIMIT_TOKENS_PER_UNIT", "2000"))
+    rate_limit_store: str = os.getenv("RATE_LIMIT_STORE", "database").lower()
+    # Comma-separated addresses/CIDRs of reverse proxies whose X-Forwarded-For is believed.
+    trusted_proxies: str = os.getenv("TRUSTED_PROXIES", "")
+    # Comma-separated API keys; a listed X-API-Key header identifies the client instead of its IP.
+    client_api_keys: str = os.getenv("CLIENT_API_KEYS", "")
     playbook_seed_path: str = os.getenv(
         "PLAYBOOK_SEED_PATH", "./standard_terms_playbook.md"
     )
@@ -28,10 +44,58 @@ class Settings:
     cost_per_output_token: float = float(
         os.getenv("COST_PER_OUTPUT_TOKEN", "0.000075")
     )  # approx Claude 3.5 Sonnet pricing
+    # Prompt caching: writes cost 1.25x and reads 0.1x the input price.
+    cost_per_cache_write_token: float = float(
+        os.getenv("COST_PER_CACHE_WRITE_TOKEN", str(cost_per_input_token * 1.25))
+    )
+    cost_per_cache_read_token: float = float(
+        os.getenv("COST_PER_CACHE_READ_TOKEN", str(cost_per_input_token * 0.1))
+    )
+    prompt_cache_enabled: bool = os.getenv("PROMPT_CACHE", "false").lower() == "true"
+    # Shorter prefixes are not cached by the API.
+    prompt_cache_min_tokens: int = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
+    prompt_cache_ttl_seconds: float = float(os.getenv("PROMPT_CACHE_TTL_SECONDS", "300"))
+    prompt_prefix_max_chars: int = int(os.getenv("PROMPT_PREFIX_MAX_CHARS", "24000"))
+    # "per_clause": one validation call per clause; "batched": one call per contract.
+    llm_review_mode: str = os.getenv("LLM_REVIEW_MODE", "per_clause").lower()
+    llm_batch_max_input_tokens: int = int(os.getenv("LLM_BATCH_MAX_INPUT_TOKENS", "12000"))
+    llm_batch_output_tokens_per_clause: int = int(os.getenv("LLM_BATCH_OUTPUT_TOKENS_PER_CLAUSE", "96"))
+    # Analyses created with llm_mode="batch" go through the Message Batches API.
+    batch_queue_max_requests: int = int(os.getenv("BATCH_QUEUE_MAX_REQUESTS", "1000"))
+    batch_queue_flush_seconds: float = float(os.getenv("BATCH_QUEUE_FLUSH_SECONDS", "60"))
+    batch_queue_poll_seconds: float = float(os.getenv("BATCH_QUEUE_POLL_SECONDS", "30"))
+    batch_queue_timeout_seconds: float = float(os.getenv("BATCH_QUEUE_TIMEOUT_SECONDS", str(24 * 3600)))
     debug_mode: bool = os.getenv("DEBUG_MODE", "false").lower() == "true"
     inline_analysis: bool = os.getenv("INLINE_ANALYSIS", "false").lower() == "true"
     in_memory_mode: bool = os.getenv("BYPASS_DB_FOR_TESTS", "false").lower() == "true"
     chroma_telemetry: bool = os.getenv("CHROMA_TELEMETRY", "false").lower() == "true"
+    vector_backend: str = os.getenv("VECTOR_BACKEND", "chroma").lower()
+    vector_index_dir: str = os.getenv("VECTOR_INDEX_DIR", "./data/vectors")
+    retrieval_mode: str = os.getenv("RETRIEVAL_MODE", "vector").lower()
+    retrieval_rrf_k: int = int(os.getenv("RETRIEVAL_RRF_K", "60"))
+    retrieval_cache_max_bytes: int = int(
+        os.getenv("RETRIEVAL_CACHE_MAX_BYTES", str(32 * 1024 * 1024))
+    )
+    injection_patterns_path: str | None = os.getenv("INJECTION_PATTERNS_PATH") or None
+    stream_window_chars: int = int(os.getenv("STREAM_WINDOW_CHARS", "65536"))
+    stream_window_overlap: int = int(os.getenv("STREAM_WINDOW_OVERLAP", "2048"))
+    rescore_chunk_size: int = int(os.getenv("RESCORE_CHUNK_SIZE", "50"))
+    rescore_throttle_seconds: float = float(os.getenv("RESCORE_THROTTLE_SECONDS", "0.1"))
+    # Rows fetched per round trip while streaming GET /export.
+    export_yield_per: int = int(os.getenv("EXPORT_YIELD_PER", "500"))
+    warmup_wait_seconds: float = float(os.getenv("WARMUP_WAIT_SECONDS", "30"))
+    # How long shutdown waits for running analyses before requeueing them.
+    shutdown_grace_seconds: float = float(os.getenv("SHUTDOWN_GRACE_SECONDS", "25"))
+    event_replay_analyses: int = int(os.getenv("EVENT_REPLAY_ANALYSES", "256"))
+    event_replay_max_bytes: int = int(os.getenv("EVENT_REPLAY_MAX_BYTES", str(64 * 1024 * 1024)))
+    profile_dir: str = os.getenv("PROFILE_DIR", "./data/profiles")
+    worker_pool_kind: str = os.getenv("WORKER_POOL_KIND", "thread").lower()
+    worker_pool_size: int = int(os.getenv("WORKER_POOL_SIZE", "0"))
+    loop_lag_interval_seconds: float = float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+    loop_lag_warn_seconds: float = float(os.getenv("LOOP_LAG_WARN_SECONDS", "0.2"))
+    playbook_cache_ttl_seconds: float = float(
+        os.getenv("PLAYBOOK_CACHE_TTL_SECONDS", "5")
+    )
 
     def resolve_playbook_path(self) -> Path:
         """
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -10,6 +11,7 @@ from sqlalchemy.pool import NullPool, StaticPool
 from sqlalchemy.orm import DeclarativeBase
 
 from .config import get_settings
+from .metrics import DB_QUERY_SECONDS, span
 
 
 settings = get_settings()
@@ -49,6 +51,25 @@ if settings.database_url.startswith("sqlite") and "mode=memory" not in settings.
         cursor.execute("PRAGMA journal_mode=WAL;")
         cursor.execute("PRAGMA busy_timeout=30000;")
         cursor.close()
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):  # pragma: no cover
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):  # pragma: no cover
+    DB_QUERY_SECONDS.observe(time.perf_counter() - conn.info["query_started"].pop())
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _drop_query_timer(context):  # pragma: no cover
+    started = context.connection.info.get("query_started") if context.connection else None
+    if started:
+        started.pop()
+
+
 AsyncSessionLocal = async_sessionmaker(
     engine, expire_on_commit=False, autoflush=False, autocommit=False
 )
@@ -63,7 +84,8 @@ async def get_session() -> AsyncSession:
     session: AsyncSession = AsyncSessionLocal()
     try:
         yield session
-        await session.commit()
+        with span("db_commit"):
+            await session.commit()
     except Exception:
         await session.rollback()
         raise
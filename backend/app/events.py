@@ -1,20 +1,100 @@
 from __future__ import annotations
 
 import asyncio
-from collections import defaultdict
+import json
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass, field
 from typing import Any, AsyncGenerator
 
+from .config import get_settings
+from .metrics import registry
+
+settings = get_settings()
+
+TERMINAL_EVENTS = frozenset({"final", "error"})
+
+
+@dataclass
+class _Replay:
+    """Replayable events of one analysis: a ring of progress events plus its terminal event."""
+
+    events: "deque[tuple[dict, int]]" = field(default_factory=deque)
+    terminal: tuple[dict, int] | None = None
+    size: int = 0
+
+    def items(self) -> list[dict]:
+        items = [item for item, _ in self.events]
+        return items + [self.terminal[0]] if self.terminal else items
+
+
+def _payload_size(item: dict) -> int:
+    return len(json.dumps(item["data"], default=str))
+
 
 class EventBus:
-    def __init__(self) -> None:
+    """
+    In-process pub/sub for analysis progress events.
+
+    The most recent events of the last ``replay_analyses`` analyses are kept
+    and replayed to new subscribers, so a client that opens the stream after
+    ``POST /analyze`` returns still sees the findings and final result that
+    were published before it connected.
+
+    Each analysis keeps its latest ``max_events_per_analysis`` progress events
+    in a ring, and its ``final`` or ``error`` event separately so that one is
+    never dropped. Analyses are also evicted oldest first while the payloads
+    kept exceed ``replay_max_bytes``.
+    """
+
+    max_events_per_analysis = 1000
+
+    def __init__(self, replay_analyses: int = 0, replay_max_bytes: int = 64 * 1024 * 1024) -> None:
         self.listeners: dict[str, list[asyncio.Queue]] = defaultdict(list)
+        self.replay_analyses = replay_analyses
+        self.replay_max_bytes = replay_max_bytes
+        self._history: "OrderedDict[str, _Replay]" = OrderedDict()
+        self._history_bytes = 0
 
     def publish(self, analysis_id: str, event: str, data: Any) -> None:
+        item = {"event": event, "data": data}
+        self._remember(analysis_id, item)
         for queue in self.listeners.get(analysis_id, []):
-            queue.put_nowait({"event": event, "data": data})
+            queue.put_nowait(item)
+
+    def _remember(self, analysis_id: str, item: dict) -> None:
+        if self.replay_analyses <= 0:
+            return
+        replay = self._history.get(analysis_id)
+        if replay is None:
+            replay = self._history[analysis_id] = _Replay()
+            while len(self._history) > self.replay_analyses:
+                self._forget_oldest()
+        size = _payload_size(item)
+        if item["event"] in TERMINAL_EVENTS:
+            if replay.terminal is not None:
+                self._resize(replay, -replay.terminal[1])
+            replay.terminal = (item, size)
+        else:
+            replay.events.append((item, size))
+            if len(replay.events) > self.max_events_per_analysis:
+                self._resize(replay, -replay.events.popleft()[1])
+        self._resize(replay, size)
+        while self._history_bytes > self.replay_max_bytes and len(self._history) > 1:
+            self._forget_oldest()
+
+    def _resize(self, replay: _Replay, delta: int) -> None:
+        replay.size += delta
+        self._history_bytes += delta
+
+    def _forget_oldest(self) -> None:
+        _, replay = self._history.popitem(last=False)
+        self._history_bytes -= replay.size
 
     async def subscribe(self, analysis_id: str) -> AsyncGenerator[dict, None]:
         queue: asyncio.Queue = asyncio.Queue()
+        replay = self._history.get(analysis_id)
+        for item in replay.items() if replay else ():
+            queue.put_nowait(item)
         self.listeners.setdefault(analysis_id, []).append(queue)
         try:
             while True:
@@ -26,4 +106,10 @@ class EventBus:
                 self.listeners.pop(analysis_id, None)
 
 
-event_bus = EventBus()
+event_bus = EventBus(settings.event_replay_analyses, settings.event_replay_max_bytes)
+
+registry.gauge(
+    "analyzer_sse_subscribers",
+    "Open event-stream subscriptions.",
+    callback=lambda: sum(len(queues) for queues in event_bus.listeners.values()),
+)
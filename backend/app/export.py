@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import csv
+import io
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+from . import database
+from .config import get_settings
+from .models import Analysis
+from .rescore import _has_mode
+from .schemas import AnalysisSummary
+
+settings = get_settings()
+
+Cursor = tuple[datetime, str]
+
+ANALYSIS_COLUMNS = (
+    "analysis_id",
+    "created_at",
+    "status",
+    "analysis_type",
+    "playbook_version_id",
+    "parent_id",
+    "overall_risk_score",
+)
+FINDING_COLUMNS = (
+    "mode",
+    "clause_type",
+    "extracted_value",
+    "playbook_standard",
+    "deviation",
+    "risk_level",
+    "recommendation",
+    "section_id",
+    "start",
+    "end",
+    "chunk_ids",
+)
+
+
+@dataclass
+class AnalysisFilters:
+    status: str | None = None
+    analysis_type: str | None = None
+    playbook_version_id: str | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+    def conditions(self) -> list:
+        conditions = []
+        if self.status:
+            conditions.append(Analysis.status == self.status)
+        if self.analysis_type:
+            conditions.append(_has_mode(self.analysis_type))
+        if self.playbook_version_id:
+            conditions.append(Analysis.playbook_version_id == self.playbook_version_id)
+        if self.created_after:
+            conditions.append(Analysis.created_at >= self.created_after)
+        if self.created_before:
+            conditions.append(Analysis.created_at < self.created_before)
+        return conditions
+
+
+def analysis_filters(
+    status: Optional[str] = Query(None),
+    analysis_type: Optional[str] = Query(None, description="Analyses running this mode"),
+    playbook_version_id: Optional[str] = Query(None),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+) -> AnalysisFilters:
+    """Query filters shared by ``GET /analyses`` and ``GET /export``."""
+    return AnalysisFilters(status, analysis_type, playbook_version_id, created_after, created_before)
+
+
+def encode_cursor(analysis: Analysis) -> str:
+    raw = json.dumps([analysis.created_at.isoformat(), analysis.id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str | None) -> Cursor | None:
+    if not token:
+        return None
+    try:
+        created_at, analysis_id = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        return datetime.fromisoformat(created_at), str(analysis_id)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def _query(filters: AnalysisFilters, after: Cursor | None):
+    """Analyses in ``(created_at, id)`` order after ``after``, without the contract text."""
+    stmt = (
+        select(Analysis)
+        .options(
+            load_only(
+                Analysis.id,
+                Analysis.created_at,
+                Analysis.status,
+                Analysis.analysis_type,
+                Analysis.playbook_version_id,
+                Analysis.parent_id,
+                Analysis.result_json,
+            )
+        )
+        .where(*filters.conditions())
+    )
+    if after:
+        stmt = stmt.where(
+            or_(
+                Analysis.created_at > after[0],
+                and_(Analysis.created_at == after[0], Analysis.id > after[1]),
+            )
+        )
+    return stmt.order_by(Analysis.created_at, Analysis.id)
+
+
+def _result(analysis: Analysis) -> dict[str, Any]:
+    return json.loads(analysis.result_json) if analysis.result_json else {}
+
+
+def _summary(analysis: Analysis, result: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "analysis_id": analysis.id,
+        "created_at": analysis.created_at.isoformat(),
+        "status": analysis.status,
+        "analysis_type": analysis.analysis_type,
+        "playbook_version_id": analysis.playbook_version_id,
+        "parent_id": analysis.parent_id,
+        "overall_risk_score": result.get("overall_risk_score"),
+    }
+
+
+def flatten_findings(result: dict[str, Any]) -> list[dict[str, Any]]:
+    """One flat record per finding, across every mode of the result."""
+    by_mode = result.get("findings_by_mode") or {None: result.get("findings") or []}
+    rows = []
+    for mode, findings in by_mode.items():
+        for finding in findings:
+            row = {column: finding.get(column) for column in FINDING_COLUMNS}
+            row["mode"] = finding.get("mode") or mode
+            row["chunk_ids"] = " ".join(chunk["chunk_id"] for chunk in finding.get("retrieved_chunks") or [])
+            rows.append(row)
+    return rows
+
+
+async def list_analyses(
+    session: AsyncSession, filters: AnalysisFilters, after: Cursor | None, limit: int
+) -> tuple[list[AnalysisSummary], str | None]:
+    rows = (await session.execute(_query(filters, after).limit(limit + 1))).scalars().all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return [AnalysisSummary(**_summary(row, _result(row))) for row in rows[:limit]], next_cursor
+
+
+async def _stream(filters: AnalysisFilters, after: Cursor | None) -> AsyncIterator[Analysis]:
+    # The request's session is closed before a streaming body is sent, so
+    # the export holds its own for as long as the client keeps reading.
+    async with database.get_session() as session:
+        rows = await session.stream_scalars(
+            _query(filters, after).execution_options(yield_per=settings.export_yield_per)
+        )
+        async for analysis in rows:
+            yield analysis
+
+
+async def export_ndjson(filters: AnalysisFilters, after: Cursor | None) -> AsyncIterator[str]:
+    """
+    An ``analysis`` record per analysis followed by its ``finding`` records.
+    The analysis record's ``cursor`` resumes the export after that analysis,
+    once its ``findings`` finding records have been received.
+    """
+    async for analysis in _stream(filters, after):
+        result = _result(analysis)
+        findings = flatten_findings(result)
+        lines = [
+            {
+                "type": "analysis",
+                **_summary(analysis, result),
+                "findings": len(findings),
+                "cursor": encode_cursor(analysis),
+            }
+        ]
+        lines.extend({"type": "finding", "analysis_id": analysis.id, **finding} for finding in findings)
+        yield "".join(json.dumps(line) + "\n" for line in lines)
+
+
+async def export_csv(filters: AnalysisFilters, after: Cursor | None) -> AsyncIterator[str]:
+    """A row per finding with its analysis' columns; analyses without findings get one row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([*ANALYSIS_COLUMNS, *FINDING_COLUMNS, "cursor"])
+    yield buffer.getvalue()
+    async for analysis in _stream(filters, after):
+        buffer.seek(0)
+        buffer.truncate()
+        result = _result(analysis)
+        summary = [_summary(analysis, result)[column] for column in ANALYSIS_COLUMNS]
+        cursor = encode_cursor(analysis)
+        for finding in flatten_findings(result) or [{}]:
+            writer.writerow([*summary, *(finding.get(column) for column in FINDING_COLUMNS), cursor])
+        yield buffer.getvalue()
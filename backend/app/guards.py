@@ -1,33 +1,232 @@
 from __future__ import annotations
 
+import hashlib
 import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
 from typing import Iterable
 
+from .config import get_settings
 from .schemas import GuardrailWarning
 
-INJECTION_PATTERNS: list[re.Pattern] = [
-    re.compile(r"ignore (the )?(previous|above) instructions", re.IGNORECASE),
-    re.compile(r"system prompt", re.IGNORECASE),
-    re.compile(r"pretend to be", re.IGNORECASE),
-    re.compile(r"exfiltrate", re.IGNORECASE),
-    re.compile(r"unrelated task", re.IGNORECASE),
+settings = get_settings()
+
+REDACTION = "[filtered]"
+
+# Plain lines are literal phrases (case-insensitive, any whitespace between
+# words); lines starting with "re:" are regular expressions.
+DEFAULT_INJECTION_PATTERNS: list[str] = [
+    "re:ignore (the )?(previous|above) instructions",
+    "system prompt",
+    "pretend to be",
+    "exfiltrate",
+    "unrelated task",
 ]
 
+def _normalize_phrase(phrase: str) -> str:
+    return " ".join(phrase.lower().split())
+
+
+def _trie_regex(phrases: Iterable[str]) -> str:
+    """
+    Compile literal phrases into a prefix-sharing regex, so the engine walks
+    one trie per text position instead of trying every phrase in turn.
+    """
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for word_idx, word in enumerate(phrase.split(" ")):
+            for char in (" " if word_idx else "") + word:
+                node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: dict) -> str:
+        branches = []
+        for char, child in sorted(node.items()):
+            if char == "":
+                continue
+            token = r"\s+" if char == " " else re.escape(char)
+            branches.append(token + render(child))
+        if "" in node:
+            branches.append("")
+        if not branches:
+            return ""
+        if len(branches) == 1:
+            return branches[0]
+        optional = "" in node
+        body = "|".join(b for b in branches if b)
+        return f"(?:{body})?" if optional else f"(?:{body})"
+
+    return render(trie)
+
+
+def _top_level_branches(regex: str) -> list[str]:
+    """Split ``regex`` on the ``|`` not nested in a group or character class."""
+    branches, start, depth, idx, in_class = [], 0, 0, 0, False
+    while idx < len(regex):
+        char = regex[idx]
+        if char == "\\":
+            idx += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+            # A "]" right after "[" or "[^" is literal.
+            if regex[idx + 1 : idx + 2] == "^":
+                idx += 1
+            if regex[idx + 1 : idx + 2] == "]":
+                idx += 1
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            branches.append(regex[start:idx])
+            start = idx + 1
+        idx += 1
+    branches.append(regex[start:])
+    return branches
+
+
+def _literal_first_chars(regex: str) -> set[str] | None:
+    """
+    Characters every match of ``regex`` starts with, when each top-level
+    branch provably starts with a plain, unquantified letter or digit;
+    otherwise None.
+    """
+    chars = set()
+    for branch in _top_level_branches(regex):
+        if not branch or not branch[0].isalnum() or branch[1:2] in ("?", "*", "{"):
+            return None
+        chars.add(branch[0].lower())
+    return chars
+
+
+class InjectionMatcher:
+    """
+    Every injection pattern combined into a single regex, so one scan of the
+    text both detects and redacts. Literal phrases share one trie-shaped
+    alternative; each regex pattern gets its own named group.
+
+    Matches are leftmost-first across all patterns, so a pattern that only
+    occurs inside text already redacted for another pattern is not reported.
+    """
+
+    def __init__(self, patterns: list[str]) -> None:
+        self.patterns = patterns
+        self._literals: dict[str, str] = {}
+        self._regexes: list[str] = []
+        for pattern in patterns:
+            if pattern.startswith("re:"):
+                self._regexes.append(pattern[3:])
+            elif pattern.strip():
+                self._literals.setdefault(_normalize_phrase(pattern), pattern)
+        alternatives = [f"(?P<r{idx}>{regex})" for idx, regex in enumerate(self._regexes)]
+        if self._literals:
+            alternatives.append(f"(?P<lit>{_trie_regex(self._literals)})")
+        combined = "|".join(alternatives)
+        # A lookahead on the possible first characters lets the engine skip
+        # most positions without entering the alternation.
+        first_chars: set[str] | None = {phrase[0] for phrase in self._literals}
+        for regex in self._regexes:
+            branch_chars = _literal_first_chars(regex)
+            if branch_chars is None:
+                first_chars = None
+                break
+            first_chars |= branch_chars
+        if combined and first_chars is not None:
+            combined = f"(?=[{re.escape(''.join(sorted(first_chars)))}])(?:{combined})"
+        self._combined = re.compile(combined, re.IGNORECASE) if alternatives else None
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "InjectionMatcher":
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+        return cls([line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")])
+
+    def scan(self, text: str) -> tuple[str, list[str]]:
+        """
+        Return the redacted text and the triggering patterns (``re:`` prefix
+        stripped) in order of first hit.
+        """
+        if self._combined is None:
+            return text, []
+        hits: dict[str, None] = {}
+
+        def _redact(match: re.Match) -> str:
+            group = match.lastgroup
+            if group == "lit":
+                hits.setdefault(self._literals[_normalize_phrase(match.group(0))])
+            else:
+                hits.setdefault(self._regexes[int(group[1:])])
+            return REDACTION
+
+        return self._combined.sub(_redact, text), list(hits)
+
+
+@lru_cache
+def get_injection_matcher() -> InjectionMatcher:
+    if settings.injection_patterns_path:
+        return InjectionMatcher.from_file(settings.injection_patterns_path)
+    return InjectionMatcher(DEFAULT_INJECTION_PATTERNS)
+
+
+_FILTER_MEMO: "OrderedDict[bytes, tuple[str, list[GuardrailWarning]]]" = OrderedDict()
+_FILTER_MEMO_MAX_CHARS = 8_000_000
+_filter_memo_chars = 0
+_FILTER_MEMO_LOCK = threading.Lock()
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _remember(key: bytes, value: tuple[str, list[GuardrailWarning]]) -> None:
+    global _filter_memo_chars
+    if len(value[0]) > _FILTER_MEMO_MAX_CHARS:
+        return
+    with _FILTER_MEMO_LOCK:
+        previous = _FILTER_MEMO.pop(key, None)
+        if previous is not None:
+            _filter_memo_chars -= len(previous[0])
+        _FILTER_MEMO[key] = value
+        _filter_memo_chars += len(value[0])
+        while _filter_memo_chars > _FILTER_MEMO_MAX_CHARS:
+            _, evicted = _FILTER_MEMO.popitem(last=False)
+            _filter_memo_chars -= len(evicted[0])
+
 
 def filter_malicious_segments(text: str) -> tuple[str, list[GuardrailWarning]]:
-    warnings: list[GuardrailWarning] = []
-    sanitized = text
-    for pattern in INJECTION_PATTERNS:
-        if pattern.search(text):
-            warnings.append(
-                GuardrailWarning(
-                    type="content_filter",
-                    message="Detected potential prompt injection content; sanitized input.",
-                    triggered_by=pattern.pattern,
-                )
-            )
-            sanitized = pattern.sub("[filtered]", sanitized)
-    return sanitized, warnings
+    """
+    Redact prompt-injection content in a single pass.
+
+    Results are memoized by content digest, and the sanitized output is
+    remembered as clean, so the pipeline re-checking text that ``/analyze``
+    already filtered costs one hash instead of another scan.
+    """
+    key = _digest(text)
+    with _FILTER_MEMO_LOCK:
+        cached = _FILTER_MEMO.get(key)
+        if cached is not None:
+            _FILTER_MEMO.move_to_end(key)
+    if cached is not None:
+        return cached[0], list(cached[1])
+
+    sanitized, triggered = get_injection_matcher().scan(text)
+    warnings = [
+        GuardrailWarning(
+            type="content_filter",
+            message="Detected potential prompt injection content; sanitized input.",
+            triggered_by=pattern,
+        )
+        for pattern in triggered
+    ]
+    _remember(key, (sanitized, warnings))
+    if warnings:
+        _remember(_digest(sanitized), (sanitized, []))
+    return sanitized, list(warnings)
 
 
 def ensure_retrieval_guardrails(findings: Iterable[dict]) -> list[GuardrailWarning]:
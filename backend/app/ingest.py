@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import codecs
+from typing import AsyncIterator
+
+
+async def iter_windows(
+    chunks: AsyncIterator[bytes], window_size: int, overlap: int
+) -> AsyncIterator[tuple[int, str]]:
+    """
+    Re-chunk a UTF-8 byte stream into overlapping ``(offset, text)`` windows.
+
+    Every window but the last is exactly ``window_size`` characters and starts
+    ``window_size - overlap`` characters after the previous one. The final
+    window is always shorter than ``window_size`` and covers the remaining
+    tail, including the overlap that its predecessor did not own. At most one
+    window plus one network chunk is held in memory.
+    """
+    if not 0 <= overlap < window_size:
+        raise ValueError("overlap must be smaller than window_size")
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    step = window_size - overlap
+    buffer = ""
+    offset = 0
+    final = False
+    chunk_iter = chunks.__aiter__()
+    while not final:
+        try:
+            buffer += decoder.decode(await chunk_iter.__anext__())
+        except StopAsyncIteration:
+            buffer += decoder.decode(b"", final=True)
+            final = True
+        while len(buffer) >= window_size:
+            yield offset, buffer[:window_size]
+            buffer = buffer[step:]
+            offset += step
+    if buffer:
+        yield offset, buffer
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-/][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or shall that the this to was "
+    "will with within any all such be been being which who whom".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased word tokens; hyphenated and slashed terms (``pay-when-paid``, ``vob/b``) stay whole."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+@dataclass
+class BM25Index:
+    """Okapi BM25 over one playbook version's chunks."""
+
+    ids: list[str]
+    documents: list[str]
+    doc_lengths: list[int]
+    postings: dict[str, list[tuple[int, int]]]  # term -> [(doc index, term frequency)]
+    k1: float = 1.5
+    b: float = 0.75
+
+    @classmethod
+    def build(cls, ids: list[str], documents: list[str]) -> "BM25Index":
+        postings: dict[str, list[tuple[int, int]]] = {}
+        doc_lengths = []
+        for doc_idx, document in enumerate(documents):
+            tokens = tokenize(document)
+            doc_lengths.append(len(tokens))
+            for term, freq in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc_idx, freq))
+        return cls(ids=list(ids), documents=list(documents), doc_lengths=doc_lengths, postings=postings)
+
+    def top_k(self, query: str, k: int) -> list[tuple[int, float]]:
+        """``(doc index, score)`` pairs for the best ``k`` matching chunks, best first."""
+        n_docs = len(self.ids)
+        if not n_docs:
+            return []
+        avg_length = (sum(self.doc_lengths) / n_docs) or 1.0
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_idx, freq in posting:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_idx] / avg_length)
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "ids": self.ids,
+                "documents": self.documents,
+                "doc_lengths": self.doc_lengths,
+                "postings": self.postings,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> "BM25Index":
+        data = json.loads(raw)
+        return cls(
+            ids=data["ids"],
+            documents=data["documents"],
+            doc_lengths=data["doc_lengths"],
+            postings={term: [tuple(entry) for entry in posting] for term, posting in data["postings"].items()},
+        )
+
+
+FileStamp = tuple[int, int, int]
+
+
+def file_stamp(path: Path) -> FileStamp | None:
+    """
+    Identity of the file now at ``path``: index files are replaced with
+    ``os.replace``, so a rewrite by any process changes its inode and mtime.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class LexicalIndexStore:
+    """
+    Per-version BM25 indexes persisted as ``<version_id>.bm25.json`` so every
+    worker process can load them, and kept in memory after first use. Each
+    lookup compares the file's stamp with the one loaded, so a version
+    reindexed by another process is reloaded.
+    """
+
+    def __init__(self, index_dir: str | Path) -> None:
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._indexes: dict[str, tuple[BM25Index, FileStamp]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, version_id: str) -> Path:
+        return self.index_dir / f"{version_id}.bm25.json"
+
+    def stamp(self, version_id: str) -> FileStamp | None:
+        return file_stamp(self._path(version_id))
+
+    def write(self, version_id: str, ids: list[str], documents: list[str]) -> BM25Index:
+        index = BM25Index.build(ids, documents)
+        path = self._path(version_id)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(index.to_json(), encoding="utf-8")
+        os.replace(tmp_path, path)
+        stamp = file_stamp(path)
+        with self._lock:
+            if stamp is not None:
+                self._indexes[version_id] = (index, stamp)
+        return index
+
+    def get(self, version_id: str) -> BM25Index | None:
+        path = self._path(version_id)
+        stamp = file_stamp(path)
+        if stamp is None:
+            self._indexes.pop(version_id, None)
+            return None
+        cached = self._indexes.get(version_id)
+        if cached is not None and cached[1] == stamp:
+            return cached[0]
+        with self._lock:
+            cached = self._indexes.get(version_id)
+            if cached is None or cached[1] != stamp:
+                cached = (BM25Index.from_json(path.read_text(encoding="utf-8")), stamp)
+                self._indexes[version_id] = cached
+        return cached[0]
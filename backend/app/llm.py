@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import hashlib
 import logging
+import threading
+import time
 from dataclasses import dataclass
-from typing import Any, Optional
-
-import anthropic
+from typing import TYPE_CHECKING, Any, Optional
 
 from .config import get_settings
+from .metrics import LLM_COST, LLM_TOKENS, span
+from .tokens import TokenBudget, count_tokens
+
+if TYPE_CHECKING:
+    import anthropic
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -14,50 +20,215 @@ settings = get_settings()
 
 @dataclass
 class LLMUsage:
+    """
+    Token usage of one or more calls. As in the Messages API,
+    ``input_tokens`` excludes prompt-prefix tokens written to or read from
+    the prompt cache, which are billed at their own rates.
+    """
+
     input_tokens: int
     output_tokens: int
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
 
     @property
     def total_tokens(self) -> int:
-        return self.input_tokens + self.output_tokens
+        return (
+            self.input_tokens
+            + self.output_tokens
+            + self.cache_creation_input_tokens
+            + self.cache_read_input_tokens
+        )
 
     @property
     def estimated_cost(self) -> float:
         return (
             self.input_tokens * settings.cost_per_input_token
             + self.output_tokens * settings.cost_per_output_token
+            + self.cache_creation_input_tokens * settings.cost_per_cache_write_token
+            + self.cache_read_input_tokens * settings.cost_per_cache_read_token
+        )
+
+    def add(self, other: "LLMUsage") -> None:
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cache_creation_input_tokens += other.cache_creation_input_tokens
+        self.cache_read_input_tokens += other.cache_read_input_tokens
+
+
+class PromptCacheSimulator:
+    """
+    Local model of the API's prompt cache, for the offline client and the
+    fake Messages server: a prefix of at least ``min_tokens`` is written on
+    first use and read until ``ttl_seconds`` pass without a hit.
+    """
+
+    def __init__(self, min_tokens: int, ttl_seconds: float, max_entries: int = 1024) -> None:
+        self.min_tokens = min_tokens
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._expires: dict[bytes, float] = {}
+        self._lock = threading.Lock()
+
+    def account(self, prefix: str, prefix_tokens: int) -> tuple[int, int]:
+        """``(cache_creation_input_tokens, cache_read_input_tokens)`` for a call sending ``prefix``."""
+        if prefix_tokens < self.min_tokens:
+            return 0, 0
+        key = hashlib.blake2b(prefix.encode("utf-8"), digest_size=16).digest()
+        now = time.monotonic()
+        with self._lock:
+            hit = self._expires.get(key, 0.0) > now
+            self._expires[key] = now + self.ttl_seconds
+            if len(self._expires) > self.max_entries:
+                self._expires = {k: v for k, v in self._expires.items() if v > now}
+        return (0, prefix_tokens) if hit else (prefix_tokens, 0)
+
+
+prompt_cache = PromptCacheSimulator(settings.prompt_cache_min_tokens, settings.prompt_cache_ttl_seconds)
+
+
+_sdk_clients: dict[tuple, "anthropic.AsyncAnthropic"] = {}
+
+
+def _sdk_client(api_key: str) -> "anthropic.AsyncAnthropic":
+    """One SDK client, and so one connection pool, per configuration for all analyses."""
+    key = (api_key, settings.anthropic_base_url, settings.anthropic_max_retries)
+    client = _sdk_clients.get(key)
+    if client is None:
+        # Imported on first use so that startup does not pay for the SDK.
+        import anthropic
+
+        client = _sdk_clients[key] = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            base_url=settings.anthropic_base_url,
+            max_retries=settings.anthropic_max_retries,
         )
+    return client
+
+
+async def close_sdk_clients() -> None:
+    """Close the SDK clients' connection pools; called on shutdown."""
+    clients = list(_sdk_clients.values())
+    _sdk_clients.clear()
+    for client in clients:
+        await client.close()
 
 
 class AnthropicClient:
-    def __init__(self) -> None:
+    def __init__(self, budget: TokenBudget | None = None, batch: bool = False) -> None:
+        self.budget = budget
+        self.batch = batch
         self.api_key = settings.anthropic_api_key
         self.model = settings.anthropic_model
-        self.client: Optional[anthropic.AsyncAnthropic] = None
-        if self.api_key:
-            self.client = anthropic.AsyncAnthropic(api_key=self.api_key)
+        self.client: Optional["anthropic.AsyncAnthropic"] = _sdk_client(self.api_key) if self.api_key else None
 
-    async def complete(self, prompt: str, max_tokens: int = 512) -> tuple[str, LLMUsage]:
+    async def complete(
+        self, prompt: str, max_tokens: int = 512, cache_prefix: str | None = None
+    ) -> tuple[str, LLMUsage]:
         """
         Run a lightweight Claude completion. If no API key is configured,
         return a deterministic heuristic response to keep tests offline.
+
+        ``cache_prefix`` is sent ahead of ``prompt`` as the system prompt and,
+        with ``PROMPT_CACHE`` on, marked cacheable so calls sharing it are
+        billed cache reads; the offline path simulates that accounting.
+
+        With a ``budget``, the prompt's token count plus ``max_tokens`` is
+        checked first and ``TokenBudgetExceeded`` raised instead of sending
+        the request; actual usage is charged afterwards.
+
+        With ``batch``, the request is queued on ``batch_queue`` and sent
+        with other analyses' requests through the Message Batches API; the
+        call returns once that batch has ended.
         """
+        prompt_tokens = count_tokens(prompt)
+        prefix_tokens = count_tokens(cache_prefix) if cache_prefix else 0
+        if self.budget is not None:
+            self.budget.check(prompt_tokens + prefix_tokens + max_tokens)
         if not self.client:
             faux_output = "Heuristic analysis: compare extracted clauses to playbook references."
-            approx_input_tokens = len(prompt) // 4
-            approx_output_tokens = len(faux_output) // 4
-            usage = LLMUsage(approx_input_tokens, approx_output_tokens)
+            written, read = (0, 0)
+            if cache_prefix and settings.prompt_cache_enabled:
+                written, read = prompt_cache.account(cache_prefix, prefix_tokens)
+            usage = LLMUsage(
+                prompt_tokens + prefix_tokens - written - read,
+                count_tokens(faux_output),
+                written,
+                read,
+            )
+            self._charge(usage)
+            _record_usage(usage, "heuristic")
             return faux_output, usage
 
-        message = await self.client.messages.create(
-            model=self.model,
-            max_tokens=max_tokens,
-            temperature=0,
-            messages=[{"role": "user", "content": prompt}],
-        )
+        if self.batch:
+            return await self._complete_in_batch(prompt, max_tokens, cache_prefix)
+
+        request: dict[str, Any] = {}
+        if cache_prefix:
+            request["system"] = [_system_block(cache_prefix)]
+            if settings.prompt_cache_enabled:
+                request["extra_headers"] = {"anthropic-beta": "prompt-caching-2024-07-31"}
+        with span("llm"):
+            message = await self.client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                temperature=0,
+                messages=[{"role": "user", "content": prompt}],
+                **request,
+            )
         output_text = "".join([block.text for block in message.content if hasattr(block, "text")])
         usage = LLMUsage(
             message.usage.input_tokens or 0,
             message.usage.output_tokens or 0,
+            getattr(message.usage, "cache_creation_input_tokens", None) or 0,
+            getattr(message.usage, "cache_read_input_tokens", None) or 0,
         )
+        self._charge(usage)
+        _record_usage(usage, "api")
         return output_text, usage
+
+    async def _complete_in_batch(
+        self, prompt: str, max_tokens: int, cache_prefix: str | None
+    ) -> tuple[str, LLMUsage]:
+        from .batch import batch_queue
+
+        params: dict[str, Any] = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "temperature": 0,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if cache_prefix:
+            params["system"] = [_system_block(cache_prefix)]
+        with span("llm_batch"):
+            message = await batch_queue.submit(params)
+        output_text = "".join(block.get("text", "") for block in message.get("content", []))
+        reported = message.get("usage") or {}
+        usage = LLMUsage(
+            reported.get("input_tokens") or 0,
+            reported.get("output_tokens") or 0,
+            reported.get("cache_creation_input_tokens") or 0,
+            reported.get("cache_read_input_tokens") or 0,
+        )
+        self._charge(usage)
+        _record_usage(usage, "batch")
+        return output_text, usage
+
+    def _charge(self, usage: LLMUsage) -> None:
+        if self.budget is not None:
+            self.budget.charge(usage.total_tokens)
+
+
+def _system_block(cache_prefix: str) -> dict[str, Any]:
+    block: dict[str, Any] = {"type": "text", "text": cache_prefix}
+    if settings.prompt_cache_enabled:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+
+def _record_usage(usage: LLMUsage, source: str) -> None:
+    LLM_TOKENS.inc(usage.input_tokens, direction="input", source=source)
+    LLM_TOKENS.inc(usage.output_tokens, direction="output", source=source)
+    LLM_TOKENS.inc(usage.cache_creation_input_tokens, direction="cache_write", source=source)
+    LLM_TOKENS.inc(usage.cache_read_input_tokens, direction="cache_read", source=source)
+    LLM_COST.inc(usage.estimated_cost, source=source)
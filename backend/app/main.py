@@ -1,54 +1,82 @@
 import asyncio
 import json
 import logging
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal, Optional
 from pathlib import Path
 import uuid
 
 from fastapi import (
-    BackgroundTasks,
     Depends,
     FastAPI,
     HTTPException,
+    Query,
     Request,
     Response,
     status,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.util import get_remote_address
-from sqlalchemy import select
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy import inspect, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .batch import batch_queue
 from .config import get_settings
 from .database import Base, engine, get_session
-from .events import event_bus
+from .events import TERMINAL_EVENTS, event_bus
 from .guards import filter_malicious_segments
+from .metrics import LLM_COST, LLM_TOKENS, registry
 from .models import Analysis, PlaybookVersion
-from .pipeline import run_analysis_pipeline
-from .playbook import list_playbook_versions, persist_chunks, seed_playbook
+from .export import AnalysisFilters, analysis_filters, decode_cursor, export_csv, export_ndjson, list_analyses
+from .ingest import iter_windows
+from .llm import close_sdk_clients
+from .pipeline import run_analysis_pipeline, run_revision_pipeline, run_streaming_pipeline
+from .rag import retrieval_cache
+from .ratelimit import BucketState, client_id, contract_units, rate_limiter
+from .rescore import RescoreJob, rescore_jobs, resolve_contract_text
+from .profiling import (
+    PROFILE_SORTS,
+    ProfileReservation,
+    profile_reservation,
+    profile_slot,
+    profile_store,
+    profiled,
+)
+from .segments import build_section_index
+from .tasks import ShuttingDown, task_registry
+from .tokens import BUDGET_REJECTIONS, client_ledger, token_counter
+from .warmup import warmup
+from .workers import loop_lag_monitor, run_blocking, run_cpu, worker_pool
+from .playbook import list_playbook_versions, persist_chunks, playbook_cache, seed_playbook
 from .schemas import (
     AnalysisCreateRequest,
+    AnalysisListResponse,
+    AnalysisRevisionRequest,
     AnalysisResult,
     AnalysisStatusResponse,
+    ClauseContextResponse,
     GuardrailWarning,
     PlaybookReindexRequest,
     PlaybookResponse,
     PlaybookUpdateRequest,
+    ProfileSummary,
+    RescoreJobResponse,
+    RescoreRequest,
+    RevisionResponse,
+    SectionInfo,
+    StreamingAnalysisCreateRequest,
 )
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 settings = get_settings()
 IN_MEMORY_RESULTS: dict[str, dict] = {}
+IN_MEMORY_PENDING: dict[str, Analysis] = {}
+IN_MEMORY_ANALYSES: dict[str, Analysis] = {}
 
-limiter = Limiter(key_func=get_remote_address, default_limits=[f"{settings.rate_limit_per_minute}/minute"])
 app = FastAPI(title=settings.app_name)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.state.limiter = rate_limiter
 
 app.add_middleware(
     CORSMiddleware,
@@ -68,22 +96,140 @@ async def root() -> dict[str, str]:
     }
 
 
-@app.on_event("startup")
-async def startup_event() -> None:
-    if settings.in_memory_mode:
-        return
+# Columns added to existing tables after their first release; ``create_all``
+# only creates missing tables, so databases from older deployments get them here.
+ADDED_COLUMNS: dict[str, list[tuple[str, str]]] = {
+    "analyses": [
+        ("parent_id", "VARCHAR REFERENCES analyses(id)"),
+        ("clause_findings_json", "TEXT"),
+        ("content_hash", "VARCHAR"),
+        ("checkpoint_json", "TEXT"),
+    ],
+}
+
+
+def _add_missing_columns(conn) -> None:
+    inspector = inspect(conn)
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {column["name"] for column in inspector.get_columns(table)}
+        for name, ddl in columns:
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+async def _create_tables() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+
+
+async def _seed_playbook() -> None:
     async with get_session() as session:
         await seed_playbook(session, str(settings.resolve_playbook_path()))
 
 
+async def _load_embedding_model() -> None:
+    await run_blocking(playbook_cache.rag.warm)
+
+
+async def _load_tokenizer() -> None:
+    await run_blocking(token_counter.load)
+
+
+async def _resume_requeued() -> None:
+    """Restart analyses that a previous process handed back while shutting down."""
+    async with get_session() as session:
+        analysis_ids = (await session.execute(select(Analysis.id).where(Analysis.status == "requeued"))).scalars().all()
+    for analysis_id in analysis_ids:
+        # Claim each one so that only one of several starting workers runs it.
+        async with get_session() as session:
+            claimed = await session.execute(
+                update(Analysis)
+                .where(Analysis.id == analysis_id, Analysis.status == "requeued")
+                .values(status="queued")
+            )
+        if claimed.rowcount == 1:
+            logger.info("Resuming requeued analysis %s", analysis_id)
+            task_registry.start(analysis_id, _process_analysis(analysis_id))
+
+
+@app.on_event("startup")
+async def startup_event() -> None:
+    loop_lag_monitor.start()
+    if settings.in_memory_mode:
+        return
+    # Serve /health immediately; schema, playbook embeddings and the embedding
+    # model are prepared in the background and reported by /ready.
+    warmup.start(
+        [
+            ("database", _create_tables),
+            ("playbook", _seed_playbook),
+            ("embedding_model", _load_embedding_model),
+            ("tokenizer", _load_tokenizer),
+            ("requeued", _resume_requeued),
+        ]
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    await warmup.stop()
+    # Background analyses get until the deadline to finish; the rest are
+    # requeued for the next process and their subscribers told so.
+    requeued = await task_registry.drain(settings.shutdown_grace_seconds)
+    if requeued:
+        logger.warning("Requeued %d unfinished analyses: %s", len(requeued), ", ".join(requeued))
+    await loop_lag_monitor.stop()
+    worker_pool.shutdown()
+    await batch_queue.close()
+    await close_sdk_clients()
+    playbook_cache.close()
+    await engine.dispose()
+
+
+async def _await_warmup(*stages: str) -> None:
+    # Requests arriving during warmup wait for the stages they need; a failed
+    # warmup lets them through so the underlying error surfaces.
+    if not await warmup.wait_for(stages, settings.warmup_wait_seconds):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service is warming up",
+            headers={"Retry-After": "5"},
+        )
+
+
+async def database_ready() -> None:
+    if not settings.in_memory_mode:
+        await _await_warmup("database")
+
+
 async def session_dependency():
     if settings.in_memory_mode:
         yield None
-    else:
-        async with get_session() as session:
-            yield session
+        return
+    await _await_warmup("database")
+    async with get_session() as session:
+        yield session
+
+
+async def accepting_work() -> None:
+    """Routes that start background analyses refuse them once shutdown has begun."""
+    if not task_registry.accepting:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service is shutting down",
+            headers={"Retry-After": "5"},
+        )
+
+
+def _rate_limited(scope: str, per_minute: int) -> list:
+    """Route dependencies charging the client's ``scope`` bucket, which may live in the database."""
+    return [Depends(database_ready), Depends(rate_limiter.limit(scope, per_minute))]
+
+
+async def retrieval_ready() -> None:
+    """Routes that index or query the playbook also wait for it and the embedding model."""
+    await _await_warmup("database", "playbook", "embedding_model")
 
 
 @app.get("/health")
@@ -91,7 +237,100 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
-async def _process_analysis(analysis_id: str) -> None:
+@app.get("/ready", tags=["meta"])
+async def ready() -> JSONResponse:
+    """Readiness probe: 503 with per-stage progress until startup warmup has finished."""
+    return JSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
+
+
+@app.get("/metrics", tags=["meta"])
+async def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of this process' metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/loop", tags=["meta"])
+async def loop_lag() -> dict[str, float]:
+    """Event-loop scheduling lag observed by the background monitor."""
+    return loop_lag_monitor.stats()
+
+
+@app.get("/usage", tags=["meta"])
+async def token_usage(request: Request) -> dict:
+    """Process-wide LLM token and cost totals by source, and the caller's own token budget window."""
+    totals = {
+        source: {
+            "input_tokens": int(LLM_TOKENS.value(direction="input", source=source)),
+            "output_tokens": int(LLM_TOKENS.value(direction="output", source=source)),
+            "cache_creation_input_tokens": int(LLM_TOKENS.value(direction="cache_write", source=source)),
+            "cache_read_input_tokens": int(LLM_TOKENS.value(direction="cache_read", source=source)),
+            "estimated_cost_usd": round(LLM_COST.value(source=source), 6),
+        }
+        for source in ("api", "batch", "heuristic")
+    }
+    return {
+        "tokenizer": token_counter.source,
+        "analysis_token_budget": settings.analysis_token_budget or None,
+        "client": client_ledger.usage(client_id(request)),
+        "totals": totals,
+        "batch_queue": batch_queue.stats(),
+    }
+
+
+@app.get("/retrieval/cache", tags=["meta"])
+async def retrieval_cache_stats() -> dict[str, float]:
+    """Hit rate and size of the clause-retrieval result cache."""
+    return retrieval_cache.stats()
+
+
+def _serialize_result(result: AnalysisResult) -> dict:
+    return json.loads(result.json())
+
+
+async def _record_result(session: AsyncSession, analysis: Analysis, result: AnalysisResult) -> dict:
+    analysis.status = "completed"
+    serialized_result = await run_cpu(_serialize_result, result)
+    analysis.set_result(serialized_result)
+    if result.guardrail_warnings:
+        analysis.set_guardrails([w.dict() for w in result.guardrail_warnings])
+    if result.usage:
+        analysis.set_usage(result.usage.dict())
+    await session.flush()
+    return serialized_result
+
+
+def _client_budget(request: Request) -> str:
+    """The requester's id for token budgets; 429 when its ``CLIENT_TOKEN_BUDGET`` window is spent."""
+    requester = client_id(request)
+    if client_ledger.remaining(requester) == 0:
+        BUDGET_REJECTIONS.inc(scope="client")
+        retry_after = client_ledger.usage(requester)["resets_in_seconds"]
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Token budget exhausted for this client",
+            headers={"Retry-After": str(int(retry_after or 0) + 1)},
+        )
+    return requester
+
+
+def _maybe_profiled(analysis_id: str, profile: bool):
+    return profiled(analysis_id) if profile else nullcontext()
+
+
+async def _process_analysis(
+    analysis_id: str, profile: bool = False, client_id: str | None = None, llm_mode: str = "interactive"
+) -> None:
+    """With ``profile``, the request handed its hold on ``profile_slot`` to this task."""
+    try:
+        await _run_background_analysis(analysis_id, profile, client_id, llm_mode)
+    finally:
+        if profile:
+            profile_slot.release()
+
+
+async def _run_background_analysis(
+    analysis_id: str, profile: bool, client_id: str | None, llm_mode: str = "interactive"
+) -> None:
     async with get_session() as session:
         result = await session.execute(select(Analysis).where(Analysis.id == analysis_id))
         analysis = result.scalars().first()
@@ -109,22 +348,38 @@ async def _process_analysis(analysis_id: str) -> None:
                     initial_guardrails = [GuardrailWarning(**w) for w in json.loads(analysis.guardrail_warnings)]
                 except Exception:
                     initial_guardrails = []
-            pipeline_result = await run_analysis_pipeline(
-                session, analysis, streamer=streamer, initial_guardrails=initial_guardrails
-            )
-            analysis.status = "completed"
-            serialized_result = json.loads(pipeline_result.json())
-            analysis.set_result(serialized_result)
-            if pipeline_result.guardrail_warnings:
-                analysis.set_guardrails([w.dict() for w in pipeline_result.guardrail_warnings])
-            if pipeline_result.usage:
-                analysis.set_usage(pipeline_result.usage.dict())
-            await session.flush()
+            with _maybe_profiled(analysis.id, profile):
+                pipeline_result = await run_analysis_pipeline(
+                    session,
+                    analysis,
+                    streamer=streamer,
+                    initial_guardrails=initial_guardrails,
+                    client_id=client_id,
+                    llm_mode=llm_mode,
+                )
+            serialized_result = await _record_result(session, analysis, pipeline_result)
             event_bus.publish(
                 analysis.id,
                 "final",
                 {"analysis_id": analysis.id, "result": serialized_result},
             )
+        except asyncio.CancelledError:
+            # Cancelled by shutdown: hand the analysis back for the next process,
+            # with the checkpoint the pipeline left so that it resumes from there.
+            checkpoint_json = analysis.checkpoint_json
+            await session.rollback()
+            await session.execute(
+                update(Analysis)
+                .where(Analysis.id == analysis_id)
+                .values(status="requeued", checkpoint_json=checkpoint_json)
+            )
+            await session.commit()
+            event_bus.publish(
+                analysis_id,
+                "error",
+                {"analysis_id": analysis_id, "status": "requeued", "error": "Server shutting down; analysis requeued"},
+            )
+            raise
         except Exception as exc:
             logger.exception("Analysis failed: %s", exc)
             analysis.status = "failed"
@@ -136,10 +391,19 @@ async def _process_analysis(analysis_id: str) -> None:
             )
 
 
-@app.post("/analyze", response_model=AnalysisStatusResponse)
-@limiter.limit(f"{settings.rate_limit_per_minute}/minute")
-async def analyze(request: Request, payload: AnalysisCreateRequest, background_tasks: BackgroundTasks, session: AsyncSession | None = Depends(session_dependency)) -> AnalysisStatusResponse:
-    contract_text, guardrails = filter_malicious_segments(payload.contract_text)
+@app.post(
+    "/analyze",
+    response_model=AnalysisStatusResponse,
+    dependencies=[
+        Depends(accepting_work),
+        *_rate_limited("analyze", settings.rate_limit_per_minute),
+        Depends(retrieval_ready),
+    ],
+)
+async def analyze(request: Request, payload: AnalysisCreateRequest, session: AsyncSession | None = Depends(session_dependency), reservation: ProfileReservation = Depends(profile_reservation)) -> AnalysisStatusResponse:
+    profile = reservation.active
+    client_id = _client_budget(request)
+    contract_text, guardrails = await run_cpu(filter_malicious_segments, payload.contract_text)
     if settings.in_memory_mode:
         analysis_id = str(uuid.uuid4())
         fake_analysis = Analysis(
@@ -151,14 +415,18 @@ async def analyze(request: Request, payload: AnalysisCreateRequest, background_t
             guardrail_warnings=json.dumps([g.dict() for g in guardrails]) if guardrails else None,
         )
         playbook_content = settings.resolve_playbook_path().read_text(encoding="utf-8")
-        result = await run_analysis_pipeline(
-            None,
-            fake_analysis,
-            playbook_content_override=playbook_content,
-            initial_guardrails=guardrails,
-        )
+        with _maybe_profiled(analysis_id, profile):
+            result = await run_analysis_pipeline(
+                None,
+                fake_analysis,
+                playbook_content_override=playbook_content,
+                initial_guardrails=guardrails,
+                client_id=client_id,
+                llm_mode=payload.llm_mode,
+            )
         fake_analysis.status = "completed"
-        IN_MEMORY_RESULTS[analysis_id] = json.loads(result.json())
+        IN_MEMORY_RESULTS[analysis_id] = await run_cpu(_serialize_result, result)
+        IN_MEMORY_ANALYSES[analysis_id] = fake_analysis
         return AnalysisStatusResponse(analysis_id=analysis_id, status="completed")
 
     analysis = Analysis(
@@ -171,18 +439,117 @@ async def analyze(request: Request, payload: AnalysisCreateRequest, background_t
     session.add(analysis)
     await session.flush()
     if settings.inline_analysis:
-        result = await run_analysis_pipeline(session, analysis, initial_guardrails=guardrails)
-        analysis.status = "completed"
-        serialized_result = json.loads(result.json())
-        analysis.set_result(serialized_result)
-        if result.guardrail_warnings:
-            analysis.set_guardrails([g.dict() for g in result.guardrail_warnings])
-        if result.usage:
-            analysis.set_usage(result.usage.dict())
-        await session.flush()
+        with _maybe_profiled(analysis.id, profile):
+            result = await run_analysis_pipeline(
+                session, analysis, initial_guardrails=guardrails, client_id=client_id, llm_mode=payload.llm_mode
+            )
+        await _record_result(session, analysis, result)
         return AnalysisStatusResponse(analysis_id=analysis.id, status=analysis.status)
 
-    background_tasks.add_task(_process_analysis, analysis.id)
+    # Committed before the task starts so that it, and a later process resuming it, can load the row.
+    await session.commit()
+    try:
+        task_registry.start(analysis.id, _process_analysis(analysis.id, profile, client_id, payload.llm_mode))
+    except ShuttingDown:
+        analysis.status = "requeued"
+        return AnalysisStatusResponse(analysis_id=analysis.id, status=analysis.status)
+    reservation.handed_off = profile
+    return AnalysisStatusResponse(analysis_id=analysis.id, status=analysis.status)
+
+
+@app.post(
+    "/analyze/stream",
+    response_model=AnalysisStatusResponse,
+    dependencies=_rate_limited("analyze_stream", settings.rate_limit_per_minute),
+)
+async def create_streaming_analysis(request: Request, payload: StreamingAnalysisCreateRequest, session: AsyncSession | None = Depends(session_dependency)) -> AnalysisStatusResponse:
+    """
+    Reserve an analysis whose contract is uploaded separately via
+    ``PUT /analysis/{id}/content``, so clients can subscribe to the SSE stream
+    before the upload starts.
+    """
+    _client_budget(request)
+    analysis = Analysis(
+        analysis_type=payload.analysis_type,
+        contract_text="",
+        status="awaiting_upload",
+        playbook_version_id=payload.playbook_version_id,
+    )
+    if settings.in_memory_mode:
+        analysis.id = str(uuid.uuid4())
+        IN_MEMORY_PENDING[analysis.id] = analysis
+        return AnalysisStatusResponse(analysis_id=analysis.id, status=analysis.status)
+    session.add(analysis)
+    await session.flush()
+    return AnalysisStatusResponse(analysis_id=analysis.id, status=analysis.status)
+
+
+@app.put(
+    "/analysis/{analysis_id}/content",
+    response_model=AnalysisStatusResponse,
+    dependencies=[*_rate_limited("upload", settings.rate_limit_per_minute), Depends(retrieval_ready)],
+)
+async def upload_contract_content(analysis_id: str, request: Request, session: AsyncSession | None = Depends(session_dependency)) -> AnalysisStatusResponse:
+    """
+    Stream the raw contract text in the request body. The contract is scored
+    window by window as it arrives and findings are published on
+    ``/analysis/{id}/stream`` without waiting for the upload to finish.
+    """
+    if settings.in_memory_mode:
+        analysis = IN_MEMORY_PENDING.pop(analysis_id, None)
+    else:
+        analysis = await session.get(Analysis, analysis_id)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    if analysis.status != "awaiting_upload":
+        raise HTTPException(status_code=409, detail="Contract content already uploaded")
+    client_id = _client_budget(request)
+
+    async def streamer(event: str, data: Any) -> None:
+        event_bus.publish(analysis.id, event, data)
+
+    analysis.status = "running"
+    if session:
+        # Release the write lock before the upload; the pipeline writes nothing until it ends.
+        await session.commit()
+    event_bus.publish(analysis.id, "status", {"analysis_id": analysis.id, "status": "running", "message": "Receiving contract"})
+    windows = iter_windows(request.stream(), settings.stream_window_chars, settings.stream_window_overlap)
+    try:
+        result = await run_streaming_pipeline(
+            session,
+            analysis,
+            windows,
+            settings.stream_window_chars,
+            settings.stream_window_overlap,
+            streamer=streamer,
+            playbook_content_override=(
+                settings.resolve_playbook_path().read_text(encoding="utf-8")
+                if settings.in_memory_mode
+                else None
+            ),
+            client_id=client_id,
+        )
+    except Exception as exc:
+        logger.exception("Streaming analysis failed: %s", exc)
+        analysis.status = "failed"
+        if session:
+            await session.flush()
+        event_bus.publish(analysis.id, "error", {"analysis_id": analysis.id, "error": str(exc)})
+        raise HTTPException(status_code=500, detail="Analysis failed") from exc
+
+    if settings.in_memory_mode:
+        analysis.status = "completed"
+        serialized_result = await run_cpu(_serialize_result, result)
+        IN_MEMORY_RESULTS[analysis.id] = serialized_result
+        IN_MEMORY_ANALYSES[analysis.id] = analysis
+    else:
+        serialized_result = await _record_result(session, analysis, result)
+    event_bus.publish(analysis.id, "final", {"analysis_id": analysis.id, "result": serialized_result})
+    if "content-length" not in request.headers:
+        # Chunked uploads were admitted at the base cost; charge their size now.
+        await rate_limiter.charge(
+            request, "upload", settings.rate_limit_per_minute, contract_units(len(analysis.contract_text)) - 1
+        )
     return AnalysisStatusResponse(analysis_id=analysis.id, status=analysis.status)
 
 
@@ -204,13 +571,175 @@ async def get_analysis(analysis_id: str, session: AsyncSession | None = Depends(
     return AnalysisStatusResponse(analysis_id=analysis.id, status=analysis.status)
 
 
+async def _load_analysis(analysis_id: str, session: AsyncSession | None) -> Analysis:
+    if settings.in_memory_mode:
+        analysis = IN_MEMORY_ANALYSES.get(analysis_id)
+    else:
+        analysis = await session.get(Analysis, analysis_id)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return analysis
+
+
+async def _load_contract_text(analysis_id: str, session: AsyncSession | None) -> str:
+    analysis = await _load_analysis(analysis_id, session)
+    if session is None:
+        return analysis.contract_text
+    return await resolve_contract_text(session, analysis)
+
+
+@app.post(
+    "/analysis/{analysis_id}/retry",
+    response_model=AnalysisStatusResponse,
+    dependencies=[
+        Depends(accepting_work),
+        *_rate_limited("retry", settings.rate_limit_per_minute),
+        Depends(retrieval_ready),
+    ],
+)
+async def retry_analysis(request: Request, analysis_id: str, session: AsyncSession | None = Depends(session_dependency)) -> AnalysisStatusResponse:
+    """
+    Rerun a failed analysis in the background. Stages completed before the
+    failure (sanitizing, extraction, retrieval and each clause already
+    validated) are taken from its checkpoint instead of being run again.
+    """
+    if settings.in_memory_mode:
+        raise HTTPException(status_code=400, detail="Retrying analyses requires a database")
+    client_id = _client_budget(request)
+    # Claimed atomically so that concurrent retries start one run.
+    claimed = await session.execute(
+        update(Analysis).where(Analysis.id == analysis_id, Analysis.status == "failed").values(status="queued")
+    )
+    if claimed.rowcount != 1:
+        await _load_analysis(analysis_id, session)
+        raise HTTPException(status_code=409, detail="Only failed analyses can be retried")
+    await session.commit()
+    try:
+        task_registry.start(analysis_id, _process_analysis(analysis_id, client_id=client_id))
+    except ShuttingDown:
+        await session.execute(update(Analysis).where(Analysis.id == analysis_id).values(status="requeued"))
+        return AnalysisStatusResponse(analysis_id=analysis_id, status="requeued")
+    return AnalysisStatusResponse(analysis_id=analysis_id, status="queued")
+
+
+@app.post(
+    "/analysis/{analysis_id}/revise",
+    response_model=RevisionResponse,
+    dependencies=[*_rate_limited("revise", settings.rate_limit_per_minute), Depends(retrieval_ready)],
+)
+async def revise_analysis(request: Request, analysis_id: str, payload: AnalysisRevisionRequest, session: AsyncSession | None = Depends(session_dependency)) -> RevisionResponse:
+    """
+    Analyze a revised contract, reusing the parent's findings for sections
+    whose text did not change. Runs inline and returns the full result plus a
+    delta of added/removed/changed per-clause findings.
+    """
+    client_id = _client_budget(request)
+    parent = await _load_analysis(analysis_id, session)
+    if parent.status != "completed":
+        raise HTTPException(status_code=409, detail="Parent analysis has not completed")
+    contract_text, guardrails = await run_cpu(filter_malicious_segments, payload.contract_text)
+    analysis = Analysis(
+        analysis_type=parent.analysis_type,
+        contract_text=contract_text,
+        status="running",
+        playbook_version_id=payload.playbook_version_id or parent.playbook_version_id,
+        parent_id=parent.id,
+    )
+    if settings.in_memory_mode:
+        analysis.id = str(uuid.uuid4())
+    else:
+        session.add(analysis)
+        await session.flush()
+    result, delta, timings = await run_revision_pipeline(
+        session,
+        analysis,
+        parent,
+        parent_text=await resolve_contract_text(session, parent) if session else None,
+        playbook_content_override=(
+            settings.resolve_playbook_path().read_text(encoding="utf-8")
+            if settings.in_memory_mode
+            else None
+        ),
+        client_id=client_id,
+    )
+    result.guardrail_warnings = guardrails + result.guardrail_warnings
+    if settings.in_memory_mode:
+        analysis.status = "completed"
+        IN_MEMORY_RESULTS[analysis.id] = await run_cpu(_serialize_result, result)
+        IN_MEMORY_ANALYSES[analysis.id] = analysis
+    else:
+        await _record_result(session, analysis, result)
+    return RevisionResponse(parent_id=parent.id, result=result, delta=delta, timings=timings)
+
+
+@app.get("/analysis/{analysis_id}/profile", response_model=ProfileSummary)
+async def get_analysis_profile(analysis_id: str, sort: str = "cumulative", limit: int = 25) -> ProfileSummary:
+    """
+    Top functions of a profiled analysis (``DEBUG_MODE`` only). Run ``/analyze``
+    with ``X-Profile: 1`` or ``?profile=1`` to record one.
+    """
+    if not settings.debug_mode:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if sort not in PROFILE_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(PROFILE_SORTS)}")
+    summary = await run_blocking(profile_store.summary, analysis_id, sort, max(1, min(limit, 500)))
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return summary
+
+
+@app.get("/analysis/{analysis_id}/profile.prof")
+async def download_analysis_profile(analysis_id: str) -> FileResponse:
+    """Raw cProfile dump, loadable with ``pstats`` or snakeviz (``DEBUG_MODE`` only)."""
+    path = profile_store.path(analysis_id) if settings.debug_mode else None
+    if path is None or not path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+
+
+@app.get("/analysis/{analysis_id}/sections", response_model=list[SectionInfo])
+async def get_analysis_sections(analysis_id: str, session: AsyncSession | None = Depends(session_dependency)):
+    contract_text = await _load_contract_text(analysis_id, session)
+    index = build_section_index(contract_text)
+    return [SectionInfo(**section.dict()) for section in index.sections]
+
+
+@app.get("/analysis/{analysis_id}/context", response_model=ClauseContextResponse)
+async def get_clause_context(
+    analysis_id: str,
+    start: int,
+    end: int,
+    pad: int = 0,
+    session: AsyncSession | None = Depends(session_dependency),
+):
+    """Return the contract text for a finding's ``start``/``end`` span, optionally padded."""
+    contract_text = await _load_contract_text(analysis_id, session)
+    if start < 0 or end < start or end > len(contract_text):
+        raise HTTPException(status_code=416, detail="Span outside of stored contract text")
+    index = build_section_index(contract_text)
+    section = index.locate(start)
+    context_start, context_end = max(0, start - max(pad, 0)), min(len(contract_text), end + max(pad, 0))
+    return ClauseContextResponse(
+        analysis_id=analysis_id,
+        start=context_start,
+        end=context_end,
+        section=SectionInfo(**section.dict()) if section else None,
+        heading_path=index.heading_path(section) if section else None,
+        text=contract_text[context_start:context_end],
+    )
+
+
 def _format_sse(event: str, data: Any) -> str:
     return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
-@app.get("/analysis/{analysis_id}/stream")
-@limiter.limit(f"{settings.rate_limit_stream_per_minute}/minute")
-async def stream_analysis(request: Request, analysis_id: str):  # noqa: ARG001
+@app.get("/analysis/{analysis_id}/stream", dependencies=[Depends(database_ready)])
+async def stream_analysis(
+    analysis_id: str,
+    rate: BucketState | None = Depends(rate_limiter.limit("stream", settings.rate_limit_stream_per_minute)),
+):
+    # Streaming responses are returned as-is, so the rate limit headers go on them here.
+    headers = rate.headers() if rate else None
     if settings.in_memory_mode:
         data = IN_MEMORY_RESULTS.get(analysis_id)
         if not data:
@@ -219,12 +748,14 @@ async def stream_analysis(request: Request, analysis_id: str):  # noqa: ARG001
         async def immediate():
             yield _format_sse("final", {"analysis_id": analysis_id, "result": data})
 
-        return StreamingResponse(immediate(), media_type="text/event-stream")
+        return StreamingResponse(immediate(), media_type="text/event-stream", headers=headers)
 
     async def event_generator():
         async for item in event_bus.subscribe(analysis_id):
             yield _format_sse(item["event"], item["data"])
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+            if item["event"] in TERMINAL_EVENTS:
+                break
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=headers)
 
 
 @app.get("/playbook", response_model=PlaybookResponse)
@@ -239,10 +770,8 @@ async def get_current_playbook(session: AsyncSession | None = Depends(session_de
             version_label="in-memory",
         )
 
-    result = await session.execute(
-        select(PlaybookVersion).order_by(PlaybookVersion.created_at.desc())
-    )
-    version = result.scalars().first()
+    current = await playbook_cache.get_current(session)
+    version = await session.get(PlaybookVersion, current.id) if current else None
     if not version:
         raise HTTPException(status_code=404, detail="No playbook version found")
     return PlaybookResponse(
@@ -294,7 +823,7 @@ async def get_playbook_version(version_id: str, session: AsyncSession | None = D
     )
 
 
-@app.put("/playbook", response_model=PlaybookResponse)
+@app.put("/playbook", response_model=PlaybookResponse, dependencies=[Depends(retrieval_ready)])
 async def update_playbook(request: PlaybookUpdateRequest, session: AsyncSession | None = Depends(session_dependency)):
     if settings.in_memory_mode:
         return PlaybookResponse(
@@ -308,6 +837,7 @@ async def update_playbook(request: PlaybookUpdateRequest, session: AsyncSession
     session.add(version)
     await session.flush()
     await persist_chunks(session, version.id, request.content)
+    await playbook_cache.publish(session, version.id)
     return PlaybookResponse(
         id=version.id,
         created_at=version.created_at,
@@ -317,20 +847,85 @@ async def update_playbook(request: PlaybookUpdateRequest, session: AsyncSession
     )
 
 
-@app.post("/playbook/reindex")
+@app.post("/playbook/reindex", dependencies=[Depends(retrieval_ready)])
 async def reindex_playbook(body: PlaybookReindexRequest, session: AsyncSession | None = Depends(session_dependency)):
     if settings.in_memory_mode:
         return {"status": "ok", "version_id": "in-memory"}
     version_id = body.version_id
     if not version_id:
-        result = await session.execute(
-            select(PlaybookVersion).order_by(PlaybookVersion.created_at.desc())
-        )
-        version = result.scalars().first()
-    else:
-        result = await session.execute(select(PlaybookVersion).where(PlaybookVersion.id == version_id))
-        version = result.scalars().first()
+        current = await playbook_cache.get_current(session)
+        version_id = current.id if current else None
+    version = await session.get(PlaybookVersion, version_id) if version_id else None
     if not version:
         raise HTTPException(status_code=404, detail="Playbook version not found")
     await persist_chunks(session, version.id, version.content)
     return {"status": "ok", "version_id": version.id}
+
+
+@app.post("/playbook/versions/{version_id}/rescore", response_model=RescoreJobResponse, status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(retrieval_ready)])
+async def rescore_analyses(version_id: str, body: RescoreRequest, session: AsyncSession | None = Depends(session_dependency)):
+    """
+    Start a background job that re-scores stored clause extractions of
+    completed analyses against ``version_id``. Progress is available from
+    ``GET /rescore/{job_id}`` and as ``status`` events on
+    ``/analysis/{job_id}/stream``.
+    """
+    if settings.in_memory_mode:
+        raise HTTPException(status_code=400, detail="Re-scoring requires a database")
+    if not await session.get(PlaybookVersion, version_id):
+        raise HTTPException(status_code=404, detail="Playbook version not found")
+    job = rescore_jobs.start(
+        RescoreJob(
+            version_id=version_id,
+            analysis_type=body.analysis_type,
+            use_llm=body.use_llm,
+            chunk_size=body.chunk_size or settings.rescore_chunk_size,
+            limit=body.limit,
+        )
+    )
+    return job.to_response()
+
+
+@app.get("/analyses", response_model=AnalysisListResponse)
+async def list_stored_analyses(
+    filters: AnalysisFilters = Depends(analysis_filters),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    session: AsyncSession | None = Depends(session_dependency),
+) -> AnalysisListResponse:
+    """Analyses oldest first, a page at a time; pass ``next_cursor`` back as ``cursor`` for the next page."""
+    if settings.in_memory_mode:
+        raise HTTPException(status_code=400, detail="Listing analyses requires a database")
+    items, next_cursor = await list_analyses(session, filters, decode_cursor(cursor), limit)
+    return AnalysisListResponse(items=items, next_cursor=next_cursor)
+
+
+@app.get("/export", dependencies=[Depends(database_ready)])
+async def export_analyses(
+    filters: AnalysisFilters = Depends(analysis_filters),
+    format: Literal["ndjson", "csv"] = "ndjson",
+    cursor: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Stream every analysis matching the ``GET /analyses`` filters with its
+    findings flattened, as NDJSON or CSV, reading rows through a server-side
+    cursor. Each analysis carries a ``cursor`` that resumes the export after it.
+    """
+    if settings.in_memory_mode:
+        raise HTTPException(status_code=400, detail="Exporting analyses requires a database")
+    after = decode_cursor(cursor)
+    if format == "csv":
+        return StreamingResponse(
+            export_csv(filters, after),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="analyses.csv"'},
+        )
+    return StreamingResponse(export_ndjson(filters, after), media_type="application/x-ndjson")
+
+
+@app.get("/rescore/{job_id}", response_model=RescoreJobResponse)
+async def get_rescore_job(job_id: str):
+    job = rescore_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Re-score job not found")
+    return job.to_response()
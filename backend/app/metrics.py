@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+LabelValues = tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """A counter incremented directly or read from a callback at scrape time."""
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        callback: Callable[[], float | dict[LabelValues, float]] | None = None,
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self._values: dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        return self.header() + _render_values(self)
+
+
+class Gauge(_Metric):
+    """A gauge set directly or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        callback: Callable[[], float | dict[LabelValues, float]] | None = None,
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self._values: dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def render(self) -> list[str]:
+        return self.header() + _render_values(self)
+
+
+def _render_values(metric: Counter | Gauge) -> list[str]:
+    values = dict(metric._values)
+    if metric.callback is not None:
+        produced = metric.callback()
+        values.update(produced if isinstance(produced, dict) else {(): produced})
+    return [
+        f"{metric.name}{_format_labels(metric.labels, key)} {_format_value(value)}"
+        for key, value in sorted(values.items())
+    ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0, 0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return int(series[1][1]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for key, (counts, totals) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound) if bound != float("inf") else "+Inf"}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(totals[0])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {int(totals[1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        callback: Callable[[], float | dict[LabelValues, float]] | None = None,
+    ) -> Counter:
+        return self._register(Counter(name, help_text, labels, callback))  # type: ignore[return-value]
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        callback: Callable[[], float | dict[LabelValues, float]] | None = None,
+    ) -> Gauge:
+        return self._register(Gauge(name, help_text, labels, callback))  # type: ignore[return-value]
+
+    def histogram(
+        self, name: str, help_text: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "analyzer_stage_seconds", "Time spent per analysis pipeline stage.", labels=("stage",)
+)
+DB_QUERY_SECONDS = registry.histogram("analyzer_db_query_seconds", "Database statement execution time.")
+LLM_TOKENS = registry.counter("analyzer_llm_tokens_total", "LLM tokens used.", labels=("direction", "source"))
+LLM_COST = registry.counter("analyzer_llm_cost_usd_total", "Estimated LLM cost in USD.", labels=("source",))
+ANALYSES = registry.counter("analyzer_analyses_total", "Analyses finished, by outcome.", labels=("status",))
+ANALYSES_IN_PROGRESS = registry.gauge("analyzer_analyses_in_progress", "Analyses currently running.")
+
+
+class StageTimings:
+    """Per-analysis accumulator of stage durations in milliseconds."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds * 1000
+
+    def as_dict(self) -> dict[str, float]:
+        timings = {f"{stage}_ms": round(ms, 3) for stage, ms in self.stages.items()}
+        timings["total_ms"] = round((time.perf_counter() - self.started) * 1000, 3)
+        return timings
+
+
+_current_timings: ContextVar[StageTimings | None] = ContextVar("stage_timings", default=None)
+
+
+def current_timings() -> StageTimings | None:
+    return _current_timings.get()
+
+
+@contextmanager
+def track_analysis() -> Iterator[StageTimings]:
+    """
+    Count one running analysis and collect the spans opened in this context,
+    including those in worker threads it dispatches to.
+    """
+    timings = StageTimings()
+    token = _current_timings.set(timings)
+    ANALYSES_IN_PROGRESS.inc()
+    status = "failed"
+    try:
+        yield timings
+        status = "completed"
+    finally:
+        ANALYSES_IN_PROGRESS.dec()
+        ANALYSES.inc(status=status)
+        _current_timings.reset(token)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a stage into the stage histogram and the current analysis' timings, if any."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add(stage, elapsed)
@@ -6,7 +6,7 @@ from datetime import datetime
 from typing import Any
 
 from pydantic import BaseModel
-from sqlalchemy import JSON, Column, DateTime, ForeignKey, LargeBinary, String, Text
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Integer, LargeBinary, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
@@ -45,6 +45,37 @@ class PlaybookChunk(Base):
     version: Mapped[PlaybookVersion] = relationship("PlaybookVersion", back_populates="chunks")
 
 
+class PlaybookPointer(Base):
+    """
+    Single-row pointer to the current playbook version.
+
+    ``generation`` is bumped every time a version is published so other
+    processes can detect a change without scanning ``playbook_versions``.
+    """
+
+    __tablename__ = "playbook_pointer"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, default=1)
+    version_id: Mapped[str] = mapped_column(
+        String, ForeignKey("playbook_versions.id"), nullable=False
+    )
+    generation: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class RateLimitBucket(Base):
+    """Token bucket of one client and route scope, shared by every worker process."""
+
+    __tablename__ = "rate_limit_buckets"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    # Wall-clock seconds, comparable across processes and hosts.
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False)
+
+
 class Analysis(Base):
     __tablename__ = "analyses"
 
@@ -62,6 +93,15 @@ class Analysis(Base):
     )
     guardrail_warnings: Mapped[str | None] = mapped_column(Text, nullable=True)
     usage_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    parent_id: Mapped[str | None] = mapped_column(
+        String, ForeignKey("analyses.id"), nullable=True
+    )
+    # Per-clause findings before merging by clause type, kept for incremental re-analysis.
+    clause_findings_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # SHA-256 of the imported file, set by the bulk importer to skip contracts it has seen.
+    content_hash: Mapped[str | None] = mapped_column(String, nullable=True, index=True)
+    # Stage outputs of a failed or interrupted run (see checkpoint.py), for resuming it on retry.
+    checkpoint_json: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     version: Mapped[PlaybookVersion | None] = relationship("PlaybookVersion")
 
@@ -85,4 +125,10 @@ class Analysis(Base):
         self.usage_json = json.dumps(usage, default=self._json_serializer)
 
     def set_guardrails(self, warnings: Any) -> None:
-        self.guardrail_warnings = json.dumps(warnings, default=self._json_serializer)
\ No newline at end of file
+        self.guardrail_warnings = json.dumps(warnings, default=self._json_serializer)
+
+    def set_clause_findings(self, findings: Any) -> None:
+        self.clause_findings_json = json.dumps(findings, default=self._json_serializer)
+
+    def get_clause_findings(self) -> list[dict]:
+        return json.loads(self.clause_findings_json) if self.clause_findings_json else []
@@ -1,48 +1,90 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
 import re
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Awaitable, Callable
+from typing import Any, AsyncIterator, Awaitable, Callable
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .checkpoint import PipelineCheckpoint
+from .config import get_settings
 from .guards import ensure_retrieval_guardrails, filter_malicious_segments
 from .llm import AnthropicClient, LLMUsage
-from .models import Analysis, PlaybookChunk, PlaybookVersion
-from .rag import PlaybookRAG, chunk_playbook
-from .schemas import AnalysisResult, Finding, GuardrailWarning, RetrievedChunk, Usage
+from .models import Analysis
+from .playbook import playbook_cache
+from .rag import RetrievalBackend, chunk_playbook
+from .schemas import AnalysisResult, Finding, FindingDelta, GuardrailWarning, RetrievedChunk, Usage
+from .segments import SectionIndex, build_section_index, intersect_ranges, merge_ranges
+from .metrics import span, track_analysis
+from .tokens import TokenBudget, TokenBudgetExceeded, count_tokens
+from .workers import run_blocking, run_cpu
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
-def _extract_clauses(contract_text: str) -> list[dict[str, str]]:
+ANALYSIS_MODES = ("risks", "summary", "obligations")
+
+
+def analysis_modes(analysis_type: str) -> list[str]:
+    """Split a stored ``analysis_type`` (e.g. ``"risks,summary"``) into its modes."""
+    modes = [mode.strip() for mode in analysis_type.split(",") if mode.strip()]
+    return modes or ["risks"]
+
+
+# (clause_type, pattern, unit, section heading keywords)
+CLAUSE_RULES: list[tuple[str, re.Pattern, str, tuple[str, ...]]] = [
+    ("payment_terms", re.compile(r"within\s+(\d+)\s+days", re.I), "days", ("payment", "price", "sum", "invoice")),
+    ("retainage", re.compile(r"retain(?:age)?\s+(\d+)%", re.I), "%", ("retain", "retention", "payment")),
+    ("notice_period", re.compile(r"within\s+(\d+)\s+(?:calendar\s+)?days.*notice", re.I), "days", ("notice", "claim", "change", "delay", "variation", "time", "extension")),
+    ("indemnification", re.compile(r"indemnif\w+.*?(regardless of fault|any and all)", re.I), "", ("indemn", "liabil", "insurance", "risk")),
+    ("termination_notice", re.compile(r"terminate.*?(\d+)\s+calendar\s+days", re.I), "days", ("terminat", "suspens")),
+    ("dispute_resolution", re.compile(r"arbitration.*?in\s+([A-Za-z\s]+)", re.I), "location", ("dispute", "arbitra", "governing", "law")),
+    ("liquidated_damages", re.compile(r"€?([\d,\.]+)\s*per\s*(?:calendar\s*)?day", re.I), "currency", ("liquidated", "damages", "delay", "time", "schedule", "penalt")),
+]
+
+
+def _extract_clauses(
+    contract_text: str,
+    offset: int = 0,
+    index: SectionIndex | None = None,
+    restrict_to: list[tuple[int, int]] | None = None,
+) -> list[dict[str, Any]]:
     """
     Lightweight deterministic clause extraction. Focuses on key risk areas.
+
+    When the contract has numbered sections each rule only scans sections whose
+    headings match its keywords (plus text outside any section). ``start``/``end``
+    are character offsets of the match, shifted by ``offset`` when
+    ``contract_text`` is a window of a larger document. ``restrict_to`` further
+    limits scanning to sorted, non-overlapping absolute ranges.
     """
-    patterns = [
-        ("payment_terms", r"within\s+(\d+)\s+days", "days"),
-        ("retainage", r"retain(?:age)?\s+(\d+)%", "%"),
-        ("notice_period", r"within\s+(\d+)\s+(?:calendar\s+)?days.*notice", "days"),
-        ("indemnification", r"indemnif\w+.*?(regardless of fault|any and all)", ""),
-        ("termination_notice", r"terminate.*?(\d+)\s+calendar\s+days", "days"),
-        ("dispute_resolution", r"arbitration.*?in\s+([A-Za-z\s]+)", "location"),
-        ("liquidated_damages", r"€?([\d,\.]+)\s*per\s*(?:calendar\s*)?day", "currency"),
-    ]
-    findings: list[dict[str, str]] = []
-    for clause_type, pattern, unit in patterns:
-        for match in re.finditer(pattern, contract_text, flags=re.IGNORECASE):
-            value = match.group(1) if match.groups() else match.group(0)
-            span_text = contract_text[max(0, match.start() - 50) : match.end() + 50]
-            findings.append(
-                {
-                    "clause_type": clause_type,
-                    "extracted_value": f"{value} {unit}".strip(),
-                    "source_text": span_text.strip(),
-                }
-            )
+    index = index or build_section_index(contract_text, offset)
+    findings: list[dict[str, Any]] = []
+    for clause_type, pattern, unit, keywords in CLAUSE_RULES:
+        ranges = index.ranges_for(keywords) if len(index) else [(offset, offset + len(contract_text))]
+        if restrict_to is not None:
+            ranges = intersect_ranges(ranges, restrict_to)
+        for range_start, range_end in ranges:
+            for match in pattern.finditer(contract_text, range_start - offset, range_end - offset):
+                value = match.group(1) if match.groups() else match.group(0)
+                span_text = contract_text[max(0, match.start() - 50) : match.end() + 50]
+                section = index.locate(offset + match.start())
+                findings.append(
+                    {
+                        "clause_type": clause_type,
+                        "extracted_value": f"{value} {unit}".strip(),
+                        "source_text": span_text.strip(),
+                        "section_id": section.section_id if section else None,
+                        "start": offset + match.start(),
+                        "end": offset + match.end(),
+                    }
+                )
     return findings
 
 
@@ -168,12 +210,52 @@ def _format_citation_ids(retrieved_chunks: list[RetrievedChunk]) -> str:
     return "; ".join(ids)
 
 
+def _chunk_excerpt(chunk: RetrievedChunk) -> str:
+    return f"[{chunk.chunk_id}] {chunk.content[:500]}"
+
+
+def _missing_from_prefix(chunks: list[RetrievedChunk], prompt_prefix: str) -> list[RetrievedChunk]:
+    """Chunks whose excerpt did not fit in ``prompt_prefix`` and must travel inline."""
+    return [chunk for chunk in chunks if f"[{chunk.chunk_id}] " not in prompt_prefix]
+
+
+RISK_INSTRUCTIONS = (
+    "You are validating construction contract clause alignment to the playbook. "
+    "The playbook excerpts below are the reference; each request names a clause and "
+    "the chunk ids most relevant to it. Explain how the clause deviates and the risk."
+)
+
+
+def _risk_prompt_prefix(rag: RetrievalBackend, version_id: str) -> str | None:
+    """
+    The stable part of every ``risks`` validation prompt for a playbook
+    version: the instructions plus the version's excerpts, sent as a
+    cacheable prefix (see ``AnthropicClient.complete``). ``None`` when
+    ``PROMPT_CACHE`` is off or the backend cannot list the version's chunks.
+    """
+    list_chunks = getattr(rag, "list_chunks", None)
+    if not settings.prompt_cache_enabled or list_chunks is None:
+        return None
+    excerpts: list[str] = []
+    size = 0
+    for chunk_id, text in list_chunks(version_id):
+        excerpt = f"[{chunk_id}] {text}"
+        size += len(excerpt)
+        if size > settings.prompt_prefix_max_chars:
+            break
+        excerpts.append(excerpt)
+    if not excerpts:
+        return None
+    return RISK_INSTRUCTIONS + "\n\nPlaybook excerpts:\n" + "\n\n".join(excerpts)
+
+
 def _merge_findings(findings: list[Finding]) -> list[Finding]:
-    merged: dict[str, Finding] = {}
+    merged: dict[tuple[str | None, str], Finding] = {}
     for finding in findings:
-        existing = merged.get(finding.clause_type)
+        key = (finding.mode, finding.clause_type)
+        existing = merged.get(key)
         if not existing:
-            merged[finding.clause_type] = finding
+            merged[key] = finding
             continue
         # Choose the higher-risk finding as the base
         base = finding if _risk_index(finding.risk_level) >= _risk_index(existing.risk_level) else existing
@@ -186,141 +268,409 @@ def _merge_findings(findings: list[Finding]) -> list[Finding]:
         # Prefer longer source text for context
         if len(other.source_text) > len(base.source_text):
             base.source_text = other.source_text
+            base.section_id, base.start, base.end = other.section_id, other.start, other.end
         # Preserve playbook standard and deviation from the higher-risk finding
         base.playbook_standard = base.playbook_standard or other.playbook_standard
         base.deviation = base.deviation or other.deviation
         # Keep the extracted value from the higher-risk finding
         base.extracted_value = base.extracted_value or other.extracted_value
-        merged[finding.clause_type] = base
+        merged[key] = base
     return list(merged.values())
 
 
-async def run_analysis_pipeline(
+async def _resolve_version_id(
     session: AsyncSession | None,
     analysis: Analysis,
-    streamer: Callable[[str, Any], Awaitable[None] | None] | None = None,
-    playbook_content_override: str | None = None,
-    initial_guardrails: list[GuardrailWarning] | None = None,
-) -> AnalysisResult:
-    async def _emit(event: str, data: Any) -> None:
-        if not streamer:
-            return
-        result = streamer(event, data)
-        if asyncio.iscoroutine(result):
-            await result
-
-    guardrails: list[GuardrailWarning] = list(initial_guardrails or [])
-    # Guardrails: sanitize input
-    sanitized_text, extra_warnings = filter_malicious_segments(analysis.contract_text)
-    guardrails.extend(extra_warnings)
-    analysis.contract_text = sanitized_text
-    if session:
-        await session.flush()
-
-    # Clause extraction
-    extracted_clauses = _extract_clauses(sanitized_text)
-    await _emit(
-        "status",
-        {"analysis_id": analysis.id, "status": "extracting", "message": "Extracted clauses"},
-    )
-
-    # Determine playbook version
+    rag: RetrievalBackend,
+    playbook_content_override: str | None,
+) -> str | None:
     version_id = analysis.playbook_version_id
     if playbook_content_override:
         version_id = "in-memory"
+        with span("reindex"):
+            chunks = await run_cpu(chunk_playbook, playbook_content_override)
+            await run_blocking(
+                rag.reset_version, version_id, [(f"{version_id}-{idx}", text) for idx, text in enumerate(chunks)]
+            )
     if not version_id and session:
-        result = await session.execute(
-            select(PlaybookVersion).order_by(PlaybookVersion.created_at.desc())
-        )
-        latest = result.scalars().first()
-        if latest:
-            version_id = latest.id
+        current = await playbook_cache.get_current(session)
+        if current:
+            version_id = current.id
             analysis.playbook_version_id = version_id
+    return version_id
 
-    rag = PlaybookRAG()
-    if playbook_content_override:
-        chunks = chunk_playbook(playbook_content_override)
-        rag.reset_version(version_id, [(f"{version_id}-{idx}", text) for idx, text in enumerate(chunks)])
-    findings: list[Finding] = []
-    llm_client = AnthropicClient()
-    total_usage = LLMUsage(0, 0)
 
-    for clause in extracted_clauses:
-        retrieved_chunks: list[RetrievedChunk] = []
-        if version_id:
-            retrieved_chunks = rag.query(version_id, clause["source_text"])
-        if not retrieved_chunks:
-            continue
+async def _build_findings(
+    modes: list[str],
+    clause: dict[str, Any],
+    retrieved_chunks: list[RetrievedChunk],
+    llm_client: AnthropicClient,
+    total_usage: LLMUsage,
+    use_llm: bool = True,
+    prompt_prefix: str | None = None,
+) -> list[Finding]:
+    """
+    Score one extracted clause against its retrieved playbook chunks once and
+    phrase a finding for each requested analysis mode. With ``use_llm`` off,
+    ``risks`` findings skip the LLM validation call. With a ``prompt_prefix``
+    from ``_risk_prompt_prefix`` the validation prompt cites chunk ids instead
+    of repeating the excerpt, except for chunks the prefix had no room for.
+    """
+    with span("comparison"):
         standard, deviation, risk_level = _compare_with_playbook(clause, retrieved_chunks)
-        citation_ids = _format_citation_ids(retrieved_chunks)
-        prompt_text = (
-            f"Clause type: {clause['clause_type']}. "
-            f"Extracted: {clause['extracted_value']}. "
-            f"Playbook excerpts: {' '.join(chunk.content for chunk in retrieved_chunks)}"
-        )
-        if analysis.analysis_type == "summary":
+    citation_ids = _format_citation_ids(retrieved_chunks)
+    prompt_text = (
+        f"Clause type: {clause['clause_type']}. "
+        f"Extracted: {clause['extracted_value']}. "
+        f"Playbook excerpts: {' '.join(chunk.content for chunk in retrieved_chunks)}"
+    )
+    findings: list[Finding] = []
+    for mode in modes:
+        if mode == "summary":
             summary_text = f"{_friendly_clause_label(clause['clause_type'])}: {clause['extracted_value']}"
-            finding = Finding(
-                clause_type=clause["clause_type"],
-                extracted_value=clause["extracted_value"],
-                playbook_standard=standard,
-                deviation=deviation,
-                risk_level=risk_level,  # type: ignore[arg-type]
-                recommendation=f"Summary: {summary_text}. Cite chunks: {citation_ids}.",
-                source_text=clause["source_text"],
-                retrieved_chunks=retrieved_chunks,
-            )
+            recommendation = f"Summary: {summary_text}. Cite chunks: {citation_ids}."
             # Estimate token usage for telemetry parity
-            total_usage.input_tokens += len(prompt_text) // 4
-            total_usage.output_tokens += len(finding.recommendation) // 4
-        elif analysis.analysis_type == "obligations":
+            total_usage.input_tokens += count_tokens(prompt_text)
+            total_usage.output_tokens += count_tokens(recommendation)
+        elif mode == "obligations":
             obligation_text = f"Ensure compliance with {_friendly_clause_label(clause['clause_type']).lower()} ({clause['extracted_value']})."
-            finding = Finding(
+            recommendation = f"Action: {obligation_text} Cite chunks: {citation_ids} for playbook guidance."
+            total_usage.input_tokens += count_tokens(prompt_text)
+            total_usage.output_tokens += count_tokens(recommendation)
+        else:
+            if prompt_prefix:
+                prompt = (
+                    f"Clause type: {clause['clause_type']}. Extracted: {clause['extracted_value']}. "
+                    f"Relevant playbook chunks: {citation_ids}."
+                )
+                missing = _missing_from_prefix(retrieved_chunks, prompt_prefix)
+                if missing:
+                    prompt += " Excerpts not in the reference: " + " ".join(_chunk_excerpt(c) for c in missing)
+            else:
+                prompt = (
+                    "You are validating construction contract clause alignment to the playbook. "
+                    f"Clause type: {clause['clause_type']}. Extracted: {clause['extracted_value']}. "
+                    f"Playbook guidance: {retrieved_chunks[0].content[:500]}"
+                )
+            if use_llm:
+                try:
+                    _, usage = await llm_client.complete(prompt, max_tokens=256, cache_prefix=prompt_prefix)
+                except TokenBudgetExceeded:
+                    # Keep the deterministic finding; _budget_warnings reports the skipped validations.
+                    usage = LLMUsage(0, 0)
+                total_usage.add(usage)
+            recommendation = f"Negotiate toward playbook guidance. Cite chunks: {citation_ids}."
+        findings.append(
+            Finding(
                 clause_type=clause["clause_type"],
                 extracted_value=clause["extracted_value"],
                 playbook_standard=standard,
                 deviation=deviation,
                 risk_level=risk_level,  # type: ignore[arg-type]
-                recommendation=f"Action: {obligation_text} Cite chunks: {citation_ids} for playbook guidance.",
+                recommendation=recommendation,
                 source_text=clause["source_text"],
-                retrieved_chunks=retrieved_chunks,
+                retrieved_chunks=list(retrieved_chunks),
+                section_id=clause.get("section_id"),
+                start=clause.get("start"),
+                end=clause.get("end"),
+                mode=mode,
             )
-            total_usage.input_tokens += len(prompt_text) // 4
-            total_usage.output_tokens += len(finding.recommendation) // 4
-        else:
-            prompt = (
-                "You are validating construction contract clause alignment to the playbook. "
-                f"Clause type: {clause['clause_type']}. Extracted: {clause['extracted_value']}. "
-                f"Playbook guidance: {retrieved_chunks[0].content[:500]}"
+        )
+    return findings
+
+
+BATCH_REVIEW_FORMAT = (
+    "Answer with only a JSON array holding one object per numbered clause: "
+    '{"clause": <number>, "risk_level": "critical|high|medium|low|acceptable", '
+    '"rationale": "<one sentence>"}.'
+)
+REVIEW_RISK_LEVELS = ("critical", "high", "medium", "low", "acceptable")
+
+
+@dataclass
+class PendingReview:
+    """A clause whose ``risks`` findings await the batched LLM review."""
+
+    clause: dict[str, Any]
+    retrieved_chunks: list[RetrievedChunk]
+    findings: list[Finding]
+
+
+@dataclass
+class ReviewQueue:
+    """
+    Pending batched reviews shared by every ``_score_clauses`` call of one
+    analysis (e.g. all windows of a streamed upload), so the contract is
+    reviewed in as few requests as fit the context budget.
+    """
+
+    prompt_prefix: str | None = None
+    pending: list[PendingReview] = field(default_factory=list)
+
+
+def _review_line(number: int, review: PendingReview, cite_all: bool) -> str:
+    chunks = review.retrieved_chunks if cite_all else review.retrieved_chunks[:1]
+    return (
+        f"{number}. Clause type: {review.clause['clause_type']}. "
+        f"Extracted: {review.clause['extracted_value']}. "
+        f"Playbook chunks: {_format_citation_ids(chunks)}."
+    )
+
+
+def _inline_excerpts(review: PendingReview, prompt_prefix: str | None) -> list[RetrievedChunk]:
+    """Chunks a review request carries inline: the top one, or with a prefix those it lacks."""
+    if prompt_prefix is None:
+        return review.retrieved_chunks[:1]
+    return _missing_from_prefix(review.retrieved_chunks, prompt_prefix)
+
+
+def _plan_review_batches(
+    reviews: list[PendingReview], prompt_prefix: str | None, max_input_tokens: int
+) -> list[list[int]]:
+    """
+    Group clauses into as few review requests as fit ``max_input_tokens``.
+    Each request carries the top retrieved excerpt of its clauses once (or,
+    with a ``prompt_prefix``, chunk ids plus any excerpts the prefix lacks);
+    a clause that alone exceeds the limit still gets a request of its own.
+    """
+    header = count_tokens(RISK_INSTRUCTIONS + BATCH_REVIEW_FORMAT)
+    batches: list[list[int]] = []
+    current: list[int] = []
+    seen: set[str] = set()
+    used = header
+
+    def cost_of(number: int, review: PendingReview) -> int:
+        cost = count_tokens(_review_line(number, review, prompt_prefix is not None))
+        for chunk in _inline_excerpts(review, prompt_prefix):
+            if chunk.chunk_id not in seen:
+                cost += count_tokens(_chunk_excerpt(chunk))
+        return cost
+
+    for idx, review in enumerate(reviews):
+        cost = cost_of(len(current) + 1, review)
+        if current and used + cost > max_input_tokens:
+            batches.append(current)
+            current, seen, used = [], set(), header
+            cost = cost_of(1, review)
+        current.append(idx)
+        seen.update(chunk.chunk_id for chunk in _inline_excerpts(review, prompt_prefix))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _review_prompt(reviews: list[PendingReview], prompt_prefix: str | None) -> str:
+    lines = [_review_line(number, review, prompt_prefix is not None) for number, review in enumerate(reviews, 1)]
+    excerpts = {
+        chunk.chunk_id: _chunk_excerpt(chunk)
+        for review in reviews
+        for chunk in _inline_excerpts(review, prompt_prefix)
+    }
+    if prompt_prefix is not None:
+        # Instructions and excerpts travel in the cached prefix, bar those it had no room for.
+        prompt = BATCH_REVIEW_FORMAT
+        if excerpts:
+            prompt += "\n\nPlaybook excerpts not in the reference:\n" + "\n".join(excerpts.values())
+        return prompt + "\n\nClauses:\n" + "\n".join(lines)
+    return (
+        f"{RISK_INSTRUCTIONS} {BATCH_REVIEW_FORMAT}\n\nPlaybook excerpts:\n"
+        + "\n".join(excerpts.values())
+        + "\n\nClauses:\n"
+        + "\n".join(lines)
+    )
+
+
+def _parse_review_verdicts(text: str) -> dict[int, dict[str, str]]:
+    """Per-clause verdicts keyed by clause number; entries that do not parse are dropped."""
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end <= start:
+        return {}
+    try:
+        rows = json.loads(text[start : end + 1])
+    except ValueError:
+        return {}
+    verdicts: dict[int, dict[str, str]] = {}
+    for row in rows if isinstance(rows, list) else []:
+        if not isinstance(row, dict) or not isinstance(row.get("clause"), int):
+            continue
+        level = str(row.get("risk_level", "")).lower()
+        rationale = str(row.get("rationale", "")).strip()
+        if level in REVIEW_RISK_LEVELS and rationale:
+            verdicts[row["clause"]] = {"risk_level": level, "rationale": rationale}
+    return verdicts
+
+
+async def _review_batched(
+    reviews: list[PendingReview],
+    llm_client: AnthropicClient,
+    total_usage: LLMUsage,
+    prompt_prefix: str | None = None,
+) -> None:
+    """
+    ``LLM_REVIEW_MODE=batched``: validate the ``risks`` findings of many
+    clauses per LLM request instead of one request per clause, and note each
+    clause's verdict on its findings. Risk levels stay those of the
+    deterministic playbook comparison. Batch-mode clients review this way
+    whatever the setting, as one contract is then one or a few requests.
+    """
+
+    async def review(items: list[PendingReview]) -> None:
+        try:
+            text, usage = await llm_client.complete(
+                _review_prompt(items, prompt_prefix),
+                max_tokens=settings.llm_batch_output_tokens_per_clause * len(items),
+                cache_prefix=prompt_prefix,
             )
-            _, usage = await llm_client.complete(prompt, max_tokens=256)
-            total_usage.input_tokens += usage.input_tokens
-            total_usage.output_tokens += usage.output_tokens
-            finding = Finding(
-                clause_type=clause["clause_type"],
-                extracted_value=clause["extracted_value"],
-                playbook_standard=standard,
-                deviation=deviation,
-                risk_level=risk_level,  # type: ignore[arg-type]
-                recommendation=f"Negotiate toward playbook guidance. Cite chunks: {citation_ids}.",
-                source_text=clause["source_text"],
-                retrieved_chunks=retrieved_chunks,
+        except TokenBudgetExceeded:
+            return
+        total_usage.add(usage)
+        verdicts = _parse_review_verdicts(text)
+        for number, review in enumerate(items, 1):
+            verdict = verdicts.get(number)
+            if verdict is None:
+                continue
+            for finding in review.findings:
+                finding.recommendation += f" LLM review ({verdict['risk_level']}): {verdict['rationale']}"
+
+    batches = [
+        [reviews[idx] for idx in batch]
+        for batch in _plan_review_batches(reviews, prompt_prefix, settings.llm_batch_max_input_tokens)
+    ]
+    if llm_client.batch:
+        # Queued on the batch API: submit every request before waiting on any.
+        await asyncio.gather(*(review(items) for items in batches))
+        return
+    for items in batches:
+        await review(items)
+
+
+async def _flush_reviews(
+    analysis: Analysis,
+    queue: ReviewQueue,
+    llm_client: AnthropicClient,
+    total_usage: LLMUsage,
+    emit: Callable[[str, Any], Awaitable[None]],
+) -> None:
+    """Run the queued batched reviews, then emit the reviewed ``risks`` findings."""
+    if queue.pending:
+        await _review_batched(queue.pending, llm_client, total_usage, queue.prompt_prefix)
+    for review in queue.pending:
+        for finding in review.findings:
+            await emit(
+                "partial_finding",
+                {"analysis_id": analysis.id, "mode": finding.mode, "finding": finding.dict()},
             )
-        findings.append(finding)
-        await _emit(
-            "partial_finding",
-            {"analysis_id": analysis.id, "finding": finding.dict()},
+    queue.pending.clear()
+
+
+async def _score_clauses(
+    analysis: Analysis,
+    clauses: list[dict[str, Any]],
+    rag: RetrievalBackend,
+    version_id: str | None,
+    llm_client: AnthropicClient,
+    total_usage: LLMUsage,
+    emit: Callable[[str, Any], Awaitable[None]],
+    queue: ReviewQueue | None = None,
+    checkpoint: PipelineCheckpoint | None = None,
+) -> list[Finding]:
+    """
+    Retrieve, score and emit findings for ``clauses``. In batched review mode
+    the ``risks`` findings are held back and emitted once reviewed: here,
+    unless the caller passes a ``queue`` and flushes it itself.
+
+    With a ``checkpoint`` (indexed like ``clauses``; not combined with a
+    caller's ``queue``), completed clauses are emitted from it instead of
+    being scored again, and retrievals and completed clauses are recorded.
+    """
+    findings: list[Finding] = []
+    modes = analysis_modes(analysis.analysis_type)
+    prompt_prefix = None
+    if version_id and "risks" in modes:
+        prompt_prefix = await run_blocking(_risk_prompt_prefix, rag, version_id)
+    batched = (settings.llm_review_mode == "batched" or llm_client.batch) and "risks" in modes
+    flush = queue is None
+    if queue is None:
+        queue = ReviewQueue()
+    queue.prompt_prefix = prompt_prefix
+    awaiting_review: list[tuple[int, list[Finding]]] = []
+    for index, clause in enumerate(clauses):
+        done = checkpoint.completed(index) if checkpoint else None
+        if done is not None:
+            for finding in done:
+                findings.append(finding)
+                await emit(
+                    "partial_finding",
+                    {"analysis_id": analysis.id, "mode": finding.mode, "finding": finding.dict()},
+                )
+            continue
+        retrieved_chunks = checkpoint.retrieved(index) if checkpoint else None
+        if retrieved_chunks is None:
+            retrieved_chunks = []
+            if version_id:
+                with span("retrieval"):
+                    retrieved_chunks = await run_blocking(rag.query, version_id, clause["source_text"])
+            if checkpoint:
+                checkpoint.record_retrieval(index, retrieved_chunks)
+        if not retrieved_chunks:
+            if checkpoint:
+                checkpoint.record_findings(index, [])
+            continue
+        clause_findings = await _build_findings(
+            modes,
+            clause,
+            retrieved_chunks,
+            llm_client,
+            total_usage,
+            use_llm=not batched,
+            prompt_prefix=prompt_prefix,
         )
+        if batched:
+            queue.pending.append(
+                PendingReview(clause, retrieved_chunks, [f for f in clause_findings if f.mode == "risks"])
+            )
+            awaiting_review.append((index, clause_findings))
+        elif checkpoint:
+            checkpoint.record_findings(index, clause_findings)
+        for finding in clause_findings:
+            findings.append(finding)
+            if batched and finding.mode == "risks":
+                continue
+            await emit(
+                "partial_finding",
+                {"analysis_id": analysis.id, "mode": finding.mode, "finding": finding.dict()},
+            )
+    if flush:
+        await _flush_reviews(analysis, queue, llm_client, total_usage, emit)
+        if checkpoint:
+            for index, clause_findings in awaiting_review:
+                checkpoint.record_findings(index, clause_findings)
+    return findings
 
-    # Drop invalid findings (missing source or retrieval)
-    merged_findings = _merge_findings(findings)
-    guardrails.extend(ensure_retrieval_guardrails([f.dict() for f in merged_findings]))
+
+def _build_result(
+    analysis: Analysis,
+    merged_findings: list[Finding],
+    guardrails: list[GuardrailWarning],
+    total_usage: LLMUsage,
+    version_id: str | None,
+) -> AnalysisResult:
+    modes = analysis_modes(analysis.analysis_type)
+    primary = [f for f in merged_findings if f.mode in (modes[0], None)]
+    # Drop invalid findings (missing source or retrieval); every mode shares
+    # the same clauses, so warnings are raised once from the primary mode.
+    guardrails.extend(ensure_retrieval_guardrails([f.dict() for f in primary]))
     merged_findings = [
         f
         for f in merged_findings
         if f.source_text
         and f.retrieved_chunks
     ]
+    findings_by_mode: dict[str, list[Finding]] = {mode: [] for mode in modes}
+    for finding in merged_findings:
+        findings_by_mode.setdefault(finding.mode or modes[0], []).append(finding)
+    merged_findings = findings_by_mode[modes[0]]
 
     if not merged_findings:
         overall = "unknown"
@@ -338,9 +688,11 @@ async def run_analysis_pipeline(
         output_tokens=total_usage.output_tokens,
         total_tokens=total_usage.total_tokens,
         estimated_cost_usd=round(total_usage.estimated_cost, 6),
+        cache_creation_input_tokens=total_usage.cache_creation_input_tokens,
+        cache_read_input_tokens=total_usage.cache_read_input_tokens,
     )
 
-    result = AnalysisResult(
+    return AnalysisResult(
         analysis_id=analysis.id,
         timestamp=datetime.utcnow(),
         overall_risk_score=overall,  # type: ignore[arg-type]
@@ -349,5 +701,404 @@ async def run_analysis_pipeline(
         confidence_score=0.62 if merged_findings else 0.4,
         playbook_version_id=version_id,
         usage=usage_payload,
+        findings_by_mode=findings_by_mode if len(modes) > 1 else None,
+    )
+
+
+def _budget_warnings(llm_client: AnthropicClient) -> list[GuardrailWarning]:
+    budget = llm_client.budget
+    if budget is None or not budget.rejected:
+        return []
+    return [
+        GuardrailWarning(
+            type="token_budget",
+            message=f"Token budget exhausted; {budget.rejected} LLM validation request(s) skipped.",
+        )
+    ]
+
+
+def _emitter(streamer: Callable[[str, Any], Awaitable[None] | None] | None):
+    async def _emit(event: str, data: Any) -> None:
+        if not streamer:
+            return
+        result = streamer(event, data)
+        if asyncio.iscoroutine(result):
+            await result
+
+    return _emit
+
+
+async def run_analysis_pipeline(
+    session: AsyncSession | None,
+    analysis: Analysis,
+    streamer: Callable[[str, Any], Awaitable[None] | None] | None = None,
+    playbook_content_override: str | None = None,
+    initial_guardrails: list[GuardrailWarning] | None = None,
+    client_id: str | None = None,
+    llm_mode: str = "interactive",
+) -> AnalysisResult:
+    """
+    ``client_id`` identifies the requester for its ``CLIENT_TOKEN_BUDGET``.
+    ``llm_mode="batch"`` sends the LLM review through the batch submission
+    queue (see ``batch.py``) instead of one interactive request at a time.
+    """
+    with track_analysis() as timings:
+        result = await _run_analysis(
+            session, analysis, streamer, playbook_content_override, initial_guardrails, client_id, llm_mode
+        )
+    result.timings = timings.as_dict()
+    return result
+
+
+async def _run_analysis(
+    session: AsyncSession | None,
+    analysis: Analysis,
+    streamer: Callable[[str, Any], Awaitable[None] | None] | None,
+    playbook_content_override: str | None,
+    initial_guardrails: list[GuardrailWarning] | None,
+    client_id: str | None = None,
+    llm_mode: str = "interactive",
+) -> AnalysisResult:
+    _emit = _emitter(streamer)
+    checkpoint = PipelineCheckpoint.load(analysis)
+    try:
+        result = await _run_stages(
+            session,
+            analysis,
+            _emit,
+            playbook_content_override,
+            initial_guardrails,
+            client_id,
+            llm_mode,
+            checkpoint,
+        )
+    except BaseException:
+        # Kept with the failed (or requeued) analysis for POST /analysis/{id}/retry.
+        checkpoint.save(analysis)
+        raise
+    analysis.checkpoint_json = None
+    return result
+
+
+async def _run_stages(
+    session: AsyncSession | None,
+    analysis: Analysis,
+    _emit: Callable[[str, Any], Awaitable[None]],
+    playbook_content_override: str | None,
+    initial_guardrails: list[GuardrailWarning] | None,
+    client_id: str | None,
+    llm_mode: str,
+    checkpoint: PipelineCheckpoint,
+) -> AnalysisResult:
+    guardrails: list[GuardrailWarning] = list(initial_guardrails or [])
+    # Guardrails: sanitize input. A checkpointed contract was stored sanitized.
+    with span("sanitize"):
+        if checkpoint.matches(analysis.contract_text):
+            sanitized_text, extra_warnings = analysis.contract_text, checkpoint.sanitize_warnings()
+        else:
+            sanitized_text, extra_warnings = await run_cpu(filter_malicious_segments, analysis.contract_text)
+            if not checkpoint.matches(sanitized_text):
+                checkpoint.reset(sanitized_text, extra_warnings)
+    guardrails.extend(extra_warnings)
+    analysis.contract_text = sanitized_text
+    if session:
+        with span("db_write"):
+            await session.flush()
+
+    # Clause extraction
+    if checkpoint.clauses is None:
+        with span("extraction"):
+            checkpoint.clauses = await run_cpu(_extract_clauses, sanitized_text)
+    extracted_clauses = checkpoint.clauses
+    await _emit(
+        "status",
+        {"analysis_id": analysis.id, "status": "extracting", "message": "Extracted clauses"},
     )
+
+    rag = playbook_cache.rag
+    version_id = await _resolve_version_id(session, analysis, rag, playbook_content_override)
+    checkpoint.use_version(version_id)
+    if checkpoint.findings:
+        await _emit(
+            "status",
+            {
+                "analysis_id": analysis.id,
+                "status": "resuming",
+                "message": f"Resuming after {len(checkpoint.findings)} of {len(extracted_clauses)} clauses",
+            },
+        )
+    llm_client = AnthropicClient(budget=TokenBudget.for_analysis(client_id), batch=llm_mode == "batch")
+    total_usage = LLMUsage(0, 0)
+
+    findings = await _score_clauses(
+        analysis, extracted_clauses, rag, version_id, llm_client, total_usage, _emit, checkpoint=checkpoint
+    )
+    analysis.set_clause_findings(findings)
+    guardrails.extend(_budget_warnings(llm_client))
+
+    with span("validation"):
+        return _build_result(analysis, _merge_findings(findings), guardrails, total_usage, version_id)
+
+
+async def run_streaming_pipeline(
+    session: AsyncSession | None,
+    analysis: Analysis,
+    windows: AsyncIterator[tuple[int, str]],
+    window_size: int,
+    overlap: int,
+    streamer: Callable[[str, Any], Awaitable[None] | None] | None = None,
+    playbook_content_override: str | None = None,
+    client_id: str | None = None,
+) -> AnalysisResult:
+    """
+    Analyze a contract that arrives as overlapping ``(offset, text)`` windows
+    (see ``ingest.iter_windows``).
+
+    Each window is filtered, extracted and scored as soon as it arrives and
+    its findings are emitted immediately. A full window owns the clauses that
+    start before the overlap it shares with its successor; the shorter final
+    window owns the rest, so each clause is scored once provided it is shorter
+    than ``overlap``.
+
+    The text itself is accumulated without its overlaps and stored sanitized
+    as ``contract_text`` once the upload ends, so ``/analysis/{id}/context``
+    and revisions see the whole contract. Nothing is written to ``session``
+    while windows arrive; the caller persists the analysis afterwards.
+    Finding offsets are in raw-text coordinates, so per-clause findings are
+    only kept for revisions when sanitizing left the text unchanged.
+    """
+    with track_analysis() as timings:
+        _emit = _emitter(streamer)
+
+        rag = playbook_cache.rag
+        version_id = await _resolve_version_id(session, analysis, rag, playbook_content_override)
+        guardrails: dict[str | None, GuardrailWarning] = {}
+        merged: list[Finding] = []
+        clause_findings: list[Finding] = []
+        parts: list[str] = []
+        received = 0
+        llm_client = AnthropicClient(budget=TokenBudget.for_analysis(client_id))
+        total_usage = LLMUsage(0, 0)
+        queue = ReviewQueue()
+
+        async for offset, text in windows:
+            parts.append(text[received - offset :])
+            received = offset + len(text)
+            owned_until = offset + window_size - overlap if len(text) >= window_size else None
+            merged = await _score_window(
+                analysis, offset, text, owned_until, rag, version_id,
+                llm_client, total_usage, guardrails, merged, _emit, queue, clause_findings,
+            )
+            await _emit(
+                "status",
+                {"analysis_id": analysis.id, "status": "extracting", "message": f"Scored text up to offset {received}"},
+            )
+        # Merging keeps the finding objects, so the review notes reach ``merged``.
+        await _flush_reviews(analysis, queue, llm_client, total_usage, _emit)
+        raw_text = "".join(parts)
+        analysis.contract_text = (await run_cpu(filter_malicious_segments, raw_text))[0]
+        if analysis.contract_text == raw_text:
+            analysis.set_clause_findings(clause_findings)
+        warnings = list(guardrails.values()) + _budget_warnings(llm_client)
+        with span("validation"):
+            result = _build_result(analysis, merged, warnings, total_usage, version_id)
+    result.timings = timings.as_dict()
     return result
+
+
+async def _score_window(
+    analysis: Analysis,
+    offset: int,
+    text: str,
+    owned_until: int | None,
+    rag: RetrievalBackend,
+    version_id: str | None,
+    llm_client: AnthropicClient,
+    total_usage: LLMUsage,
+    guardrails: dict[str | None, GuardrailWarning],
+    merged: list[Finding],
+    emit: Callable[[str, Any], Awaitable[None]],
+    queue: ReviewQueue | None = None,
+    clause_findings: list[Finding] | None = None,
+) -> list[Finding]:
+    with span("extraction"):
+        warnings, clauses = await run_cpu(_window_clauses, offset, text, owned_until)
+    for warning in warnings:
+        guardrails.setdefault(warning.triggered_by, warning)
+    findings = await _score_clauses(analysis, clauses, rag, version_id, llm_client, total_usage, emit, queue)
+    if clause_findings is not None:
+        clause_findings.extend(findings)
+    return _merge_findings(merged + findings)
+
+
+def _window_clauses(
+    offset: int, text: str, owned_until: int | None
+) -> tuple[list[GuardrailWarning], list[dict[str, Any]]]:
+    _, warnings = filter_malicious_segments(text)
+    clauses = []
+    for clause in _extract_clauses(text, offset=offset):
+        if owned_until is not None and clause["start"] >= owned_until:
+            continue
+        # Offsets stay in raw-text coordinates; only the excerpt sent onwards is sanitized.
+        clause["source_text"] = filter_malicious_segments(clause["source_text"])[0]
+        clauses.append(clause)
+    return warnings, clauses
+
+
+def _finding_keys(findings: list[Finding]) -> dict[tuple[str | None, str | None, str, int], Finding]:
+    """Key per-clause findings by (mode, section, clause type, occurrence within section)."""
+    keyed: dict[tuple[str | None, str | None, str, int], Finding] = {}
+    counts: dict[tuple[str | None, str | None, str], int] = {}
+    for finding in sorted(findings, key=lambda f: f.start or 0):
+        base = (finding.mode, finding.section_id, finding.clause_type)
+        counts[base] = counts.get(base, 0) + 1
+        keyed[(*base, counts[base])] = finding
+    return keyed
+
+
+def _finding_delta(before: list[Finding], after: list[Finding]) -> FindingDelta:
+    old, new = _finding_keys(before), _finding_keys(after)
+    changed = [
+        finding
+        for key, finding in new.items()
+        if key in old
+        and (
+            old[key].extracted_value,
+            old[key].risk_level,
+            old[key].deviation,
+            old[key].playbook_standard,
+        )
+        != (finding.extracted_value, finding.risk_level, finding.deviation, finding.playbook_standard)
+    ]
+    return FindingDelta(
+        added=[finding for key, finding in new.items() if key not in old],
+        removed=[finding for key, finding in old.items() if key not in new],
+        changed=changed,
+    )
+
+
+async def run_revision_pipeline(
+    session: AsyncSession | None,
+    analysis: Analysis,
+    parent: Analysis,
+    streamer: Callable[[str, Any], Awaitable[None] | None] | None = None,
+    playbook_content_override: str | None = None,
+    client_id: str | None = None,
+    parent_text: str | None = None,
+) -> tuple[AnalysisResult, FindingDelta, dict[str, float]]:
+    """
+    Re-analyze a revised contract against its parent analysis, whose text is
+    ``parent_text`` when given (re-scored analyses store none of their own).
+
+    Sections are matched by id and compared by a hash of their own text.
+    Per-clause findings from unchanged sections are reused with their offsets
+    shifted; only changed or new sections (and text outside any section) are
+    re-extracted and re-scored. Nothing is reused when the playbook version
+    differs from the parent's, or when the parent has no stored per-clause
+    findings or only part of its text (see ``_reusable_findings``).
+    """
+    with track_analysis() as stage_timings:
+        result, delta, timings = await _run_revision(
+            session,
+            analysis,
+            parent,
+            parent.contract_text if parent_text is None else parent_text,
+            streamer,
+            playbook_content_override,
+            client_id,
+        )
+    result.timings = {**stage_timings.as_dict(), **result.timings}
+    return result, delta, timings
+
+
+def _reusable_findings(parent: Analysis, parent_text: str) -> list[Finding] | None:
+    """
+    The parent's per-clause findings, or None when they cannot be trusted to
+    cover ``parent_text``: analyses stored before findings were kept have
+    none, and findings ending past the text mean the text stored is partial.
+    """
+    if parent.clause_findings_json is None:
+        return None
+    findings = [Finding(**f) for f in parent.get_clause_findings()]
+    text_length = len(parent_text)
+    if any(f.end is not None and f.end > text_length for f in findings):
+        return None
+    return findings
+
+
+async def _run_revision(
+    session: AsyncSession | None,
+    analysis: Analysis,
+    parent: Analysis,
+    parent_text: str,
+    streamer: Callable[[str, Any], Awaitable[None] | None] | None,
+    playbook_content_override: str | None,
+    client_id: str | None,
+) -> tuple[AnalysisResult, FindingDelta, dict[str, float]]:
+    _emit = _emitter(streamer)
+    started = time.perf_counter()
+
+    guardrails: list[GuardrailWarning] = []
+    sanitized_text, extra_warnings = await run_cpu(filter_malicious_segments, analysis.contract_text)
+    guardrails.extend(extra_warnings)
+    analysis.contract_text = sanitized_text
+
+    rag = playbook_cache.rag
+    version_id = await _resolve_version_id(session, analysis, rag, playbook_content_override)
+
+    old_index = await run_cpu(build_section_index, parent_text)
+    new_index = await run_cpu(build_section_index, sanitized_text)
+    old_prints = old_index.fingerprints(parent_text)
+    new_prints = new_index.fingerprints(sanitized_text)
+    stored = _reusable_findings(parent, parent_text)
+    reusable = stored is not None and parent.playbook_version_id == version_id
+    unchanged = {
+        section_id
+        for section_id, digest in new_prints.items()
+        if reusable and old_prints.get(section_id) == digest
+    }
+    parent_findings = stored or []
+    reused: list[Finding] = []
+    for finding in parent_findings:
+        if finding.section_id not in unchanged:
+            continue
+        shift = new_index.get(finding.section_id).start - old_index.get(finding.section_id).start
+        if finding.start is not None and finding.end is not None:
+            finding = finding.copy(update={"start": finding.start + shift, "end": finding.end + shift})
+        reused.append(finding)
+    diffed = time.perf_counter()
+
+    dirty: list[tuple[int, int]] = list(new_index.uncovered_ranges())
+    for section in new_index.sections:
+        if section.section_id not in unchanged:
+            dirty.extend(new_index.own_ranges(section))
+    clauses = await run_cpu(_extract_clauses, sanitized_text, 0, new_index, merge_ranges(dirty))
+    extracted = time.perf_counter()
+    await _emit(
+        "status",
+        {"analysis_id": analysis.id, "status": "extracting", "message": f"Re-extracted {len(clauses)} clauses"},
+    )
+
+    llm_client = AnthropicClient(budget=TokenBudget.for_analysis(client_id))
+    total_usage = LLMUsage(0, 0)
+    rescored = await _score_clauses(analysis, clauses, rag, version_id, llm_client, total_usage, _emit)
+    guardrails.extend(_budget_warnings(llm_client))
+    scored = time.perf_counter()
+
+    findings = reused + rescored
+    analysis.set_clause_findings(findings)
+    previous = [f for f in parent_findings if f.section_id not in unchanged]
+    delta = _finding_delta(previous, rescored)
+    result = _build_result(analysis, _merge_findings(findings), guardrails, total_usage, version_id)
+    timings = {
+        "diff_ms": round((diffed - started) * 1000, 3),
+        "extract_ms": round((extracted - diffed) * 1000, 3),
+        "score_ms": round((scored - extracted) * 1000, 3),
+        "total_ms": round((time.perf_counter() - started) * 1000, 3),
+        "sections_total": len(new_index),
+        "sections_changed": len(new_index) - len(unchanged),
+        "clauses_reused": len(reused),
+        "clauses_rescored": len(rescored),
+    }
+    result.timings = {key: value for key, value in timings.items() if key.endswith("_ms")}
+    return result, delta, timings
@@ -1,17 +1,185 @@
 from __future__ import annotations
 
 import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
-from typing import Iterable
 
-from sqlalchemy import delete, select
+from sqlalchemy import delete, event, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from .models import PlaybookChunk, PlaybookVersion
-from .rag import PlaybookRAG, chunk_playbook
+from .config import get_settings
+from .models import PlaybookChunk, PlaybookPointer, PlaybookVersion
+from .rag import RetrievalBackend, chunk_playbook, create_retrieval_backend
 from .schemas import PlaybookResponse
+from .workers import run_blocking, run_cpu
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class CurrentPlaybook:
+    id: str
+    version_label: str | None
+    created_at: datetime
+    generation: int
+
+
+class PlaybookVersionCache:
+    """
+    In-process pointer to the current playbook version.
+
+    Lookups are answered from memory. Every ``ttl_seconds`` the single
+    ``playbook_pointer`` row is re-read so versions published by other
+    processes are picked up; ``playbook_versions`` is only queried when the
+    pointer's generation changes.
+    """
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._current: CurrentPlaybook | None = None
+        self._checked_at = 0.0
+        self._rag: RetrievalBackend | None = None
+
+    @property
+    def rag(self) -> RetrievalBackend:
+        """Shared retrieval handle for the configured backend, created on first use."""
+        if self._rag is None:
+            self._rag = create_retrieval_backend()
+        return self._rag
+
+    def close(self) -> None:
+        """Release the retrieval backend, if one was created."""
+        rag, self._rag = self._rag, None
+        close = getattr(rag, "close", None)
+        if close is not None:
+            close()
+
+    def invalidate(self) -> None:
+        self._current = None
+        self._checked_at = 0.0
+
+    async def get_current(self, session: AsyncSession) -> CurrentPlaybook | None:
+        pending = session.info.get(_PENDING_PUBLISH)
+        if pending is not None and pending[0] is self:
+            # Published in this session's open transaction; only it can see that yet.
+            return pending[1]
+        now = time.monotonic()
+        if self._current and now - self._checked_at < self.ttl_seconds:
+            return self._current
+
+        pointer = (
+            await session.execute(
+                select(PlaybookPointer.version_id, PlaybookPointer.generation).where(
+                    PlaybookPointer.id == 1
+                )
+            )
+        ).first()
+        if pointer is None:
+            # Databases created before the pointer table existed: derive it once.
+            latest = (
+                await session.execute(
+                    select(PlaybookVersion.id)
+                    .order_by(PlaybookVersion.created_at.desc())
+                    .limit(1)
+                )
+            ).scalar()
+            if not latest:
+                return None
+            return await self.publish(session, latest)
+
+        if (
+            self._current
+            and self._current.id == pointer.version_id
+            and self._current.generation == pointer.generation
+        ):
+            self._checked_at = now
+            return self._current
+        return await self._load(session, pointer.version_id, pointer.generation)
+
+    async def publish(self, session: AsyncSession, version_id: str) -> CurrentPlaybook | None:
+        """
+        Point every process at ``version_id`` by bumping the shared generation.
+
+        The pointer row is written in the caller's transaction, and this
+        process switches to the new version once that transaction commits; a
+        rollback leaves the cache as it was.
+        """
+        result = await session.execute(
+            update(PlaybookPointer)
+            .where(PlaybookPointer.id == 1)
+            .values(version_id=version_id, generation=PlaybookPointer.generation + 1)
+        )
+        if result.rowcount == 0:
+            session.add(PlaybookPointer(id=1, version_id=version_id, generation=1))
+        await session.flush()
+        generation = (
+            await session.execute(
+                select(PlaybookPointer.generation).where(PlaybookPointer.id == 1)
+            )
+        ).scalar_one()
+        current = await self._fetch(session, version_id, generation)
+        if current is not None:
+            session.info[_PENDING_PUBLISH] = (self, current)
+        return current
+
+    def _set_current(self, current: CurrentPlaybook) -> None:
+        self._current = current
+        self._checked_at = time.monotonic()
+
+    async def _load(
+        self, session: AsyncSession, version_id: str, generation: int
+    ) -> CurrentPlaybook | None:
+        current = await self._fetch(session, version_id, generation)
+        if current is None:
+            self.invalidate()
+        else:
+            self._set_current(current)
+        return current
+
+    async def _fetch(
+        self, session: AsyncSession, version_id: str, generation: int
+    ) -> CurrentPlaybook | None:
+        row = (
+            await session.execute(
+                select(
+                    PlaybookVersion.id,
+                    PlaybookVersion.version_label,
+                    PlaybookVersion.created_at,
+                ).where(PlaybookVersion.id == version_id)
+            )
+        ).first()
+        if row is None:
+            return None
+        return CurrentPlaybook(
+            id=row.id,
+            version_label=row.version_label,
+            created_at=row.created_at,
+            generation=generation,
+        )
+
+
+# Session.info key of a publish waiting for its transaction to commit.
+_PENDING_PUBLISH = "playbook_pending_publish"
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_publish(session: Session) -> None:
+    pending = session.info.pop(_PENDING_PUBLISH, None)
+    if pending is not None:
+        cache, current = pending
+        cache._set_current(current)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_publish(session: Session) -> None:
+    session.info.pop(_PENDING_PUBLISH, None)
+
+
+playbook_cache = PlaybookVersionCache(settings.playbook_cache_ttl_seconds)
 
 
 async def seed_playbook(session: AsyncSession, seed_path: str) -> PlaybookVersion:
@@ -19,15 +187,15 @@ async def seed_playbook(session: AsyncSession, seed_path: str) -> PlaybookVersio
     existing_version = existing_result.scalars().first()
     if existing_version:
         # Ensure embeddings exist even if Chroma storage was lost between deployments.
-        rag = PlaybookRAG()
-        collection_count = rag.collection_count(existing_version.id)
+        rag = playbook_cache.rag
+        collection_count = await run_blocking(rag.collection_count, existing_version.id)
         chunk_result = await session.execute(
             select(PlaybookChunk).where(PlaybookChunk.version_id == existing_version.id)
         )
         chunks = chunk_result.scalars().all()
         if collection_count == 0:
             if chunks:
-                rag.reset_version(existing_version.id, [(c.id, c.content) for c in chunks])
+                await run_blocking(rag.reset_version, existing_version.id, [(c.id, c.content) for c in chunks])
             else:
                 await persist_chunks(session, existing_version.id, existing_version.content)
             logger.info("Rebuilt playbook embeddings for version %s", existing_version.id)
@@ -37,14 +205,15 @@ async def seed_playbook(session: AsyncSession, seed_path: str) -> PlaybookVersio
     session.add(version)
     await session.flush()
     await persist_chunks(session, version.id, content)
+    await playbook_cache.publish(session, version.id)
     return version
 
 
 async def persist_chunks(session: AsyncSession, version_id: str, content: str) -> None:
     # remove existing
     await session.execute(delete(PlaybookChunk).where(PlaybookChunk.version_id == version_id))
-    chunks = chunk_playbook(content)
-    rag = PlaybookRAG()
+    chunks = await run_cpu(chunk_playbook, content)
+    rag = playbook_cache.rag
     chunk_records: list[PlaybookChunk] = []
     for idx, text in enumerate(chunks):
         chunk_id = f"{version_id}-{idx}"
@@ -58,7 +227,7 @@ async def persist_chunks(session: AsyncSession, version_id: str, content: str) -
         )
     session.add_all(chunk_records)
     await session.flush()
-    rag.reset_version(version_id, [(c.id, c.content) for c in chunk_records])
+    await run_blocking(rag.reset_version, version_id, [(c.id, c.content) for c in chunk_records])
 
 
 async def list_playbook_versions(session: AsyncSession) -> list[PlaybookResponse]:
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import cProfile
+import logging
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+
+from fastapi import HTTPException, Request, status
+
+from .config import get_settings
+from .schemas import ProfileEntry, ProfileSummary
+from .workers import inline_stages
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_SORTS = ("cumulative", "tottime", "calls")
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def profile_requested(request: Request) -> bool:
+    """Profiling is honored only with ``DEBUG_MODE`` on, via ``X-Profile: 1`` or ``?profile=1``."""
+    if not settings.debug_mode:
+        return False
+    flag = request.headers.get(PROFILE_HEADER) or request.query_params.get("profile") or ""
+    return flag.lower() in ("1", "true", "yes")
+
+
+class ProfileSlot:
+    """
+    The single profiled analysis allowed at a time. cProfile instruments the
+    whole event loop thread, so overlapping profiled analyses would record
+    each other's work (and Python 3.12 refuses a second active profiler).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        return self._lock.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._lock.release()
+
+
+profile_slot = ProfileSlot()
+
+
+@dataclass
+class ProfileReservation:
+    """``active`` when the request holds ``profile_slot``; ``handed_off`` when a background task releases it."""
+
+    active: bool
+    handed_off: bool = False
+
+
+async def profile_reservation(request: Request) -> AsyncIterator[ProfileReservation]:
+    """
+    Dependency reserving ``profile_slot`` for a profiled request, or 409 while
+    another profiled analysis runs. The slot is released once the response is
+    sent unless the request hands it off to a background task.
+    """
+    if not profile_requested(request):
+        yield ProfileReservation(False)
+        return
+    if not profile_slot.acquire():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Another profiled analysis is running")
+    reservation = ProfileReservation(True)
+    try:
+        yield reservation
+    finally:
+        if not reservation.handed_off:
+            profile_slot.release()
+
+
+class ProfileStore:
+    """cProfile dumps stored as ``<analysis_id>.prof`` under ``PROFILE_DIR``."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+
+    def path(self, analysis_id: str) -> Path | None:
+        if not _SAFE_ID.match(analysis_id):
+            return None
+        return self.directory / f"{analysis_id}.prof"
+
+    def save(self, analysis_id: str, profiler: cProfile.Profile) -> Path | None:
+        path = self.path(analysis_id)
+        if path is None:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(path))
+        return path
+
+    def summary(self, analysis_id: str, sort: str = "cumulative", limit: int = 25) -> ProfileSummary | None:
+        path = self.path(analysis_id)
+        if path is None or not path.exists():
+            return None
+        stats = pstats.Stats(str(path))
+        column = {"calls": 1, "tottime": 2, "cumulative": 3}[sort]
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][column], reverse=True)[:limit]
+        return ProfileSummary(
+            analysis_id=analysis_id,
+            total_seconds=round(stats.total_tt, 6),
+            sort=sort,
+            functions=[
+                ProfileEntry(
+                    function=func,
+                    file=file,
+                    line=line,
+                    calls=calls,
+                    primitive_calls=primitive,
+                    tottime=round(tottime, 6),
+                    cumtime=round(cumtime, 6),
+                )
+                for (file, line, func), (primitive, calls, tottime, cumtime, _) in rows
+            ],
+        )
+
+
+profile_store = ProfileStore(settings.profile_dir)
+
+
+@contextmanager
+def profiled(analysis_id: str) -> Iterator[None]:
+    """
+    Run the enclosed pipeline under cProfile and store the dump for
+    ``analysis_id``. Worker-pool stages run inline on the calling thread
+    while profiling, since cProfile only sees one thread. The profiler is
+    active for the whole event loop thread, so other requests served
+    meanwhile also appear in the profile. Callers hold ``profile_slot``.
+    """
+    profiler = cProfile.Profile()
+    token = inline_stages.set(True)
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        inline_stages.reset(token)
+        profile_store.save(analysis_id, profiler)
+        logger.info("Profiled analysis %s in %.3fs", analysis_id, time.perf_counter() - started)
@@ -1,18 +1,25 @@
 from __future__ import annotations
 
 import hashlib
+import json
 import logging
+import os
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, Union
 
-import chromadb
-from chromadb import Settings as ChromaSettings
-from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+import numpy as np
 
 from .config import get_settings
+from .lexical import FileStamp, LexicalIndexStore, file_stamp
+from .metrics import registry, span
+from .retrieval_cache import RetrievalCache
 from .schemas import RetrievedChunk
 
+if TYPE_CHECKING:
+    import chromadb
+
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
@@ -31,7 +38,11 @@ def chunk_playbook(content: str, size: int = 800) -> list[str]:
     return chunks
 
 
-def get_chroma_client() -> chromadb.ClientAPI:
+def get_chroma_client() -> "chromadb.ClientAPI":
+    # chromadb is imported on first use; it dominates the app's import time.
+    import chromadb
+    from chromadb import Settings as ChromaSettings
+
     Path(settings.chroma_dir).mkdir(parents=True, exist_ok=True)
     return chromadb.PersistentClient(
         path=settings.chroma_dir,
@@ -45,11 +56,22 @@ def get_chroma_client() -> chromadb.ClientAPI:
     )
 
 
+def default_embedding_function() -> Callable[[list[str]], list]:
+    """Chroma's MiniLM embedder; the ONNX model itself loads on the first call."""
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+    return DefaultEmbeddingFunction()
+
+
 class PlaybookRAG:
     def __init__(self, collection_name: str = "playbook") -> None:
         self.client = get_chroma_client()
         self.collection_name = collection_name
-        self.embed_fn = DefaultEmbeddingFunction()
+        self.embed_fn = default_embedding_function()
+
+    def close(self) -> None:
+        """Stop Chroma's system (its SQLite connections and segment writers)."""
+        self.client.clear_system_cache()
 
     def _collection(self, version_id: str):
         return self.client.get_or_create_collection(
@@ -88,18 +110,323 @@ class PlaybookRAG:
         collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
 
     def query(self, version_id: str, text: str, k: int = 3) -> list[RetrievedChunk]:
+        return self.query_many(version_id, [text], k=k)[0]
+
+    def query_many(self, version_id: str, texts: list[str], k: int = 3) -> list[list[RetrievedChunk]]:
+        """Retrieve chunks for several texts with a single embedding + query call."""
         collection = self._collection(version_id)
-        if collection.count() == 0:
-            return []
-        result = collection.query(query_texts=[text], n_results=k)
-        retrieved: list[RetrievedChunk] = []
-        for idx, doc in enumerate(result["documents"][0]):
-            retrieved.append(
+        if not texts or collection.count() == 0:
+            return [[] for _ in texts]
+        result = collection.query(query_texts=texts, n_results=k)
+        batches: list[list[RetrievedChunk]] = []
+        for row, docs in enumerate(result["documents"]):
+            batches.append(
+                [
+                    RetrievedChunk(
+                        chunk_id=result["ids"][row][idx],
+                        content=doc,
+                        source="playbook",
+                        playbook_version_id=version_id,
+                    )
+                    for idx, doc in enumerate(docs)
+                ]
+            )
+        return batches
+
+
+@dataclass
+class _VersionMatrix:
+    ids: list[str]
+    documents: list[str]
+    embeddings: np.ndarray  # (n_chunks, dim) float32, L2-normalized, memory-mapped
+    stamp: tuple[FileStamp, FileStamp]
+
+
+class NumpyVectorIndex:
+    """
+    Brute-force retrieval over an in-process embedding matrix.
+
+    Each playbook version is stored as ``<version_id>.npy`` (contiguous
+    float32, rows L2-normalized) plus ``<version_id>.json`` (chunk ids and
+    texts) under ``VECTOR_INDEX_DIR``. Matrices are opened with
+    ``mmap_mode="r"`` so worker processes share the OS page cache instead of
+    each holding a copy, and a batch of queries is answered with one matrix
+    multiply. Selected with ``VECTOR_BACKEND=numpy``. Loaded versions are
+    checked against the files' stamps on each query, so one reindexed by
+    another process is reopened.
+    """
+
+    # Bounds the (queries x chunks) score matrix held at once.
+    _max_scores_per_block = 32_000_000
+
+    def __init__(
+        self,
+        index_dir: str | Path | None = None,
+        embed_fn: Callable[[list[str]], list] | None = None,
+    ) -> None:
+        self.index_dir = Path(index_dir or settings.vector_index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.embed_fn = embed_fn or default_embedding_function()
+        self._versions: dict[str, _VersionMatrix] = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, version_id: str) -> tuple[Path, Path]:
+        return self.index_dir / f"{version_id}.npy", self.index_dir / f"{version_id}.json"
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.asarray(self.embed_fn(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _load(self, version_id: str) -> _VersionMatrix | None:
+        matrix_path, meta_path = self._paths(version_id)
+        matrix_stamp, meta_stamp = file_stamp(matrix_path), file_stamp(meta_path)
+        if matrix_stamp is None or meta_stamp is None:
+            self._versions.pop(version_id, None)
+            return None
+        stamp = (matrix_stamp, meta_stamp)
+        loaded = self._versions.get(version_id)
+        if loaded is not None and loaded.stamp == stamp:
+            return loaded
+        with self._lock:
+            loaded = self._versions.get(version_id)
+            if loaded is None or loaded.stamp != stamp:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                loaded = _VersionMatrix(
+                    ids=meta["ids"],
+                    documents=meta["documents"],
+                    embeddings=np.load(matrix_path, mmap_mode="r"),
+                    stamp=stamp,
+                )
+                self._versions[version_id] = loaded
+        return loaded
+
+    def collection_count(self, version_id: str) -> int:
+        try:
+            loaded = self._load(version_id)
+        except Exception:
+            logger.warning("Unable to read vector index for version %s; treating as empty", version_id)
+            return 0
+        return len(loaded.ids) if loaded else 0
+
+    def reset_version(self, version_id: str, chunks: Iterable[tuple[str, str]]) -> None:
+        ids: list[str] = []
+        documents: list[str] = []
+        for chunk_id, text in chunks:
+            ids.append(chunk_id)
+            documents.append(text)
+        embeddings = self._embed(documents) if documents else np.zeros((0, 0), dtype=np.float32)
+        self.write_version(version_id, ids, documents, embeddings)
+
+    def write_version(
+        self, version_id: str, ids: list[str], documents: list[str], embeddings: np.ndarray
+    ) -> None:
+        """Persist precomputed, normalized embeddings for a version (atomic per file)."""
+        matrix_path, meta_path = self._paths(version_id)
+        tmp_matrix = matrix_path.with_suffix(".npy.tmp")
+        tmp_meta = meta_path.with_suffix(".json.tmp")
+        with open(tmp_matrix, "wb") as handle:
+            np.save(handle, np.ascontiguousarray(embeddings, dtype=np.float32))
+        tmp_meta.write_text(json.dumps({"ids": ids, "documents": documents}), encoding="utf-8")
+        os.replace(tmp_matrix, matrix_path)
+        os.replace(tmp_meta, meta_path)
+        with self._lock:
+            self._versions.pop(version_id, None)
+
+    def query(self, version_id: str, text: str, k: int = 3) -> list[RetrievedChunk]:
+        return self.query_many(version_id, [text], k=k)[0]
+
+    def query_many(self, version_id: str, texts: list[str], k: int = 3) -> list[list[RetrievedChunk]]:
+        loaded = self._load(version_id)
+        if not texts or loaded is None or not loaded.ids:
+            return [[] for _ in texts]
+        top = self.top_k(loaded.embeddings, self._embed(texts), k)
+        return [
+            [
                 RetrievedChunk(
-                    chunk_id=result["ids"][0][idx],
-                    content=doc,
+                    chunk_id=loaded.ids[idx],
+                    content=loaded.documents[idx],
                     source="playbook",
                     playbook_version_id=version_id,
                 )
+                for idx in row
+            ]
+            for row in top
+        ]
+
+    @classmethod
+    def top_k(cls, matrix: np.ndarray, queries: np.ndarray, k: int) -> list[list[int]]:
+        """Indices of the ``k`` most similar rows of ``matrix`` for each query, best first."""
+        n_rows = matrix.shape[0]
+        k = min(k, n_rows)
+        block = max(1, cls._max_scores_per_block // max(n_rows, 1))
+        results: list[list[int]] = []
+        for start in range(0, len(queries), block):
+            scores = queries[start : start + block] @ matrix.T
+            if k < n_rows:
+                candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                candidates = np.tile(np.arange(n_rows), (scores.shape[0], 1))
+            candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+            order = np.argsort(-candidate_scores, axis=1, kind="stable")
+            results.extend(np.take_along_axis(candidates, order, axis=1).tolist())
+        return results
+
+
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+
+
+class HybridRetriever:
+    """
+    Vector search (Chroma or NumPy) alongside a per-version BM25 index.
+
+    Both indexes are built whenever a version is (re)indexed, so
+    ``RETRIEVAL_MODE`` can switch between ``vector``, ``lexical`` and
+    ``hybrid`` without a reindex. Hybrid mode fuses the two rankings with
+    reciprocal rank fusion, which needs no score calibration between cosine
+    similarity and BM25.
+    """
+
+    # Each ranking contributes this many times ``k`` candidates to the fusion.
+    candidate_factor = 4
+
+    def __init__(
+        self,
+        vector: Union[PlaybookRAG, NumpyVectorIndex],
+        lexical: LexicalIndexStore | None = None,
+        mode: str | None = None,
+        rrf_k: int | None = None,
+        cache: RetrievalCache | None = None,
+    ) -> None:
+        self.vector = vector
+        self.lexical = lexical or LexicalIndexStore(settings.vector_index_dir)
+        self.mode = mode or settings.retrieval_mode
+        if self.mode not in RETRIEVAL_MODES:
+            logger.warning("Unknown RETRIEVAL_MODE %r; using vector", self.mode)
+            self.mode = "vector"
+        self.rrf_k = rrf_k or settings.retrieval_rrf_k
+        self.cache = cache
+
+    def warm(self) -> None:
+        """Load the embedding model ahead of the first reindex or query."""
+        self.vector.embed_fn(["warmup"])
+
+    def close(self) -> None:
+        close = getattr(self.vector, "close", None)
+        if close is not None:
+            close()
+
+    def collection_count(self, version_id: str) -> int:
+        count = self.vector.collection_count(version_id)
+        if count and self.mode != "vector" and self.lexical.get(version_id) is None:
+            # Indexed before lexical retrieval existed; report empty so callers rebuild.
+            return 0
+        return count
+
+    def reset_version(self, version_id: str, chunks: Iterable[tuple[str, str]]) -> None:
+        chunks = list(chunks)
+        with span("embedding"):
+            self.vector.reset_version(version_id, chunks)
+        self.lexical.write(version_id, [chunk_id for chunk_id, _ in chunks], [text for _, text in chunks])
+        if self.cache is not None:
+            self.cache.invalidate_version(version_id)
+
+    def list_chunks(self, version_id: str) -> list[tuple[str, str]]:
+        """``(chunk_id, text)`` of every chunk of an indexed version, in playbook order."""
+        index = self.lexical.get(version_id)
+        return list(zip(index.ids, index.documents)) if index is not None else []
+
+    def query(self, version_id: str, text: str, k: int = 3) -> list[RetrievedChunk]:
+        return self.query_many(version_id, [text], k=k)[0]
+
+    def query_many(
+        self, version_id: str, texts: list[str], k: int = 3, mode: str | None = None
+    ) -> list[list[RetrievedChunk]]:
+        """Retrieve for several texts, answering repeated clauses from the result cache."""
+        mode = mode or self.mode
+        if self.cache is None:
+            return self._retrieve(version_id, texts, k, mode)
+        # Keys carry the index file's stamp, so a version reindexed by another
+        # process misses instead of returning its old chunks.
+        stamp = self.lexical.stamp(version_id)
+        keys = [self.cache.key(version_id, mode, text, k, stamp) for text in texts]
+        rows: list[list[RetrievedChunk] | None] = [self.cache.get(key) for key in keys]
+        missing: dict[tuple, str] = {}
+        for text, key, row in zip(texts, keys, rows):
+            if row is None:
+                missing.setdefault(key, text)
+        if missing:
+            fetched = dict(zip(missing, self._retrieve(version_id, list(missing.values()), k, mode)))
+            for key, chunks in fetched.items():
+                if chunks:
+                    self.cache.put(key, chunks)
+            rows = [row if row is not None else list(fetched[key]) for key, row in zip(keys, rows)]
+        return rows
+
+    def _retrieve(self, version_id: str, texts: list[str], k: int, mode: str) -> list[list[RetrievedChunk]]:
+        lexical = self.lexical.get(version_id) if mode != "vector" else None
+        if lexical is None:
+            if mode != "vector":
+                logger.warning("No lexical index for version %s; using vector retrieval", version_id)
+            with span("vector_search"):
+                return self.vector.query_many(version_id, texts, k=k)
+        if mode == "lexical":
+            with span("lexical_search"):
+                return [self._lexical_chunks(version_id, lexical, text, k) for text in texts]
+
+        depth = k * self.candidate_factor
+        with span("vector_search"):
+            vector_rows = self.vector.query_many(version_id, texts, k=depth)
+        with span("lexical_search"):
+            lexical_rows = [self._lexical_chunks(version_id, lexical, text, depth) for text in texts]
+        fused_rows = []
+        for vector_row, lexical_row in zip(vector_rows, lexical_rows):
+            scores: dict[str, float] = {}
+            chunks: dict[str, RetrievedChunk] = {}
+            for ranking in (vector_row, lexical_row):
+                for rank, chunk in enumerate(ranking):
+                    scores[chunk.chunk_id] = scores.get(chunk.chunk_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+                    chunks.setdefault(chunk.chunk_id, chunk)
+            best = sorted(scores, key=lambda chunk_id: -scores[chunk_id])[:k]
+            fused_rows.append([chunks[chunk_id] for chunk_id in best])
+        return fused_rows
+
+    @staticmethod
+    def _lexical_chunks(version_id: str, index, text: str, k: int) -> list[RetrievedChunk]:
+        return [
+            RetrievedChunk(
+                chunk_id=index.ids[doc_idx],
+                content=index.documents[doc_idx],
+                source="playbook",
+                playbook_version_id=version_id,
             )
-        return retrieved
+            for doc_idx, _ in index.top_k(text, k)
+        ]
+
+
+RetrievalBackend = Union[PlaybookRAG, NumpyVectorIndex, HybridRetriever]
+
+
+retrieval_cache = RetrievalCache(settings.retrieval_cache_max_bytes)
+
+registry.counter(
+    "analyzer_retrieval_cache_lookups_total",
+    "Retrieval cache lookups by result.",
+    labels=("result",),
+    callback=lambda: {("hit",): retrieval_cache.hits, ("miss",): retrieval_cache.misses},
+)
+registry.gauge(
+    "analyzer_retrieval_cache_bytes",
+    "Estimated bytes held by the retrieval cache.",
+    callback=lambda: retrieval_cache.stats()["bytes"],
+)
+
+
+def create_retrieval_backend() -> HybridRetriever:
+    """Instantiate the vector backend named by ``VECTOR_BACKEND`` behind the configured retrieval mode."""
+    cache = retrieval_cache if settings.retrieval_cache_max_bytes > 0 else None
+    if settings.vector_backend == "numpy":
+        return HybridRetriever(NumpyVectorIndex(), cache=cache)
+    if settings.vector_backend != "chroma":
+        logger.warning("Unknown VECTOR_BACKEND %r; using chroma", settings.vector_backend)
+    return HybridRetriever(PlaybookRAG(), cache=cache)
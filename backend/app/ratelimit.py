@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import hashlib
+import ipaddress
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Protocol
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import case, update
+from sqlalchemy.exc import IntegrityError
+
+from . import database
+from .config import get_settings
+from .metrics import registry
+from .models import RateLimitBucket
+
+settings = get_settings()
+
+# Contract size is estimated before the body is read, from its length in bytes.
+CHARS_PER_TOKEN = 4
+
+RATE_LIMITED = registry.counter(
+    "analyzer_rate_limited_total", "Requests refused by the rate limiter.", labels=("scope",)
+)
+
+
+@dataclass
+class BucketState:
+    """Outcome of one take from a bucket, rendered as ``RateLimit-*`` headers."""
+
+    allowed: bool
+    limit: int
+    remaining: float
+    reset_seconds: float
+    retry_after_seconds: float = 0.0
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(max(int(self.remaining), 0)),
+            "RateLimit-Reset": str(math.ceil(self.reset_seconds)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(math.ceil(self.retry_after_seconds), 1))
+        return headers
+
+
+class BucketStore(Protocol):
+    async def take(
+        self, key: str, cost: float, capacity: float, refill_per_second: float, force: bool = False
+    ) -> tuple[bool, float]:
+        """
+        Refill the bucket for the time since its last take, then remove
+        ``cost`` tokens if it holds them (unconditionally with ``force``, which
+        may leave it negative). Return ``(taken, tokens left)``.
+        """
+        ...
+
+
+class MemoryBucketStore:
+    """Process-local buckets, for tests and ``BYPASS_DB_FOR_TESTS``; limits multiply with workers."""
+
+    def __init__(self, max_keys: int = 10_000) -> None:
+        self.max_keys = max_keys
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    async def take(
+        self, key: str, cost: float, capacity: float, refill_per_second: float, force: bool = False
+    ) -> tuple[bool, float]:
+        now = time.time()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+        taken = force or tokens >= cost
+        if taken:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            # Forget buckets that have had time to refill completely.
+            self._buckets = {
+                k: v for k, v in self._buckets.items() if v[0] + (now - v[1]) * refill_per_second < capacity
+            }
+        return taken, tokens
+
+
+class DatabaseBucketStore:
+    """
+    Buckets in ``rate_limit_buckets``, shared by every worker and surviving
+    restarts. A take is a single conditional ``UPDATE ... RETURNING``, so
+    concurrent requests cannot both spend the same tokens.
+    """
+
+    async def take(
+        self, key: str, cost: float, capacity: float, refill_per_second: float, force: bool = False
+    ) -> tuple[bool, float]:
+        now = time.time()
+        refilled = RateLimitBucket.tokens + (now - RateLimitBucket.updated_at) * refill_per_second
+        level = case((refilled > capacity, capacity), else_=refilled)
+        condition = RateLimitBucket.key == key
+        if not force:
+            condition = condition & (level >= cost)
+        statement = (
+            update(RateLimitBucket)
+            .where(condition)
+            .values(tokens=level - cost, updated_at=now)
+            .returning(RateLimitBucket.tokens)
+            .execution_options(synchronize_session=False)
+        )
+        async with database.get_session() as session:
+            for _ in range(2):
+                left = (await session.execute(statement)).scalar_one_or_none()
+                if left is not None:
+                    return True, left
+                bucket = await session.get(RateLimitBucket, key)
+                if bucket is not None:
+                    return False, min(capacity, bucket.tokens + (now - bucket.updated_at) * refill_per_second)
+                taken = force or capacity >= cost
+                tokens = capacity - cost if taken else capacity
+                session.add(RateLimitBucket(key=key, tokens=tokens, updated_at=now))
+                try:
+                    await session.flush()
+                except IntegrityError:
+                    # Another request created the bucket first; take from it instead.
+                    await session.rollback()
+                    continue
+                return taken, tokens
+        raise RuntimeError(f"Could not take from rate limit bucket {key}")
+
+
+def _trusted(address: str, networks: list) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def client_ip(request: Request) -> str:
+    """
+    The client's address: the peer, or with ``TRUSTED_PROXIES`` the
+    right-most ``X-Forwarded-For`` entry not added by a trusted proxy, so
+    clients cannot choose their address by sending the header themselves.
+    """
+    address = request.client.host if request.client else "unknown"
+    networks = [
+        ipaddress.ip_network(entry.strip(), strict=False)
+        for entry in settings.trusted_proxies.split(",")
+        if entry.strip()
+    ]
+    if not networks:
+        return address
+    forwarded = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    while forwarded and _trusted(address, networks):
+        address = forwarded.pop()
+    return address
+
+
+def client_id(request: Request) -> str:
+    """Rate limit and token budget key: a configured ``X-API-Key``, else the client's address."""
+    api_key = request.headers.get("x-api-key")
+    if api_key and api_key in {key.strip() for key in settings.client_api_keys.split(",") if key.strip()}:
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    return client_ip(request)
+
+
+def contract_units(chars: int) -> int:
+    """Bucket tokens charged for a request carrying a contract of ``chars`` characters."""
+    return 1 + (chars // CHARS_PER_TOKEN) // max(settings.rate_limit_tokens_per_unit, 1)
+
+
+def request_units(request: Request) -> int:
+    try:
+        length = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        length = 0
+    return contract_units(length)
+
+
+class RateLimiter:
+    """
+    Token-bucket limits per client and route scope. A bucket holds
+    ``per_minute`` units and refills at ``per_minute`` units a minute; a
+    request costs ``request_units`` (more for larger contracts).
+    """
+
+    def __init__(self, store: BucketStore) -> None:
+        self.store = store
+
+    async def hit(
+        self, request: Request, scope: str, per_minute: int, cost: int, force: bool = False
+    ) -> BucketState:
+        refill = per_minute / 60
+        if not force:
+            # A contract bigger than the whole bucket is admitted once the bucket is full.
+            cost = min(cost, per_minute)
+        taken, left = await self.store.take(f"{scope}:{client_id(request)}", cost, per_minute, refill, force)
+        return BucketState(
+            allowed=taken,
+            limit=per_minute,
+            remaining=left,
+            reset_seconds=max(per_minute - left, 0) / refill,
+            retry_after_seconds=0.0 if taken else (cost - left) / refill,
+        )
+
+    async def charge(self, request: Request, scope: str, per_minute: int, cost: int) -> None:
+        """Charge units found out after the request was admitted, e.g. an upload without ``Content-Length``."""
+        if per_minute > 0 and cost > 0:
+            await self.hit(request, scope, per_minute, cost, force=True)
+
+    def limit(self, scope: str, per_minute: int) -> Callable:
+        """Route dependency: 429 with ``Retry-After`` when the client's bucket lacks the request's units."""
+
+        async def dependency(request: Request, response: Response) -> BucketState | None:
+            if per_minute <= 0:
+                return None
+            state = await self.hit(request, scope, per_minute, request_units(request))
+            if not state.allowed:
+                RATE_LIMITED.inc(scope=scope)
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Rate limit exceeded",
+                    headers=state.headers(),
+                )
+            response.headers.update(state.headers())
+            return state
+
+        return dependency
+
+
+rate_limiter = RateLimiter(
+    MemoryBucketStore()
+    if settings.in_memory_mode or settings.rate_limit_store == "memory"
+    else DatabaseBucketStore()
+)
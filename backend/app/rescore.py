@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import and_, exists, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from .config import get_settings
+from .database import get_session
+from .events import event_bus
+from .llm import AnthropicClient, LLMUsage
+from .models import Analysis, default_uuid
+from .pipeline import (
+    PendingReview,
+    _budget_warnings,
+    _build_findings,
+    _build_result,
+    _merge_findings,
+    _review_batched,
+    _risk_prompt_prefix,
+    analysis_modes,
+)
+from .playbook import playbook_cache
+from .schemas import Finding, RescoreJobResponse
+from .tokens import TokenBudget
+from .workers import run_blocking
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class RescoreJob:
+    version_id: str
+    analysis_type: str | None = None
+    use_llm: bool = False
+    chunk_size: int = 50
+    limit: int | None = None
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = "queued"
+    total: int = 0
+    processed: int = 0
+    created: int = 0
+    skipped: int = 0
+    error: str | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    task: asyncio.Task | None = None
+
+    def to_response(self) -> RescoreJobResponse:
+        return RescoreJobResponse(
+            job_id=self.id,
+            version_id=self.version_id,
+            status=self.status,
+            total=self.total,
+            processed=self.processed,
+            created=self.created,
+            skipped=self.skipped,
+            error=self.error,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+        )
+
+
+class RescoreJobRegistry:
+    """In-process registry of re-score jobs; progress is also published on the event bus."""
+
+    def __init__(self) -> None:
+        self.jobs: dict[str, RescoreJob] = {}
+
+    def get(self, job_id: str) -> RescoreJob | None:
+        return self.jobs.get(job_id)
+
+    def start(self, job: RescoreJob) -> RescoreJob:
+        self.jobs[job.id] = job
+        job.task = asyncio.create_task(run_rescore_job(job))
+        return job
+
+
+rescore_jobs = RescoreJobRegistry()
+
+
+def _has_mode(mode: str):
+    """``analysis_type`` lists ``mode`` among its comma-separated modes."""
+    return or_(
+        Analysis.analysis_type == mode,
+        Analysis.analysis_type.like(f"{mode},%"),
+        Analysis.analysis_type.like(f"%,{mode}"),
+        Analysis.analysis_type.like(f"%,{mode},%"),
+    )
+
+
+def _candidates(job: RescoreJob):
+    """
+    Completed analyses at the end of their lineage (no revision or re-score
+    derived from them yet) that were not produced with ``job.version_id``.
+    Re-scoring one makes its new child the leaf, so repeated jobs re-score
+    each contract once instead of every analysis derived from it.
+    """
+    child = aliased(Analysis)
+    conditions = [
+        Analysis.status == "completed",
+        Analysis.clause_findings_json.is_not(None),
+        or_(Analysis.playbook_version_id.is_(None), Analysis.playbook_version_id != job.version_id),
+        ~exists().where(child.parent_id == Analysis.id),
+    ]
+    if job.analysis_type:
+        conditions.append(_has_mode(job.analysis_type))
+    return and_(*conditions)
+
+
+async def resolve_contract_text(session: AsyncSession, analysis: Analysis) -> str:
+    """Contract text of ``analysis``, following ``parent_id`` past re-scored analyses that store none."""
+    while not analysis.contract_text and analysis.parent_id:
+        parent = await session.get(Analysis, analysis.parent_id)
+        if parent is None:
+            break
+        analysis = parent
+    return analysis.contract_text
+
+
+def _publish(job: RescoreJob) -> None:
+    event_bus.publish(job.id, "status", json.loads(job.to_response().json()))
+
+
+async def run_rescore_job(job: RescoreJob) -> None:
+    """
+    Re-evaluate stored clause extractions of completed analyses against
+    ``job.version_id`` and store the outcome as new analyses linked through
+    ``parent_id``, which also locates their contract text (see
+    ``resolve_contract_text``). Clauses are never re-extracted; retrieval is batched per
+    chunk with identical clause texts retrieved once, and the LLM is only
+    called when ``job.use_llm`` is set. Chunks are separated by
+    ``RESCORE_THROTTLE_SECONDS`` to leave room for interactive traffic.
+    """
+    job.status = "running"
+    job.started_at = datetime.utcnow()
+    try:
+        async with get_session() as session:
+            total = (
+                await session.execute(select(func.count()).select_from(Analysis).where(_candidates(job)))
+            ).scalar_one()
+        job.total = min(total, job.limit) if job.limit else total
+        _publish(job)
+
+        llm_client = AnthropicClient()
+        cursor: tuple[datetime, str] | None = None
+        while job.processed < job.total:
+            async with get_session() as session:
+                stmt = select(Analysis).where(_candidates(job))
+                if cursor:
+                    stmt = stmt.where(
+                        or_(
+                            Analysis.created_at > cursor[0],
+                            and_(Analysis.created_at == cursor[0], Analysis.id > cursor[1]),
+                        )
+                    )
+                stmt = stmt.order_by(Analysis.created_at, Analysis.id).limit(
+                    min(job.chunk_size, job.total - job.processed)
+                )
+                batch = (await session.execute(stmt)).scalars().all()
+                if not batch:
+                    break
+                cursor = (batch[-1].created_at, batch[-1].id)
+                session.add_all(await _rescore_batch(job, batch, llm_client))
+            job.processed += len(batch)
+            _publish(job)
+            await asyncio.sleep(settings.rescore_throttle_seconds)
+        job.status = "completed"
+    except Exception as exc:
+        logger.exception("Re-score job %s failed: %s", job.id, exc)
+        job.status = "failed"
+        job.error = str(exc)
+    finally:
+        job.finished_at = datetime.utcnow()
+        _publish(job)
+
+
+async def _rescore_batch(
+    job: RescoreJob, batch: list[Analysis], llm_client: AnthropicClient
+) -> list[Analysis]:
+    clauses_by_analysis: list[list[dict[str, Any]]] = []
+    for source in batch:
+        # Every mode stores the same clauses; re-score from the primary mode's copy.
+        primary = analysis_modes(source.analysis_type)[0]
+        clauses_by_analysis.append(
+            [c for c in source.get_clause_findings() if c.get("mode") in (primary, None)]
+        )
+    texts = list(
+        dict.fromkeys(clause["source_text"] for clauses in clauses_by_analysis for clause in clauses)
+    )
+    retrieved = dict(zip(texts, await run_blocking(playbook_cache.rag.query_many, job.version_id, texts)))
+    batched = settings.llm_review_mode == "batched"
+    prompt_prefix = None
+    if job.use_llm:
+        prompt_prefix = await run_blocking(_risk_prompt_prefix, playbook_cache.rag, job.version_id)
+
+    created: list[Analysis] = []
+    for source, clauses in zip(batch, clauses_by_analysis):
+        if not clauses:
+            job.skipped += 1
+            continue
+        analysis = Analysis(
+            id=default_uuid(),
+            analysis_type=source.analysis_type,
+            # The text is that of the source, found through ``parent_id``.
+            contract_text="",
+            status="completed",
+            playbook_version_id=job.version_id,
+            parent_id=source.id,
+        )
+        total_usage = LLMUsage(0, 0)
+        llm_client.budget = TokenBudget.for_analysis()
+        findings: list[Finding] = []
+        reviews: list[PendingReview] = []
+        modes = analysis_modes(source.analysis_type)
+        for clause in clauses:
+            chunks = retrieved.get(clause["source_text"]) or []
+            if not chunks:
+                continue
+            clause_findings = await _build_findings(
+                modes,
+                clause,
+                chunks,
+                llm_client,
+                total_usage,
+                use_llm=job.use_llm and not batched,
+                prompt_prefix=prompt_prefix,
+            )
+            if job.use_llm and batched and "risks" in modes:
+                reviews.append(
+                    PendingReview(clause, chunks, [f for f in clause_findings if f.mode == "risks"])
+                )
+            findings.extend(clause_findings)
+        if reviews:
+            await _review_batched(reviews, llm_client, total_usage, prompt_prefix)
+        analysis.set_clause_findings(findings)
+        result = _build_result(
+            analysis, _merge_findings(findings), _budget_warnings(llm_client), total_usage, job.version_id
+        )
+        analysis.set_result(json.loads(result.json()))
+        analysis.set_guardrails([w.dict() for w in result.guardrail_warnings])
+        if result.usage:
+            analysis.set_usage(result.usage.dict())
+        created.append(analysis)
+        job.created += 1
+    return created
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+from .schemas import RetrievedChunk
+
+CacheKey = tuple[str, str, bytes, int, Hashable]
+
+# Rough per-object overhead for a cached RetrievedChunk and its list slot.
+_CHUNK_OVERHEAD = 400
+_ENTRY_OVERHEAD = 200
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _entry_size(chunks: list[RetrievedChunk]) -> int:
+    return _ENTRY_OVERHEAD + sum(
+        _CHUNK_OVERHEAD + sys.getsizeof(chunk.content) + sys.getsizeof(chunk.chunk_id) for chunk in chunks
+    )
+
+
+class RetrievalCache:
+    """
+    LRU of retrieval results keyed by (playbook version, retrieval mode,
+    normalized clause text digest, k, index stamp), bounded by an estimate of the bytes it
+    holds. Contracts built from the same templates retrieve the same clauses
+    against the same version over and over; reindexing a version drops its
+    entries.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, tuple[list[RetrievedChunk], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(version_id: str, mode: str, text: str, k: int, stamp: Hashable = None) -> CacheKey:
+        """``stamp`` identifies the indexed state of the version, e.g. its index file's stamp."""
+        digest = hashlib.blake2b(normalize_query(text).encode("utf-8"), digest_size=16).digest()
+        return version_id, mode, digest, k, stamp
+
+    def get(self, key: CacheKey) -> list[RetrievedChunk] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[0])
+
+    def put(self, key: CacheKey, chunks: list[RetrievedChunk]) -> None:
+        size = _entry_size(chunks)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (list(chunks), size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate_version(self, version_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == version_id]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,10 +1,20 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Literal, Optional
+from typing import Any, Literal, Optional, Union
 
 from pydantic import BaseModel, Field, HttpUrl, validator
 
+AnalysisMode = Literal["risks", "summary", "obligations"]
+
+
+def _join_modes(v: str | list[str]) -> str:
+    """Store one or more modes as a comma-separated string, first mode primary."""
+    modes = [v] if isinstance(v, str) else list(dict.fromkeys(v))
+    if not modes:
+        raise ValueError("at least one analysis type is required")
+    return ",".join(modes)
+
 
 class GuardrailWarning(BaseModel):
     type: str
@@ -28,6 +38,28 @@ class Finding(BaseModel):
     recommendation: str
     source_text: str
     retrieved_chunks: list[RetrievedChunk] = Field(default_factory=list)
+    section_id: Optional[str] = None
+    start: Optional[int] = None
+    end: Optional[int] = None
+    mode: Optional[AnalysisMode] = None
+
+
+class SectionInfo(BaseModel):
+    section_id: str
+    heading: str
+    start: int
+    end: int
+    level: int
+    parent_id: Optional[str] = None
+
+
+class ClauseContextResponse(BaseModel):
+    analysis_id: str
+    start: int
+    end: int
+    section: Optional[SectionInfo] = None
+    heading_path: Optional[str] = None
+    text: str
 
 
 class Usage(BaseModel):
@@ -35,6 +67,8 @@ class Usage(BaseModel):
     output_tokens: int
     total_tokens: int
     estimated_cost_usd: float
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
 
 
 class AnalysisResult(BaseModel):
@@ -46,17 +80,69 @@ class AnalysisResult(BaseModel):
     confidence_score: float
     playbook_version_id: Optional[str] = None
     usage: Optional[Usage] = None
+    findings_by_mode: Optional[dict[str, list[Finding]]] = None
+    timings: Optional[dict[str, float]] = None
+
+
+class ProfileEntry(BaseModel):
+    function: str
+    file: str
+    line: int
+    calls: int
+    primitive_calls: int
+    tottime: float
+    cumtime: float
+
+
+class ProfileSummary(BaseModel):
+    analysis_id: str
+    total_seconds: float
+    sort: str
+    functions: list[ProfileEntry]
+
+
+class FindingDelta(BaseModel):
+    added: list[Finding] = Field(default_factory=list)
+    removed: list[Finding] = Field(default_factory=list)
+    changed: list[Finding] = Field(default_factory=list)
+
+
+class RevisionResponse(BaseModel):
+    parent_id: str
+    result: AnalysisResult
+    delta: FindingDelta
+    timings: dict[str, float]
 
 
 class AnalysisCreateRequest(BaseModel):
     contract_text: str = Field(min_length=10)
-    analysis_type: Literal["risks", "summary", "obligations"]
+    analysis_type: Union[AnalysisMode, list[AnalysisMode]]
     playbook_version_id: Optional[str] = None
+    # "batch" trades latency for throughput: LLM calls go through the Message Batches API.
+    llm_mode: Literal["interactive", "batch"] = "interactive"
 
     @validator("contract_text")
     def normalize_text(cls, v: str) -> str:
         return v.strip()
 
+    _normalize_modes = validator("analysis_type", allow_reuse=True)(_join_modes)
+
+
+class AnalysisRevisionRequest(BaseModel):
+    contract_text: str = Field(min_length=10)
+    playbook_version_id: Optional[str] = None
+
+    @validator("contract_text")
+    def normalize_text(cls, v: str) -> str:
+        return v.strip()
+
+
+class StreamingAnalysisCreateRequest(BaseModel):
+    analysis_type: Union[AnalysisMode, list[AnalysisMode]]
+    playbook_version_id: Optional[str] = None
+
+    _normalize_modes = validator("analysis_type", allow_reuse=True)(_join_modes)
+
 
 class AnalysisStatusResponse(BaseModel):
     analysis_id: str
@@ -82,3 +168,39 @@ class PlaybookVersionList(BaseModel):
 
 class PlaybookReindexRequest(BaseModel):
     version_id: Optional[str] = None
+
+
+class RescoreRequest(BaseModel):
+    analysis_type: Optional[Literal["risks", "summary", "obligations"]] = None
+    use_llm: bool = False
+    chunk_size: Optional[int] = Field(default=None, ge=1, le=1000)
+    limit: Optional[int] = Field(default=None, ge=1)
+
+
+class AnalysisSummary(BaseModel):
+    analysis_id: str
+    created_at: datetime
+    status: str
+    analysis_type: str
+    playbook_version_id: Optional[str] = None
+    parent_id: Optional[str] = None
+    overall_risk_score: Optional[str] = None
+
+
+class AnalysisListResponse(BaseModel):
+    items: list[AnalysisSummary]
+    # Pass as ``cursor`` for the next page; absent on the last page.
+    next_cursor: Optional[str] = None
+
+
+class RescoreJobResponse(BaseModel):
+    job_id: str
+    version_id: str
+    status: str
+    total: int
+    processed: int
+    created: int
+    skipped: int
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from bisect import bisect_right
+from dataclasses import asdict, dataclass
+from typing import Iterable
+
+# Heading styles found in the sample contracts:
+#   "ARTICLE 5: PAYMENT"        -> level 1, id "5"
+#   "5. PAYMENT TERMS"          -> level 1, id "5"
+#   "5.3 Retainage"             -> level 2, id "5.3"
+#   "RECITALS" (all caps line)  -> level 1, id "recitals"
+HEADING_PATTERN = re.compile(
+    r"^(?:"
+    r"ARTICLE\s+(?P<article>\d+)\s*[:.\-–]?\s*(?P<article_title>[^\n]*)"
+    r"|(?P<major>\d+)\.\s+(?P<major_title>[A-Z][^\n]*)"
+    r"|(?P<minor>\d+(?:\.\d+)+)\.?\s+(?P<minor_title>[^\n]+)"
+    r"|(?P<caps>[A-Z][A-Z0-9 &/,'()\-]{3,})"
+    r")[ \t]*$",
+    re.MULTILINE,
+)
+MAX_HEADING_CHARS = 120
+
+
+@dataclass
+class Section:
+    section_id: str
+    heading: str
+    start: int
+    end: int
+    level: int
+    parent_id: str | None = None
+
+    def dict(self) -> dict:
+        return asdict(self)
+
+
+class SectionIndex:
+    """
+    Numbered sections/headings of a contract with character offsets.
+
+    Built in a single pass over the text. Offsets are absolute, i.e. shifted by
+    the ``offset`` passed to ``build_section_index`` when indexing a window.
+    """
+
+    def __init__(self, sections: list[Section], text_start: int, text_end: int) -> None:
+        self.sections = sections
+        self.text_start = text_start
+        self.text_end = text_end
+        self._starts = [section.start for section in sections]
+        self._by_id = {section.section_id: section for section in sections}
+        self._children: dict[str, list[Section]] = {}
+        for section in sections:
+            if section.parent_id:
+                self._children.setdefault(section.parent_id, []).append(section)
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    def get(self, section_id: str) -> Section | None:
+        return self._by_id.get(section_id)
+
+    def locate(self, position: int) -> Section | None:
+        """Return the deepest section containing ``position``."""
+        idx = bisect_right(self._starts, position) - 1
+        section = self.sections[idx] if idx >= 0 else None
+        while section and not (section.start <= position < section.end):
+            section = self._by_id.get(section.parent_id) if section.parent_id else None
+        return section
+
+    def heading_path(self, section: Section) -> str:
+        parts = [section.heading]
+        while section.parent_id and (parent := self._by_id.get(section.parent_id)):
+            parts.append(parent.heading)
+            section = parent
+        return " / ".join(reversed(parts))
+
+    def ranges_for(self, keywords: Iterable[str]) -> list[tuple[int, int]]:
+        """
+        Character ranges worth scanning for a clause described by ``keywords``:
+        sections whose heading (or an ancestor's) mentions a keyword, plus any
+        text that no section covers. Ranges are merged and sorted.
+        """
+        lowered = tuple(k.lower() for k in keywords)
+        ranges: list[tuple[int, int]] = []
+        for section in self.sections:
+            path = self.heading_path(section).lower()
+            if any(keyword in path for keyword in lowered):
+                ranges.append((section.start, section.end))
+        ranges.extend(self._uncovered())
+        return merge_ranges(ranges)
+
+    def own_ranges(self, section: Section) -> list[tuple[int, int]]:
+        """Ranges of ``section`` that are not covered by its child sections."""
+        ranges: list[tuple[int, int]] = []
+        cursor = section.start
+        for child in self._children.get(section.section_id, []):
+            if child.start > cursor:
+                ranges.append((cursor, child.start))
+            cursor = max(cursor, child.end)
+        if cursor < section.end:
+            ranges.append((cursor, section.end))
+        return ranges
+
+    def fingerprints(self, text: str) -> dict[str, str]:
+        """
+        Hash of each section's own text (children excluded), so an edit only
+        changes the fingerprint of the section that directly contains it.
+        ``text`` must be the text this index was built from.
+        """
+        result: dict[str, str] = {}
+        for section in self.sections:
+            digest = hashlib.sha1()
+            for start, end in self.own_ranges(section):
+                digest.update(text[start - self.text_start : end - self.text_start].encode("utf-8"))
+            result[section.section_id] = digest.hexdigest()
+        return result
+
+    def uncovered_ranges(self) -> list[tuple[int, int]]:
+        return self._uncovered()
+
+    def _uncovered(self) -> list[tuple[int, int]]:
+        gaps: list[tuple[int, int]] = []
+        cursor = self.text_start
+        for section in self.sections:
+            if section.parent_id is not None:
+                continue
+            if section.start > cursor:
+                gaps.append((cursor, section.start))
+            cursor = max(cursor, section.end)
+        if cursor < self.text_end:
+            gaps.append((cursor, self.text_end))
+        return gaps
+
+
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def build_section_index(text: str, offset: int = 0) -> SectionIndex:
+    sections: list[Section] = []
+    open_sections: list[Section] = []
+    seen_ids: set[str] = set()
+    for match in HEADING_PATTERN.finditer(text):
+        groups = match.groupdict()
+        if groups["article"]:
+            section_id, heading, level = groups["article"], match.group(0), 1
+        elif groups["major"]:
+            section_id, heading, level = groups["major"], match.group(0), 1
+        elif groups["minor"]:
+            section_id, heading = groups["minor"], match.group(0)
+            level = section_id.count(".") + 1
+        else:
+            heading = groups["caps"]
+            section_id, level = re.sub(r"[^a-z0-9]+", "-", heading.lower()).strip("-"), 1
+        start = offset + match.start()
+        # Close every open section at the same or a deeper level.
+        while open_sections and open_sections[-1].level >= level:
+            open_sections.pop().end = start
+        parent = open_sections[-1] if open_sections else None
+        if section_id in seen_ids:
+            section_id = f"{section_id}@{start}"
+        seen_ids.add(section_id)
+        section = Section(
+            section_id=section_id,
+            heading=heading.strip()[:MAX_HEADING_CHARS],
+            start=start,
+            end=offset + len(text),
+            level=level,
+            parent_id=parent.section_id if parent else None,
+        )
+        sections.append(section)
+        open_sections.append(section)
+    return SectionIndex(sections, offset, offset + len(text))
+
+
+def intersect_ranges(
+    ranges: list[tuple[int, int]], limits: list[tuple[int, int]]
+) -> list[tuple[int, int]]:
+    """Intersection of two sorted, non-overlapping range lists."""
+    result: list[tuple[int, int]] = []
+    i = j = 0
+    while i < len(ranges) and j < len(limits):
+        start = max(ranges[i][0], limits[j][0])
+        end = min(ranges[i][1], limits[j][1])
+        if start < end:
+            result.append((start, end))
+        if ranges[i][1] < limits[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Coroutine
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class ShuttingDown(RuntimeError):
+    """Raised by ``TaskRegistry.start`` once the registry has begun draining."""
+
+
+class TaskRegistry:
+    """
+    Background analyses running in this process, keyed by analysis id.
+
+    On shutdown ``drain`` stops new work from starting, gives the running
+    tasks until a deadline to finish and cancels the rest; a cancelled
+    analysis task is expected to hand its analysis back (see
+    ``_run_background_analysis``) before it exits.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.accepting = True
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def start(self, key: str, coro: Coroutine) -> asyncio.Task:
+        if not self.accepting:
+            coro.close()
+            raise ShuttingDown(f"Not starting {key}: shutting down")
+        task = asyncio.create_task(coro, name=f"analysis-{key}")
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return task
+
+    async def drain(self, timeout: float) -> list[str]:
+        """Stop accepting work and wait up to ``timeout`` seconds; return the keys of the cancelled tasks."""
+        self.accepting = False
+        tasks = dict(self._tasks)
+        if not tasks:
+            return []
+        logger.info("Waiting up to %.0fs for %d running analyses", timeout, len(tasks))
+        _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        # Let the cancelled tasks run their cleanup before resources are closed.
+        await asyncio.gather(*pending, return_exceptions=True)
+        return [key for key, task in tasks.items() if task in pending]
+
+
+task_registry = TaskRegistry()
+
+registry.gauge(
+    "analyzer_background_tasks",
+    "Background analyses running in this process.",
+    callback=lambda: float(len(task_registry)),
+)
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from .config import get_settings
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+BUDGET_REJECTIONS = registry.counter(
+    "analyzer_llm_budget_rejections_total",
+    "LLM calls skipped or requests refused because a token budget was exhausted.",
+    labels=("scope",),
+)
+
+
+def _bundled_tokenizer_path() -> Path | None:
+    """The tokenizer file shipped inside the anthropic SDK, located without importing the SDK."""
+    spec = importlib.util.find_spec("anthropic")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    path = Path(list(spec.submodule_search_locations)[0]) / "tokenizer.json"
+    return path if path.exists() else None
+
+
+class TokenCounter:
+    """
+    Token counts from a local ``tokenizers`` tokenizer (by default the one
+    bundled with the anthropic SDK), with an LRU of counts keyed by a digest
+    of the text so repeated prompts are encoded once. Falls back to the
+    four-characters-per-token estimate when no tokenizer can be loaded.
+    """
+
+    def __init__(self, tokenizer_path: str | None = None, cache_size: int = 4096) -> None:
+        self.tokenizer_path = tokenizer_path
+        self.cache_size = cache_size
+        self._tokenizer: Any = None
+        self._loaded = False
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def source(self) -> str:
+        self.load()
+        return "tokenizer" if self._tokenizer is not None else "heuristic"
+
+    def load(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            path = Path(self.tokenizer_path) if self.tokenizer_path else _bundled_tokenizer_path()
+            try:
+                from tokenizers import Tokenizer
+
+                if path is None:
+                    raise FileNotFoundError("no tokenizer.json found")
+                self._tokenizer = Tokenizer.from_file(str(path))
+            except Exception as exc:
+                logger.warning("Token counting falls back to len/4 estimates: %s", exc)
+            self._loaded = True
+
+    def count(self, text: str) -> int:
+        return self.count_many([text])[0]
+
+    def count_many(self, texts: list[str]) -> list[int]:
+        self.load()
+        if self._tokenizer is None:
+            return [len(text) // 4 for text in texts]
+        keys = [hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest() for text in texts]
+        counts: list[int | None] = []
+        with self._lock:
+            for key in keys:
+                count = self._cache.get(key)
+                if count is not None:
+                    self._cache.move_to_end(key)
+                counts.append(count)
+        missing = [idx for idx, count in enumerate(counts) if count is None]
+        if missing:
+            encodings = self._tokenizer.encode_batch([texts[idx] for idx in missing], add_special_tokens=False)
+            with self._lock:
+                for idx, encoding in zip(missing, encodings):
+                    counts[idx] = len(encoding.ids)
+                    self._cache[keys[idx]] = counts[idx]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return counts  # type: ignore[return-value]
+
+
+token_counter = TokenCounter(settings.tokenizer_path)
+
+
+def count_tokens(text: str) -> int:
+    return token_counter.count(text)
+
+
+class TokenBudgetExceeded(Exception):
+    def __init__(self, scope: str, needed: int, remaining: int) -> None:
+        super().__init__(f"{scope} token budget exhausted: needs {needed}, {remaining} left")
+        self.scope = scope
+        self.needed = needed
+        self.remaining = remaining
+
+
+class ClientTokenLedger:
+    """Tokens used per client in fixed windows of ``window_seconds``; process-local."""
+
+    def __init__(self, limit: int, window_seconds: float) -> None:
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._used: dict[str, tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def _window(self, client_id: str, now: float) -> tuple[float, int]:
+        started, used = self._used.get(client_id, (now, 0))
+        if now - started >= self.window_seconds:
+            return now, 0
+        return started, used
+
+    def remaining(self, client_id: str) -> int | None:
+        if self.limit <= 0:
+            return None
+        with self._lock:
+            _, used = self._window(client_id, time.monotonic())
+        return max(self.limit - used, 0)
+
+    def charge(self, client_id: str, tokens: int) -> None:
+        if self.limit <= 0 or tokens <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            started, used = self._window(client_id, now)
+            self._used[client_id] = (started, used + tokens)
+            if len(self._used) > 10_000:
+                # Forget clients whose window has lapsed.
+                self._used = {
+                    key: value for key, value in self._used.items() if now - value[0] < self.window_seconds
+                }
+
+    def usage(self, client_id: str) -> dict[str, int | float | None]:
+        with self._lock:
+            started, used = self._window(client_id, time.monotonic())
+        return {
+            "used_tokens": used,
+            "limit_tokens": self.limit or None,
+            "remaining_tokens": max(self.limit - used, 0) if self.limit > 0 else None,
+            "window_seconds": self.window_seconds,
+            "resets_in_seconds": round(max(self.window_seconds - (time.monotonic() - started), 0.0), 1),
+        }
+
+
+client_ledger = ClientTokenLedger(settings.client_token_budget, settings.client_token_budget_window_seconds)
+
+
+class TokenBudget:
+    """
+    Pre-flight token budget for one analysis: ``ANALYSIS_TOKEN_BUDGET`` tokens
+    for the analysis itself and, when the request came from a known client,
+    whatever is left of that client's ``CLIENT_TOKEN_BUDGET`` window. A call
+    is refused before it is sent when its prompt plus ``max_tokens`` would
+    overrun either.
+    """
+
+    def __init__(self, limit: int = 0, client_id: str | None = None, ledger: ClientTokenLedger | None = None) -> None:
+        self.limit = limit
+        self.client_id = client_id
+        self.ledger = ledger if client_id else None
+        self.used = 0
+        self.rejected = 0
+
+    @classmethod
+    def for_analysis(cls, client_id: str | None = None) -> "TokenBudget":
+        return cls(settings.analysis_token_budget, client_id, client_ledger)
+
+    def check(self, estimated_tokens: int) -> None:
+        if self.limit > 0 and self.used + estimated_tokens > self.limit:
+            self._reject("analysis", estimated_tokens, self.limit - self.used)
+        if self.ledger is not None:
+            remaining = self.ledger.remaining(self.client_id)  # type: ignore[arg-type]
+            if remaining is not None and estimated_tokens > remaining:
+                self._reject("client", estimated_tokens, remaining)
+
+    def _reject(self, scope: str, needed: int, remaining: int) -> None:
+        self.rejected += 1
+        BUDGET_REJECTIONS.inc(scope=scope)
+        raise TokenBudgetExceeded(scope, needed, max(remaining, 0))
+
+    def charge(self, tokens: int) -> None:
+        self.used += tokens
+        if self.ledger is not None:
+            self.ledger.charge(self.client_id, tokens)  # type: ignore[arg-type]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupStage:
+    name: str
+    state: str = "pending"
+    seconds: float | None = None
+    error: str | None = None
+
+    def dict(self) -> dict:
+        return {"state": self.state, "seconds": self.seconds, "error": self.error}
+
+
+class Warmup:
+    """
+    Startup work that runs after the server starts accepting connections:
+    schema creation, playbook seeding (and rebuilding lost embeddings) and
+    loading the embedding model. Stages run in order on a background task;
+    ``GET /ready`` reports their progress while ``GET /health`` answers from
+    the first moment. A failed stage is logged and ends the warmup.
+    Requests can wait for just the stages they depend on (``wait_for``).
+    """
+
+    def __init__(self) -> None:
+        self.stages: list[WarmupStage] = []
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._done = asyncio.Event()
+        self._stage_ended: dict[str, asyncio.Event] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self, steps: list[tuple[str, Callable[[], Awaitable[None]]]]) -> None:
+        self.stages = [WarmupStage(name) for name, _ in steps]
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self._done = asyncio.Event()
+        self._stage_ended = {name: asyncio.Event() for name, _ in steps}
+        self._task = asyncio.create_task(self._run(steps))
+
+    async def _run(self, steps: list[tuple[str, Callable[[], Awaitable[None]]]]) -> None:
+        try:
+            for stage, (_, step) in zip(self.stages, steps):
+                stage.state = "running"
+                started = time.perf_counter()
+                try:
+                    await step()
+                except Exception as exc:
+                    stage.state = "failed"
+                    stage.error = str(exc)
+                    logger.exception("Warmup stage %s failed", stage.name)
+                    return
+                finally:
+                    stage.seconds = round(time.perf_counter() - started, 3)
+                stage.state = "done"
+                self._stage_ended[stage.name].set()
+                logger.info("Warmup stage %s done in %.3fs", stage.name, stage.seconds)
+        finally:
+            self.finished_at = time.monotonic()
+            for ended in self._stage_ended.values():
+                ended.set()
+            self._done.set()
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    @property
+    def finished(self) -> bool:
+        """True once the warmup has ended, successfully or not, or was never started."""
+        return self._task is None or self._done.is_set()
+
+    @property
+    def ready(self) -> bool:
+        """True once every stage is done; also when no warmup was started."""
+        if self._task is None and not self.stages:
+            return True
+        return self._done.is_set() and all(stage.state == "done" for stage in self.stages)
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for the warmup to finish; return whether it is ready."""
+        if self.finished:
+            return self.ready
+        try:
+            await asyncio.wait_for(asyncio.shield(self._done.wait()), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return self.ready
+
+    async def wait_for(self, stages: tuple[str, ...], timeout: float) -> bool:
+        """
+        Wait up to ``timeout`` seconds for the named stages to end; return
+        whether they did. A stage ends when it is done, or when the warmup
+        stops before or at it (after a failure, or on shutdown).
+        """
+        events = [self._stage_ended[name] for name in stages if name in self._stage_ended]
+        if self.finished or all(event.is_set() for event in events):
+            return True
+        try:
+            await asyncio.wait_for(asyncio.gather(*(event.wait() for event in events)), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def status(self) -> dict:
+        end = self.finished_at or time.monotonic()
+        return {
+            "ready": self.ready,
+            "elapsed_seconds": round(end - self.started_at, 3) if self.started_at is not None else 0.0,
+            "stages": {stage.name: stage.dict() for stage in self.stages},
+        }
+
+
+warmup = Warmup()
+
+registry.gauge("analyzer_ready", "1 once startup warmup has finished.", callback=lambda: float(warmup.ready))
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from .config import get_settings
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+# Set while profiling a request: stages run on the calling thread so the profiler sees them.
+inline_stages: contextvars.ContextVar[bool] = contextvars.ContextVar("inline_stages", default=False)
+
+
+class WorkerPool:
+    """
+    Executors that keep CPU-bound and blocking pipeline stages off the event
+    loop.
+
+    ``run_cpu`` goes to the pool selected by ``WORKER_POOL_KIND``: threads by
+    default, or processes, in which case the function must be module-level
+    and its arguments and result picklable. ``run_blocking`` always uses
+    threads and is meant for calls holding unpicklable handles such as the
+    Chroma client and its ONNX embedding session.
+    """
+
+    def __init__(self, kind: str, size: int) -> None:
+        self.kind = kind if kind in ("thread", "process") else "thread"
+        self.size = size
+        self._cpu: Executor | None = None
+        self._blocking: ThreadPoolExecutor | None = None
+        self.pending = 0
+
+    @property
+    def cpu_executor(self) -> Executor:
+        if self._cpu is None:
+            if self.kind == "process":
+                self._cpu = ProcessPoolExecutor(
+                    max_workers=self.size, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._cpu = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="cpu")
+        return self._cpu
+
+    @property
+    def blocking_executor(self) -> ThreadPoolExecutor:
+        if self._blocking is None:
+            self._blocking = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="blocking")
+        return self._blocking
+
+    async def _submit(self, executor: Executor | None, fn: Callable[..., T], *args: Any) -> T:
+        if executor is None:
+            return fn(*args)
+        if not isinstance(executor, ProcessPoolExecutor):
+            # Threads see the caller's context, so metric spans land on the right analysis.
+            fn, args = contextvars.copy_context().run, (fn, *args)
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def run_cpu(self, fn: Callable[..., T], *args: Any) -> T:
+        executor = None if inline_stages.get() else self.cpu_executor
+        return await self._submit(executor, fn, *args)
+
+    async def run_blocking(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        executor = None if inline_stages.get() else self.blocking_executor
+        if kwargs:
+            return await self._submit(executor, functools.partial(fn, *args, **kwargs))
+        return await self._submit(executor, fn, *args)
+
+    def shutdown(self) -> None:
+        for executor in (self._cpu, self._blocking):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._cpu = self._blocking = None
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a fixed sleep. Sustained lag
+    means something is running synchronously on the loop; lag above
+    ``LOOP_LAG_WARN_SECONDS`` is logged.
+    """
+
+    def __init__(self, interval: float, warn_after: float) -> None:
+        self.interval = interval
+        self.warn_after = warn_after
+        self.last = 0.0
+        self.max = 0.0
+        self.samples = 0
+        self.total = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(time.perf_counter() - started - self.interval)
+
+    def record(self, lag: float) -> None:
+        lag = max(lag, 0.0)
+        self.last = lag
+        self.max = max(self.max, lag)
+        self.samples += 1
+        self.total += lag
+        if lag > self.warn_after:
+            logger.warning("Event loop lagged %.3fs behind schedule", lag)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "last_seconds": round(self.last, 6),
+            "max_seconds": round(self.max, 6),
+            "mean_seconds": round(self.total / self.samples, 6) if self.samples else 0.0,
+            "samples": self.samples,
+        }
+
+
+worker_pool = WorkerPool(settings.worker_pool_kind, settings.worker_pool_size or min(4, os.cpu_count() or 1))
+loop_lag_monitor = LoopLagMonitor(settings.loop_lag_interval_seconds, settings.loop_lag_warn_seconds)
+
+registry.gauge(
+    "analyzer_worker_queue_depth",
+    "Pipeline stages submitted to the worker pools and not yet finished.",
+    callback=lambda: worker_pool.pending,
+)
+registry.gauge(
+    "analyzer_event_loop_lag_seconds",
+    "Most recent event-loop scheduling lag.",
+    callback=lambda: loop_lag_monitor.last,
+)
+
+
+async def run_cpu(fn: Callable[..., T], *args: Any) -> T:
+    return await worker_pool.run_cpu(fn, *args)
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await worker_pool.run_blocking(fn, *args, **kwargs)
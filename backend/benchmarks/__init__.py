@@ -0,0 +1,4 @@
+"""
+Benchmarks for the analyzer backend. Run modules from the repository root,
+e.g. ``python -m backend.benchmarks.guards``.
+"""
@@ -0,0 +1,103 @@
+"""
+Cold-start time of the backend process: from spawn to the first answered
+``/health``, to ``/ready`` and to the first database-backed request
+(``GET /playbook``).
+
+    python -m backend.benchmarks.coldstart --runs 3 --embedder hashing --lose-embeddings
+
+The first run starts on an empty database and seeds the playbook; later runs
+restart on the same database. ``--lose-embeddings`` deletes the vector
+stores before each restart, as when a container comes back without its
+Chroma volume, so the playbook is re-embedded during warmup.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _poll(url: str, process: subprocess.Popen, started: float, timeout: float) -> float:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"backend exited with status {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return round(time.perf_counter() - started, 3)
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"{url} not answered within {timeout:.0f}s")
+
+
+def run_once(port: int, embedder: str, env: dict[str, str], timeout: float) -> dict:
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "backend.benchmarks.serve", "--port", str(port), "--embedder", embedder],
+        cwd=REPO_ROOT,
+        env={**os.environ, **env},
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        health = _poll(f"{base}/health", process, started, timeout)
+        first_request = _poll(f"{base}/playbook", process, started, timeout)
+        ready = _poll(f"{base}/ready", process, started, timeout)
+        stages = httpx.get(f"{base}/ready", timeout=5.0).json().get("stages", {})
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return {
+        "health_s": health,
+        "first_db_request_s": first_request,
+        "ready_s": ready,
+        "warmup_stages_s": {name: stage.get("seconds") for name, stage in stages.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8086)
+    parser.add_argument("--embedder", choices=["default", "hashing"], default="default")
+    parser.add_argument("--vector-backend", choices=["chroma", "numpy"], default="numpy")
+    parser.add_argument("--lose-embeddings", action="store_true")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {
+            "DATABASE_URL": f"sqlite+aiosqlite:///{workdir}/coldstart.db",
+            "BYPASS_DB_FOR_TESTS": "false",
+            "VECTOR_BACKEND": args.vector_backend,
+            "VECTOR_INDEX_DIR": f"{workdir}/vectors",
+            "CHROMA_DIR": f"{workdir}/chroma",
+        }
+        for run in range(args.runs):
+            if run and args.lose_embeddings:
+                for name in ("vectors", "chroma"):
+                    shutil.rmtree(Path(workdir) / name, ignore_errors=True)
+            row = {
+                "benchmark": "coldstart",
+                "run": "fresh" if run == 0 else ("lost_embeddings" if args.lose_embeddings else "restart"),
+                "embedder": args.embedder,
+                "vector_backend": args.vector_backend,
+            }
+            row.update(run_once(args.port, args.embedder, env, args.timeout))
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
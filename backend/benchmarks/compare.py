@@ -0,0 +1,107 @@
+"""
+Compare two ``suite.py`` result files and flag regressions.
+
+    python -m backend.benchmarks.compare baseline.json current.json --threshold 0.15
+
+Rows are matched on ``benchmark`` plus ``params``. Metrics ending in ``_ms``
+or ``_mb`` are lower-is-better, those ending in ``_per_s`` higher-is-better;
+other metrics are shown but never fail the comparison. Exits with status 1
+when any metric is worse than the baseline by more than ``--threshold``;
+timings that moved by less than ``--min-delta-ms`` are treated as noise.
+``--normalize`` rescales the current run by the ratio of the two runs'
+``calibration_ms``, a fixed workload timed by the suite, to compare runs from
+machines (or noisy CI neighbours) of different speed.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _direction(metric: str) -> int:
+    if metric.endswith("_per_s"):
+        return 1
+    if metric.endswith(("_ms", "_mb", "_ms_per_query")):
+        return -1
+    return 0
+
+
+def _row_key(row: dict) -> str:
+    return row["benchmark"] + json.dumps(row.get("params", {}), sort_keys=True)
+
+
+def _speed_ratio(baseline: dict, current: dict) -> float:
+    """How much slower the current machine ran the calibration workload."""
+    before = baseline.get("meta", {}).get("calibration_ms")
+    after = current.get("meta", {}).get("calibration_ms")
+    return after / before if before and after else 1.0
+
+
+def compare(
+    baseline: dict, current: dict, threshold: float, min_delta_ms: float = 0.0, normalize: bool = False
+) -> tuple[list[dict], bool]:
+    ratio = _speed_ratio(baseline, current) if normalize else 1.0
+    base_rows = {_row_key(row): row for row in baseline["results"]}
+    report = []
+    regressed = False
+    for row in current["results"]:
+        base = base_rows.get(_row_key(row))
+        if base is None:
+            continue
+        for metric, value in row["metrics"].items():
+            before = base["metrics"].get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(before, (int, float)):
+                continue
+            direction = _direction(metric)
+            if direction < 0 and "_ms" in metric:
+                value = round(value / ratio, 3)
+            elif direction > 0:
+                value = round(value * ratio, 3)
+            change = (value - before) / before if before else 0.0
+            worse = direction != 0 and -direction * change > threshold
+            if worse and "_ms" in metric and abs(value - before) < min_delta_ms:
+                worse = False
+            regressed |= worse
+            report.append(
+                {
+                    "benchmark": row["benchmark"],
+                    "params": row.get("params", {}),
+                    "metric": metric,
+                    "baseline": before,
+                    "current": value,
+                    "change": round(change, 4),
+                    "regression": worse,
+                }
+            )
+    return report, regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1, help="ignore smaller timing changes")
+    parser.add_argument("--normalize", action="store_true", help="scale by the runs' calibration timings")
+    parser.add_argument("--json", action="store_true", help="print the comparison as JSON lines")
+    args = parser.parse_args()
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    current = json.loads(args.current.read_text(encoding="utf-8"))
+    report, regressed = compare(baseline, current, args.threshold, args.min_delta_ms, args.normalize)
+    for entry in report:
+        if args.json:
+            print(json.dumps(entry))
+        else:
+            params = ",".join(f"{key}={value}" for key, value in entry["params"].items())
+            flag = "  REGRESSION" if entry["regression"] else ""
+            print(
+                f"{entry['benchmark']}[{params}] {entry['metric']}: "
+                f"{entry['baseline']} -> {entry['current']} ({entry['change']:+.1%}){flag}"
+            )
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Synthetic contracts of controlled size and clause density, assembled from the
+articles of the templates in ``sample_contracts/``.
+
+    python -m backend.benchmarks.corpus --out data/corpus --count 20 --kb 50 --density 0.3
+
+Each template is split into its top-level numbered articles. An article is
+clause-bearing when the deterministic extractor finds at least one clause in
+it on its own. A contract is the preamble of one template followed by
+articles drawn at random, a clause-bearing one with probability
+``density``, renumbered in order, until it reaches the requested size. The
+same seed always yields the same corpus.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from backend.app.pipeline import _extract_clauses
+from backend.app.segments import build_section_index
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEMPLATE_DIR = REPO_ROOT / "sample_contracts"
+
+
+@dataclass(frozen=True)
+class Article:
+    number: str
+    text: str
+    clauses: int
+
+
+@dataclass(frozen=True)
+class Templates:
+    preambles: tuple[str, ...]
+    clause_articles: tuple[Article, ...]
+    plain_articles: tuple[Article, ...]
+
+
+@lru_cache
+def load_templates(directory: Path = TEMPLATE_DIR) -> Templates:
+    preambles: list[str] = []
+    clause_articles: list[Article] = []
+    plain_articles: list[Article] = []
+    for path in sorted(directory.glob("*.txt")):
+        text = path.read_text(encoding="utf-8")
+        numbered = [s for s in build_section_index(text).sections if s.level == 1 and s.section_id.isdigit()]
+        if not numbered:
+            continue
+        preambles.append(text[: numbered[0].start])
+        for section in numbered:
+            body = text[section.start : section.end].rstrip() + "\n\n"
+            article = Article(section.section_id, body, len(_extract_clauses(body)))
+            (clause_articles if article.clauses else plain_articles).append(article)
+    return Templates(tuple(preambles), tuple(clause_articles), tuple(plain_articles))
+
+
+def _renumber(article: Article, number: int) -> str:
+    """Rewrite ``ARTICLE 5:``/``5.``/``5.3`` headings of ``article`` to ``number``."""
+    pattern = re.compile(rf"^(ARTICLE\s+)?{re.escape(article.number)}(?=[.:\s])", re.MULTILINE)
+    return pattern.sub(lambda m: f"{m.group(1) or ''}{number}", article.text)
+
+
+def generate_contract(size_bytes: int, density: float, rng: random.Random, templates: Templates | None = None) -> str:
+    """One contract of at least ``size_bytes`` UTF-8 bytes."""
+    templates = templates or load_templates()
+    if not templates.clause_articles or not templates.plain_articles:
+        raise ValueError(f"Templates in {TEMPLATE_DIR} need both clause-bearing and plain articles")
+    parts = [rng.choice(templates.preambles)]
+    size = len(parts[0].encode("utf-8"))
+    number = 0
+    while size < size_bytes:
+        number += 1
+        pool = templates.clause_articles if rng.random() < density else templates.plain_articles
+        part = _renumber(rng.choice(pool), number)
+        parts.append(part)
+        size += len(part.encode("utf-8"))
+    return "".join(parts)
+
+
+def generate_corpus(count: int, size_bytes: int, density: float, seed: int = 0) -> list[str]:
+    rng = random.Random(f"{seed}:{size_bytes}:{density}")
+    return [generate_contract(size_bytes, density, rng) for _ in range(count)]
+
+
+def describe(contracts: list[str]) -> dict:
+    total_bytes = sum(len(text.encode("utf-8")) for text in contracts)
+    clauses = sum(len(_extract_clauses(text)) for text in contracts)
+    return {
+        "contracts": len(contracts),
+        "bytes": total_bytes,
+        "clauses": clauses,
+        "clauses_per_kb": round(clauses / (total_bytes / 1024), 3) if total_bytes else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--kb", type=int, default=50)
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    contracts = generate_corpus(args.count, args.kb * 1024, args.density, args.seed)
+    args.out.mkdir(parents=True, exist_ok=True)
+    for idx, text in enumerate(contracts):
+        (args.out / f"synthetic_{idx:04d}.txt").write_text(text, encoding="utf-8")
+    print(json.dumps(describe(contracts)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Local stand-in for the Anthropic Messages API, for load tests that should not
+spend real tokens.
+
+    python -m backend.benchmarks.fake_anthropic --port 8091 --latency-ms 800 --rate-429 0.05
+
+Point the backend at it with ``ANTHROPIC_BASE_URL=http://127.0.0.1:8091`` and
+any ``ANTHROPIC_API_KEY``. ``POST /v1/messages`` sleeps for the configured
+latency (plus jitter and a per-output-token delay) and answers with a canned
+message whose ``usage`` reports roughly four characters per input token.
+System blocks up to the last one marked ``cache_control`` are accounted as
+a cached prompt prefix (written on first use, read afterwards) as long as
+they reach ``--cache-min-tokens``.
+Requests are rejected with a 429 ``rate_limit_error`` at random with
+probability ``--rate-429``, or whenever more than ``--max-concurrency`` are in
+flight. ``GET /stats`` reports what the server has seen.
+
+The Message Batches endpoints (``POST /v1/messages/batches``, polling,
+``/results`` as JSONL and ``/cancel``) answer every request of a batch the
+same way once ``--batch-latency-ms`` has passed since it was created.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+CANNED_TEXT = (
+    "The clause deviates from the playbook standard; flag it for review and "
+    "propose the playbook position as a counter."
+)
+
+
+@dataclass
+class FakeLLMConfig:
+    latency_ms: float = 500.0
+    jitter_ms: float = 100.0
+    ms_per_output_token: float = 0.0
+    output_tokens: int = 120
+    # When set, answer with this fraction of the request's max_tokens instead of output_tokens.
+    output_fraction: float = 0.0
+    rate_429: float = 0.0
+    max_concurrency: int = 0
+    retry_after_seconds: float = 1.0
+    cache_min_tokens: int = 1024
+    batch_latency_ms: float = 1000.0
+    seed: int | None = None
+
+
+@dataclass
+class FakeLLMStats:
+    requests: int = 0
+    completed: int = 0
+    rate_limited: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    batches: int = 0
+    batch_requests: int = 0
+
+
+def _text_chars(content: object) -> int:
+    if isinstance(content, str):
+        return len(content)
+    if isinstance(content, list):
+        return sum(len(block.get("text", "")) for block in content if isinstance(block, dict))
+    return 0
+
+
+def _prompt_chars(payload: dict) -> int:
+    return _text_chars(payload.get("system")) + sum(
+        _text_chars(message.get("content")) for message in payload.get("messages", [])
+    )
+
+
+def _cached_prefix(payload: dict) -> str:
+    system = payload.get("system")
+    if not isinstance(system, list):
+        return ""
+    marked = [idx for idx, block in enumerate(system) if isinstance(block, dict) and block.get("cache_control")]
+    if not marked:
+        return ""
+    return "".join(block.get("text", "") for block in system[: marked[-1] + 1] if isinstance(block, dict))
+
+
+def _rate_limited(config: FakeLLMConfig) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        headers={"retry-after": str(config.retry_after_seconds)},
+        content={"type": "error", "error": {"type": "rate_limit_error", "message": "Injected rate limit"}},
+    )
+
+
+def create_app(config: FakeLLMConfig) -> FastAPI:
+    # Imported here so that importing this module does not load the backend settings.
+    from backend.app.llm import PromptCacheSimulator
+
+    app = FastAPI(title="Fake Anthropic Messages API")
+    stats = FakeLLMStats()
+    rng = random.Random(config.seed)
+    prompt_cache = PromptCacheSimulator(config.cache_min_tokens, ttl_seconds=300.0)
+
+    batches: dict[str, dict] = {}
+
+    def output_tokens_for(payload: dict) -> int:
+        max_tokens = int(payload.get("max_tokens") or config.output_tokens)
+        if config.output_fraction > 0:
+            return max(1, int(max_tokens * config.output_fraction))
+        return min(config.output_tokens, max_tokens)
+
+    def answer(payload: dict, output_tokens: int) -> dict:
+        prefix = _cached_prefix(payload)
+        written, read = prompt_cache.account(prefix, len(prefix) // 4) if prefix else (0, 0)
+        input_tokens = max(1, _prompt_chars(payload) // 4 - written - read)
+        stats.completed += 1
+        stats.input_tokens += input_tokens
+        stats.output_tokens += output_tokens
+        stats.cache_creation_input_tokens += written
+        stats.cache_read_input_tokens += read
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": payload.get("model", "fake"),
+            "content": [{"type": "text", "text": CANNED_TEXT}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cache_creation_input_tokens": written,
+                "cache_read_input_tokens": read,
+            },
+        }
+
+    @app.post("/v1/messages")
+    async def messages(request: Request) -> JSONResponse:
+        payload = await request.json()
+        stats.requests += 1
+        if rng.random() < config.rate_429 or (config.max_concurrency and stats.in_flight >= config.max_concurrency):
+            stats.rate_limited += 1
+            return _rate_limited(config)
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        try:
+            output_tokens = output_tokens_for(payload)
+            delay_ms = (
+                config.latency_ms
+                + rng.uniform(-config.jitter_ms, config.jitter_ms)
+                + config.ms_per_output_token * output_tokens
+            )
+            await asyncio.sleep(max(delay_ms, 0.0) / 1000)
+        finally:
+            stats.in_flight -= 1
+        return JSONResponse(answer(payload, output_tokens))
+
+    def batch_view(batch: dict, request: Request) -> dict:
+        ended = batch["ended"] or time.monotonic() >= batch["ends_at"]
+        if ended and batch["results"] is None:
+            batch["results"] = [
+                {
+                    "custom_id": item["custom_id"],
+                    "result": (
+                        {"type": "canceled"}
+                        if batch["ended"]
+                        else {"type": "succeeded", "message": answer(item["params"], output_tokens_for(item["params"]))}
+                    ),
+                }
+                for item in batch["requests"]
+            ]
+        return {
+            "id": batch["id"],
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {"processing": 0 if ended else len(batch["requests"])},
+            "results_url": f"{str(request.base_url).rstrip('/')}/v1/messages/batches/{batch['id']}/results"
+            if ended
+            else None,
+        }
+
+    def not_found() -> JSONResponse:
+        return JSONResponse(
+            status_code=404, content={"type": "error", "error": {"type": "not_found_error", "message": "No such batch"}}
+        )
+
+    @app.post("/v1/messages/batches")
+    async def create_batch(request: Request) -> JSONResponse:
+        payload = await request.json()
+        batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+        batches[batch_id] = {
+            "id": batch_id,
+            "requests": payload.get("requests", []),
+            "ends_at": time.monotonic() + config.batch_latency_ms / 1000,
+            "ended": False,
+            "results": None,
+        }
+        stats.batches += 1
+        stats.batch_requests += len(batches[batch_id]["requests"])
+        return JSONResponse(batch_view(batches[batch_id], request))
+
+    @app.get("/v1/messages/batches/{batch_id}")
+    async def get_batch(batch_id: str, request: Request) -> JSONResponse:
+        batch = batches.get(batch_id)
+        return JSONResponse(batch_view(batch, request)) if batch else not_found()
+
+    @app.post("/v1/messages/batches/{batch_id}/cancel")
+    async def cancel_batch(batch_id: str, request: Request) -> JSONResponse:
+        batch = batches.get(batch_id)
+        if batch is None:
+            return not_found()
+        if batch["results"] is None:
+            batch["ended"] = True
+        return JSONResponse(batch_view(batch, request))
+
+    @app.get("/v1/messages/batches/{batch_id}/results")
+    async def batch_results(batch_id: str, request: Request) -> Response:
+        batch = batches.get(batch_id)
+        if batch is None:
+            return not_found()
+        batch_view(batch, request)
+        lines = [json.dumps(row) for row in batch["results"] or []]
+        return Response("\n".join(lines) + "\n", media_type="application/x-jsonl")
+
+    @app.get("/stats")
+    async def get_stats() -> dict:
+        return asdict(stats)
+
+    @app.get("/health")
+    async def health() -> dict[str, str]:
+        return {"status": "ok"}
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser, prefix: str = "") -> None:
+    """Fake-server options, shared with ``loadtest.py`` (which prefixes them with ``llm-``)."""
+    defaults = FakeLLMConfig()
+    parser.add_argument(f"--{prefix}latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument(f"--{prefix}jitter-ms", type=float, default=defaults.jitter_ms)
+    parser.add_argument(f"--{prefix}ms-per-output-token", type=float, default=defaults.ms_per_output_token)
+    parser.add_argument(f"--{prefix}output-tokens", type=int, default=defaults.output_tokens)
+    parser.add_argument(f"--{prefix}output-fraction", type=float, default=defaults.output_fraction)
+    parser.add_argument(f"--{prefix}rate-429", type=float, default=defaults.rate_429)
+    parser.add_argument(f"--{prefix}max-concurrency", type=int, default=defaults.max_concurrency)
+    parser.add_argument(f"--{prefix}retry-after-seconds", type=float, default=defaults.retry_after_seconds)
+    parser.add_argument(f"--{prefix}cache-min-tokens", type=int, default=defaults.cache_min_tokens)
+    parser.add_argument(f"--{prefix}batch-latency-ms", type=float, default=defaults.batch_latency_ms)
+
+
+def config_from_args(args: argparse.Namespace, prefix: str = "") -> FakeLLMConfig:
+    attr = prefix.replace("-", "_")
+    return FakeLLMConfig(
+        latency_ms=getattr(args, f"{attr}latency_ms"),
+        jitter_ms=getattr(args, f"{attr}jitter_ms"),
+        ms_per_output_token=getattr(args, f"{attr}ms_per_output_token"),
+        output_tokens=getattr(args, f"{attr}output_tokens"),
+        output_fraction=getattr(args, f"{attr}output_fraction"),
+        rate_429=getattr(args, f"{attr}rate_429"),
+        max_concurrency=getattr(args, f"{attr}max_concurrency"),
+        retry_after_seconds=getattr(args, f"{attr}retry_after_seconds"),
+        cache_min_tokens=getattr(args, f"{attr}cache_min_tokens"),
+        batch_latency_ms=getattr(args, f"{attr}batch_latency_ms"),
+        seed=getattr(args, "seed", None),
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--seed", type=int, default=None)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
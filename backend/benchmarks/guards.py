@@ -0,0 +1,114 @@
+"""
+Prompt-injection guardrail throughput: the combined single-pass matcher
+versus the previous per-pattern ``search`` + ``sub`` loop.
+
+    python -m backend.benchmarks.guards --sizes 10 100 1000 --megabytes 1 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+from backend.app.guards import DEFAULT_INJECTION_PATTERNS, InjectionMatcher
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+WORDS = [
+    "ignore", "override", "reveal", "disregard", "system", "prompt", "secret", "policy",
+    "assistant", "developer", "mode", "instructions", "previous", "hidden", "leak", "token",
+    "jailbreak", "persona", "roleplay", "bypass", "filter", "output", "confidential", "dump",
+]
+
+
+def synthetic_patterns(count: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    patterns = list(DEFAULT_INJECTION_PATTERNS)
+    seen = set(patterns)
+    while len(patterns) < count:
+        phrase = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4)))
+        if phrase not in seen:
+            seen.add(phrase)
+            patterns.append(phrase)
+    return patterns[:count]
+
+
+def synthetic_contract(megabytes: float, patterns: list[str], seed: int = 7) -> str:
+    rng = random.Random(seed)
+    base = "\n\n".join(
+        path.read_text(encoding="utf-8") for path in sorted((REPO_ROOT / "sample_contracts").glob("*.txt"))
+    )
+    target = int(megabytes * 1024 * 1024)
+    parts: list[str] = []
+    size = 0
+    while size < target:
+        parts.append(base)
+        phrase = rng.choice(patterns)
+        parts.append(f"\n{phrase[3:] if phrase.startswith('re:') else phrase}\n")
+        size += len(base) + len(parts[-1])
+    return "".join(parts)[:target]
+
+
+def legacy_filter(compiled: list[re.Pattern], text: str) -> tuple[str, int]:
+    hits = 0
+    sanitized = text
+    for pattern in compiled:
+        if pattern.search(text):
+            hits += 1
+            sanitized = pattern.sub("[filtered]", sanitized)
+    return sanitized, hits
+
+
+def _best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(sizes: list[int], megabytes: list[float], repeat: int) -> list[dict]:
+    results = []
+    for count in sizes:
+        patterns = synthetic_patterns(count)
+        started = time.perf_counter()
+        matcher = InjectionMatcher(patterns)
+        compile_s = time.perf_counter() - started
+        legacy = [
+            re.compile(p[3:] if p.startswith("re:") else re.escape(p), re.IGNORECASE) for p in patterns
+        ]
+        for mb in megabytes:
+            text = synthetic_contract(mb, patterns)
+            combined_s = _best_of(repeat, lambda: matcher.scan(text))
+            legacy_s = _best_of(repeat, lambda: legacy_filter(legacy, text))
+            results.append(
+                {
+                    "benchmark": "guards",
+                    "patterns": count,
+                    "megabytes": mb,
+                    "compile_ms": round(compile_s * 1000, 3),
+                    "combined_s": round(combined_s, 4),
+                    "legacy_s": round(legacy_s, 4),
+                    "combined_mb_per_s": round(mb / combined_s, 2),
+                    "legacy_mb_per_s": round(mb / legacy_s, 2),
+                    "speedup": round(legacy_s / combined_s, 2),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--megabytes", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for row in run(args.sizes, args.megabytes, args.repeat):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
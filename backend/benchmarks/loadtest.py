@@ -0,0 +1,287 @@
+"""
+Open-loop load test of ``POST /analyze`` plus ``GET /analysis/{id}/stream``
+against a local fake of the Anthropic Messages API (``fake_anthropic.py``).
+
+    python -m backend.benchmarks.loadtest --rate 2 --duration 60 --llm-latency-ms 800 --llm-rate-429 0.02
+
+Analyses arrive as a Poisson process at ``--rate`` per second for
+``--duration`` seconds. Each one posts a synthetic contract (see
+``corpus.py``), follows its event stream until the ``final`` or ``error``
+event, and records end-to-end latency and time to the first
+``partial_finding``. The report is one JSON document with throughput,
+p50/p95/p99 latencies, error counts by kind and what the fake LLM saw.
+
+By default the fake LLM and a backend wired to it (temporary SQLite
+database, background analysis, rate limits lifted) are started as
+subprocesses. ``--target`` drives an already running backend instead, e.g.
+a container started with ``ANTHROPIC_BASE_URL`` pointing at the fake
+server, which is still started on ``--llm-port`` unless ``--no-fake-llm``
+is given. ``--embedder hashing`` makes the spawned backend use the hashing
+embedder from ``retrieval.py`` so no embedding model is downloaded.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+from backend.benchmarks import fake_anthropic
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+@dataclass
+class Outcome:
+    latency_ms: float | None = None
+    first_finding_ms: float | None = None
+    findings: int = 0
+    error: str | None = None
+
+
+@dataclass
+class LoadReport:
+    started: int = 0
+    outcomes: list[Outcome] = field(default_factory=list)
+
+
+def _percentiles(samples: list[float]) -> dict[str, float | None]:
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None}
+    ordered = sorted(samples)
+
+    def pick(pct: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 1)
+
+    return {"p50": round(statistics.median(ordered), 1), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+async def _read_stream(client: httpx.AsyncClient, analysis_id: str, started: float, outcome: Outcome) -> None:
+    event = "message"
+    async with client.stream("GET", f"/analysis/{analysis_id}/stream") as response:
+        if response.status_code != 200:
+            outcome.error = f"stream_http_{response.status_code}"
+            return
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:") :].strip()
+            elif line.startswith("data:"):
+                if event == "partial_finding":
+                    outcome.findings += 1
+                    if outcome.first_finding_ms is None:
+                        outcome.first_finding_ms = (time.perf_counter() - started) * 1000
+                elif event == "final":
+                    outcome.latency_ms = (time.perf_counter() - started) * 1000
+                    return
+                elif event == "error":
+                    outcome.error = "analysis_error"
+                    return
+            elif not line:
+                event = "message"
+    outcome.error = "stream_closed"
+
+
+async def _one_analysis(client: httpx.AsyncClient, contract: str, analysis_type: str, timeout: float) -> Outcome:
+    outcome = Outcome()
+    started = time.perf_counter()
+    try:
+        response = await client.post("/analyze", json={"contract_text": contract, "analysis_type": analysis_type})
+        if response.status_code != 200:
+            outcome.error = f"analyze_http_{response.status_code}"
+            return outcome
+        body = response.json()
+        await asyncio.wait_for(_read_stream(client, body["analysis_id"], started, outcome), timeout)
+    except asyncio.TimeoutError:
+        outcome.error = "timeout"
+    except httpx.HTTPError as exc:
+        outcome.error = type(exc).__name__
+    return outcome
+
+
+async def drive(
+    target: str,
+    contracts: list[str],
+    rate: float,
+    duration: float,
+    analysis_type: str,
+    timeout: float,
+    seed: int,
+) -> tuple[LoadReport, float]:
+    rng = random.Random(seed)
+    report = LoadReport()
+    tasks: list[asyncio.Task] = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    async with httpx.AsyncClient(base_url=target, timeout=None, limits=limits) as client:
+        started = time.perf_counter()
+        next_arrival = started
+        while next_arrival - started < duration:
+            await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+            contract = contracts[report.started % len(contracts)]
+            tasks.append(asyncio.create_task(_one_analysis(client, contract, analysis_type, timeout)))
+            report.started += 1
+            next_arrival += rng.expovariate(rate)
+        report.outcomes = list(await asyncio.gather(*tasks))
+        elapsed = time.perf_counter() - started
+    return report, elapsed
+
+
+def summarize(report: LoadReport, elapsed: float, rate: float, duration: float) -> dict:
+    completed = [o for o in report.outcomes if o.error is None and o.latency_ms is not None]
+    errors: dict[str, int] = {}
+    for outcome in report.outcomes:
+        if outcome.error:
+            errors[outcome.error] = errors.get(outcome.error, 0) + 1
+    total = len(report.outcomes) or 1
+    return {
+        "offered_rate_per_s": rate,
+        "duration_s": duration,
+        "elapsed_s": round(elapsed, 3),
+        "started": report.started,
+        "completed": len(completed),
+        "throughput_per_s": round(len(completed) / elapsed, 3) if elapsed else 0.0,
+        "latency_ms": _percentiles([o.latency_ms for o in completed]),
+        "time_to_first_finding_ms": _percentiles(
+            [o.first_finding_ms for o in completed if o.first_finding_ms is not None]
+        ),
+        "without_findings": sum(1 for o in completed if o.first_finding_ms is None),
+        "error_rate": round(sum(errors.values()) / total, 4),
+        "errors": errors,
+    }
+
+
+def _spawn(args: list[str], env: dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", *args], cwd=REPO_ROOT, env={**os.environ, **env})
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with status {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s")
+
+
+def _backend_env(workdir: str, llm_port: int) -> dict[str, str]:
+    return {
+        "ANTHROPIC_API_KEY": "fake-key",
+        "ANTHROPIC_BASE_URL": f"http://127.0.0.1:{llm_port}",
+        "DATABASE_URL": f"sqlite+aiosqlite:///{workdir}/loadtest.db",
+        "INLINE_ANALYSIS": "false",
+        "BYPASS_DB_FOR_TESTS": "false",
+        "RATE_LIMIT_PER_MINUTE": "1000000",
+        "RATE_LIMIT_STREAM_PER_MINUTE": "1000000",
+        "VECTOR_BACKEND": "numpy",
+        "VECTOR_INDEX_DIR": f"{workdir}/vectors",
+        "CHROMA_DIR": f"{workdir}/chroma",
+        "PROFILE_DIR": f"{workdir}/profiles",
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    from backend.benchmarks.corpus import generate_corpus
+
+    processes: list[subprocess.Popen] = []
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            llm_stats_url = None
+            if not args.no_fake_llm:
+                llm_args = [f"--{name}={value}" for name, value in _llm_cli_args(args).items()]
+                processes.append(
+                    _spawn(["backend.benchmarks.fake_anthropic", "--port", str(args.llm_port), *llm_args], {})
+                )
+                _wait_ready(f"http://127.0.0.1:{args.llm_port}/health", processes[-1])
+                llm_stats_url = f"http://127.0.0.1:{args.llm_port}/stats"
+            target = args.target
+            if not target:
+                processes.append(
+                    _spawn(
+                        ["backend.benchmarks.serve", "--port", str(args.port), "--embedder", args.embedder],
+                        _backend_env(workdir, args.llm_port),
+                    )
+                )
+                target = f"http://127.0.0.1:{args.port}"
+                _wait_ready(f"{target}/ready", processes[-1])
+            contracts = generate_corpus(args.contracts, args.kb * 1024, args.density, args.seed)
+            report, elapsed = asyncio.run(
+                drive(target, contracts, args.rate, args.duration, args.analysis_type, args.timeout, args.seed)
+            )
+            summary = summarize(report, elapsed, args.rate, args.duration)
+            if llm_stats_url:
+                summary["fake_llm"] = httpx.get(llm_stats_url, timeout=5.0).json()
+            summary["params"] = {
+                "target": args.target or "spawned",
+                "kb": args.kb,
+                "density": args.density,
+                "analysis_type": args.analysis_type,
+                "llm": None if args.no_fake_llm else _llm_cli_args(args),
+            }
+            return summary
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+def _llm_cli_args(args: argparse.Namespace) -> dict:
+    config = fake_anthropic.config_from_args(args, prefix="llm_")
+    return {
+        "latency-ms": config.latency_ms,
+        "jitter-ms": config.jitter_ms,
+        "ms-per-output-token": config.ms_per_output_token,
+        "output-tokens": config.output_tokens,
+        "output-fraction": config.output_fraction,
+        "rate-429": config.rate_429,
+        "max-concurrency": config.max_concurrency,
+        "retry-after-seconds": config.retry_after_seconds,
+        "cache-min-tokens": config.cache_min_tokens,
+        "batch-latency-ms": config.batch_latency_ms,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="base URL of a running backend; spawn one when omitted")
+    parser.add_argument("--port", type=int, default=8085, help="port for the spawned backend")
+    parser.add_argument("--embedder", choices=["default", "hashing"], default="default")
+    parser.add_argument("--rate", type=float, default=1.0, help="analyses started per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals")
+    parser.add_argument("--timeout", type=float, default=300.0, help="per-analysis timeout in seconds")
+    parser.add_argument("--contracts", type=int, default=20, help="distinct synthetic contracts to cycle through")
+    parser.add_argument("--kb", type=int, default=30)
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--analysis-type", default="risks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-port", type=int, default=8091)
+    parser.add_argument("--no-fake-llm", action="store_true")
+    parser.add_argument("--output", type=Path, help="write the report here instead of stdout")
+    fake_anthropic.add_arguments(parser, prefix="llm-")
+    args = parser.parse_args()
+    document = json.dumps(run(args), indent=2)
+    if args.output:
+        args.output.write_text(document + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(document + "\n")
+
+
+if __name__ == "__main__":
+    main()
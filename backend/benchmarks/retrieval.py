@@ -0,0 +1,89 @@
+"""
+Retrieval quality and latency per mode (vector, lexical, hybrid) over the
+playbook, scored against the labeled relevance set in
+``retrieval_relevance.json``.
+
+    python -m backend.benchmarks.retrieval --k 1 3 5
+
+Each entry pairs a contract-style clause with marker strings; a retrieved
+chunk is relevant when it contains one of them. ``--embedder hashing`` uses a
+character-trigram hashing embedder instead of Chroma's MiniLM model, for
+machines that cannot download the model; its vector numbers are only a
+rough stand-in.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.app.lexical import LexicalIndexStore
+from backend.app.rag import HybridRetriever, NumpyVectorIndex, RETRIEVAL_MODES, chunk_playbook
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+RELEVANCE_PATH = Path(__file__).with_name("retrieval_relevance.json")
+
+
+def hashing_embedder(texts: list[str], dim: int = 384) -> list[np.ndarray]:
+    vectors = []
+    for text in texts:
+        vector = np.zeros(dim, dtype=np.float32)
+        padded = f"  {text.lower()}  "
+        for idx in range(len(padded) - 2):
+            bucket = int.from_bytes(hashlib.blake2b(padded[idx : idx + 3].encode(), digest_size=4).digest(), "little")
+            vector[bucket % dim] += 1.0
+        vectors.append(vector)
+    return vectors
+
+
+def run(ks: list[int], embedder: str, repeat: int) -> list[dict]:
+    labels = json.loads(RELEVANCE_PATH.read_text(encoding="utf-8"))
+    chunks = chunk_playbook((REPO_ROOT / "standard_terms_playbook.md").read_text(encoding="utf-8"))
+    chunk_ids = [f"bench-{idx}" for idx in range(len(chunks))]
+    relevant = [
+        {cid for cid, text in zip(chunk_ids, chunks) if any(marker in text for marker in label["relevant"])}
+        for label in labels
+    ]
+    queries = [label["query"] for label in labels]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        embed_fn = hashing_embedder if embedder == "hashing" else None
+        retriever = HybridRetriever(
+            NumpyVectorIndex(index_dir=workdir, embed_fn=embed_fn), LexicalIndexStore(workdir), mode="hybrid"
+        )
+        retriever.reset_version("bench", zip(chunk_ids, chunks))
+        for mode in RETRIEVAL_MODES:
+            row: dict = {"benchmark": "retrieval", "mode": mode, "embedder": embedder, "queries": len(queries)}
+            for k in ks:
+                rows = retriever.query_many("bench", queries, k=k, mode=mode)
+                hits = sum(bool(relevant[i] & {c.chunk_id for c in retrieved}) for i, retrieved in enumerate(rows))
+                row[f"recall@{k}"] = round(hits / len(queries), 3)
+            samples = []
+            for _ in range(repeat):
+                for query in queries:
+                    started = time.perf_counter()
+                    retriever.query_many("bench", [query], k=max(ks), mode=mode)
+                    samples.append((time.perf_counter() - started) * 1000)
+            row["p50_ms"] = round(statistics.median(samples), 3)
+            results.append(row)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--embedder", choices=["default", "hashing"], default="default")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for row in run(args.k, args.embedder, args.repeat):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Per-clause versus batched LLM review (``LLM_REVIEW_MODE``) side by side: LLM
+requests, tokens, estimated cost and latency per contract, against the fake
+Messages API from ``fake_anthropic.py``.
+
+    python -m backend.benchmarks.review --contracts 5 --kb 50 --llm-latency-ms 600 --llm-ms-per-output-token 5
+
+Synthetic ``risks`` analyses (see ``corpus.py``) run in-process through
+``run_analysis_pipeline`` without a database, retrieving from the bundled
+playbook indexed once with the hashing embedder. The fake server answers
+with a share of each request's ``max_tokens`` (``--llm-output-fraction``) so
+output volume follows what each mode asks for. Pass ``--prompt-cache`` to
+send the playbook as a cached prefix in both modes.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from backend.benchmarks import fake_anthropic
+from backend.benchmarks.loadtest import _llm_cli_args, _spawn, _wait_ready
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+MODES = ("per_clause", "batched")
+
+
+def _configure_env(workdir: str, llm_port: int, prompt_cache: bool) -> None:
+    """Settings are read at import time, so this runs before ``backend.app`` is imported."""
+    os.environ.update(
+        {
+            "ANTHROPIC_API_KEY": "fake-key",
+            "ANTHROPIC_BASE_URL": f"http://127.0.0.1:{llm_port}",
+            "BYPASS_DB_FOR_TESTS": "true",
+            "VECTOR_BACKEND": "numpy",
+            "VECTOR_INDEX_DIR": f"{workdir}/vectors",
+            "PROMPT_CACHE": "true" if prompt_cache else "false",
+        }
+    )
+
+
+async def _run_mode(mode: str, contracts: list[str], stats_url: str) -> dict:
+    from backend.app import pipeline
+    from backend.app.models import Analysis
+
+    pipeline.settings.llm_review_mode = mode
+    latencies: list[float] = []
+    usages = []
+    requests_before = httpx.get(stats_url, timeout=5.0).json()["requests"]
+    for idx, text in enumerate(contracts):
+        analysis = Analysis(
+            id=f"{mode}-{idx}", analysis_type="risks", contract_text=text, playbook_version_id="bench"
+        )
+        started = time.perf_counter()
+        result = await pipeline.run_analysis_pipeline(None, analysis)
+        latencies.append((time.perf_counter() - started) * 1000)
+        usages.append(result.usage)
+    requests = httpx.get(stats_url, timeout=5.0).json()["requests"] - requests_before
+    count = len(contracts)
+    return {
+        "llm_requests": round(requests / count, 2),
+        "input_tokens": round(sum(u.input_tokens for u in usages) / count, 1),
+        "cache_read_input_tokens": round(sum(u.cache_read_input_tokens for u in usages) / count, 1),
+        "output_tokens": round(sum(u.output_tokens for u in usages) / count, 1),
+        "cost_usd": round(sum(u.estimated_cost_usd for u in usages) / count, 6),
+        "latency_p50_ms": round(statistics.median(latencies), 1),
+        "latency_max_ms": round(max(latencies), 1),
+    }
+
+
+def run(args: argparse.Namespace) -> list[dict]:
+    with tempfile.TemporaryDirectory() as workdir:
+        llm_args = [f"--{name}={value}" for name, value in _llm_cli_args(args).items()]
+        server = _spawn(["backend.benchmarks.fake_anthropic", "--port", str(args.llm_port), *llm_args], {})
+        try:
+            _wait_ready(f"http://127.0.0.1:{args.llm_port}/health", server)
+            _configure_env(workdir, args.llm_port, args.prompt_cache)
+            from backend.app.lexical import LexicalIndexStore
+            from backend.app.playbook import playbook_cache
+            from backend.app.rag import HybridRetriever, NumpyVectorIndex, chunk_playbook
+            from backend.benchmarks.corpus import generate_corpus
+            from backend.benchmarks.retrieval import hashing_embedder
+
+            logging.getLogger("httpx").setLevel(logging.WARNING)
+            index_dir = Path(workdir) / "vectors"
+            playbook_cache._rag = HybridRetriever(
+                NumpyVectorIndex(index_dir=index_dir, embed_fn=hashing_embedder),
+                LexicalIndexStore(index_dir),
+                mode="hybrid",
+            )
+            chunks = chunk_playbook((REPO_ROOT / "standard_terms_playbook.md").read_text(encoding="utf-8"))
+            playbook_cache.rag.reset_version("bench", [(f"bench-{idx}", text) for idx, text in enumerate(chunks)])
+
+            contracts = generate_corpus(args.contracts, args.kb * 1024, args.density, args.seed)
+            stats_url = f"http://127.0.0.1:{args.llm_port}/stats"
+            params = {
+                "contracts": args.contracts,
+                "kb": args.kb,
+                "density": args.density,
+                "prompt_cache": args.prompt_cache,
+                "llm": _llm_cli_args(args),
+            }
+            metrics = {mode: asyncio.run(_run_mode(mode, contracts, stats_url)) for mode in MODES}
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+    rows = [{"benchmark": "llm_review", "params": {**params, "mode": mode}, "metrics": metrics[mode]} for mode in MODES]
+    per_clause, batched = metrics["per_clause"], metrics["batched"]
+    rows.append(
+        {
+            "benchmark": "llm_review_ratio",
+            "params": params,
+            "metrics": {
+                key: round(batched[key] / per_clause[key], 3) if per_clause[key] else None
+                for key in ("llm_requests", "input_tokens", "output_tokens", "cost_usd", "latency_p50_ms")
+            },
+        }
+    )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contracts", type=int, default=5)
+    parser.add_argument("--kb", type=int, default=50)
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--prompt-cache", action="store_true")
+    parser.add_argument("--llm-port", type=int, default=8092)
+    fake_anthropic.add_arguments(parser, prefix="llm-")
+    parser.set_defaults(llm_latency_ms=300.0, llm_jitter_ms=0.0, llm_output_fraction=0.5)
+    args = parser.parse_args()
+    for row in run(args):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
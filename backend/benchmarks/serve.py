@@ -0,0 +1,48 @@
+"""
+Run the backend for benchmarks that drive it over HTTP (``loadtest.py``,
+``coldstart.py``).
+
+    python -m backend.benchmarks.serve --port 8085 --embedder hashing
+
+``--embedder hashing`` swaps in the hashing embedder from ``retrieval.py``
+so no embedding model is downloaded; configure everything else through the
+usual environment variables.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+
+
+def serve(port: int, embedder: str) -> None:
+    import uvicorn
+
+    from backend.app.main import app
+
+    if embedder == "hashing":
+        from backend.app.config import get_settings
+        from backend.app.lexical import LexicalIndexStore
+        from backend.app.playbook import playbook_cache
+        from backend.app.rag import HybridRetriever, NumpyVectorIndex, retrieval_cache
+        from backend.benchmarks.retrieval import hashing_embedder
+
+        index_dir = get_settings().vector_index_dir
+        playbook_cache._rag = HybridRetriever(
+            NumpyVectorIndex(index_dir=index_dir, embed_fn=hashing_embedder),
+            LexicalIndexStore(index_dir),
+            cache=retrieval_cache,
+        )
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--embedder", choices=["default", "hashing"], default="default")
+    args = parser.parse_args()
+    serve(args.port, args.embedder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Reproducible benchmark suite over a synthetic corpus (see ``corpus.py``):
+clause extraction throughput, retrieval latency per mode, and end-to-end
+``/analyze`` throughput and memory with the LLM stubbed out.
+
+    python -m backend.benchmarks.suite --output bench.json
+    python -m backend.benchmarks.compare baseline.json bench.json
+
+The app runs in-process against a throwaway SQLite database with inline
+analysis and no ``ANTHROPIC_API_KEY``, so every LLM call takes the
+heuristic path. Retrieval uses the NumPy index with the hashing embedder
+from ``retrieval.py``; the embedding model is never loaded. Results are one
+JSON document with the git commit and machine description, and one row per
+benchmark of ``params`` and ``metrics`` that ``compare.py`` matches across
+runs.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _configure_env(workdir: str) -> None:
+    """Settings are read at import time, so this runs before ``backend.app`` is imported."""
+    os.environ.pop("ANTHROPIC_API_KEY", None)
+    os.environ.update(
+        {
+            "DATABASE_URL": f"sqlite+aiosqlite:///{workdir}/bench.db",
+            "INLINE_ANALYSIS": "true",
+            "BYPASS_DB_FOR_TESTS": "false",
+            "RATE_LIMIT_PER_MINUTE": "1000000",
+            "VECTOR_BACKEND": "numpy",
+            "VECTOR_INDEX_DIR": f"{workdir}/vectors",
+            "PROFILE_DIR": f"{workdir}/profiles",
+            "PLAYBOOK_SEED_PATH": str(REPO_ROOT / "standard_terms_playbook.md"),
+        }
+    )
+
+
+def _rss_mb() -> float:
+    from backend.benchmarks.vectors import _rss_mb as rss
+
+    return round(rss(), 1)
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 3)
+
+
+def _git_commit() -> dict:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, timeout=30, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--", "backend"))}
+
+
+def _calibration_ms() -> float:
+    """Best-of-five time of a fixed pure-Python workload, for ``compare.py --normalize``."""
+    samples = []
+    for _ in range(5):
+        started = time.perf_counter()
+        total = 0
+        for idx in range(300_000):
+            total += idx * idx % 7
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(min(samples), 3)
+
+
+def bench_extraction(sizes_kb: list[int], density: float, seed: int, repeat: int) -> list[dict]:
+    from backend.app.pipeline import _extract_clauses
+    from backend.benchmarks.corpus import generate_corpus
+
+    rows = []
+    for kb in sizes_kb:
+        contracts = generate_corpus(3, kb * 1024, density, seed)
+        total_bytes = sum(len(text.encode("utf-8")) for text in contracts)
+        samples = []
+        clauses = sum(len(_extract_clauses(text)) for text in contracts)  # warm-up
+        for _ in range(repeat):
+            started = time.perf_counter()
+            clauses = sum(len(_extract_clauses(text)) for text in contracts)
+            samples.append(time.perf_counter() - started)
+        best = min(samples)
+        rows.append(
+            {
+                "benchmark": "extraction",
+                "params": {"kb": kb, "density": density, "contracts": len(contracts)},
+                "metrics": {
+                    "mb_per_s": round(total_bytes / best / 1e6, 3),
+                    "best_ms": round(best * 1000, 3),
+                    "clauses": clauses,
+                },
+            }
+        )
+    return rows
+
+
+def bench_retrieval(density: float, seed: int, queries: int, k: int, workdir: str) -> list[dict]:
+    from backend.app.lexical import LexicalIndexStore
+    from backend.app.pipeline import _extract_clauses
+    from backend.app.rag import HybridRetriever, NumpyVectorIndex, RETRIEVAL_MODES, chunk_playbook
+    from backend.benchmarks.corpus import generate_corpus
+    from backend.benchmarks.retrieval import hashing_embedder
+
+    clauses = [clause["source_text"] for text in generate_corpus(5, 50 * 1024, density, seed) for clause in _extract_clauses(text)]
+    texts = (clauses * (queries // max(len(clauses), 1) + 1))[:queries]
+    chunks = chunk_playbook((REPO_ROOT / "standard_terms_playbook.md").read_text(encoding="utf-8"))
+    index_dir = Path(workdir) / "retrieval"
+    retriever = HybridRetriever(
+        NumpyVectorIndex(index_dir=index_dir, embed_fn=hashing_embedder), LexicalIndexStore(index_dir), mode="hybrid"
+    )
+    retriever.reset_version("bench", [(f"bench-{idx}", text) for idx, text in enumerate(chunks)])
+    rows = []
+    for mode in RETRIEVAL_MODES:
+        samples = []
+        for text in texts:
+            started = time.perf_counter()
+            retriever.query_many("bench", [text], k=k, mode=mode)
+            samples.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        retriever.query_many("bench", texts, k=k, mode=mode)
+        batch_ms = (time.perf_counter() - started) * 1000
+        rows.append(
+            {
+                "benchmark": "retrieval",
+                "params": {"mode": mode, "k": k, "queries": len(texts), "chunks": len(chunks)},
+                "metrics": {
+                    "p50_ms": round(statistics.median(samples), 3),
+                    "p95_ms": _percentile(samples, 0.95),
+                    "batch_ms_per_query": round(batch_ms / len(texts), 3),
+                },
+            }
+        )
+    return rows
+
+
+async def _bench_analyze(contracts: list[str], concurrency: int, mode: str, workdir: str) -> dict:
+    import httpx
+
+    from backend.app.lexical import LexicalIndexStore
+    from backend.app.main import app, shutdown_event, startup_event
+    from backend.app.playbook import playbook_cache
+    from backend.app.rag import HybridRetriever, NumpyVectorIndex, retrieval_cache
+    from backend.benchmarks.retrieval import hashing_embedder
+
+    index_dir = Path(workdir) / "vectors"
+    playbook_cache._rag = HybridRetriever(
+        NumpyVectorIndex(index_dir=index_dir, embed_fn=hashing_embedder),
+        LexicalIndexStore(index_dir),
+        mode=mode,
+        cache=retrieval_cache,
+    )
+    retrieval_cache.clear()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    await startup_event()
+    latencies: list[float] = []
+    failures = 0
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for text in contracts:
+        queue.put_nowait(text)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal failures
+        while not queue.empty():
+            text = queue.get_nowait()
+            started = time.perf_counter()
+            response = await client.post("/analyze", json={"contract_text": text, "analysis_type": "risks"})
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200 or response.json().get("status") != "completed":
+                failures += 1
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            await client.post("/analyze", json={"contract_text": contracts[0], "analysis_type": "risks"})  # warm-up
+            retrieval_cache.clear()
+            gc.collect()
+            rss_before = _rss_mb()
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+    finally:
+        await shutdown_event()
+    total_bytes = sum(len(text.encode("utf-8")) for text in contracts)
+    return {
+        "analyses_per_s": round(len(contracts) / elapsed, 3),
+        "mb_per_s": round(total_bytes / elapsed / 1e6, 4),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": _percentile(latencies, 0.95),
+        "failures": failures,
+        "rss_growth_mb": round(_rss_mb() - rss_before, 1),
+        "peak_rss_mb": _peak_rss_mb(),
+        "retrieval_cache_hit_rate": retrieval_cache.stats()["hit_rate"],
+    }
+
+
+def bench_analyze(count: int, kb: int, density: float, seed: int, concurrency: int, mode: str, workdir: str) -> dict:
+    from backend.benchmarks.corpus import generate_corpus
+
+    contracts = generate_corpus(count, kb * 1024, density, seed)
+    metrics = asyncio.run(_bench_analyze(contracts, concurrency, mode, workdir))
+    return {
+        "benchmark": "analyze",
+        "params": {
+            "contracts": count,
+            "kb": kb,
+            "density": density,
+            "concurrency": concurrency,
+            "retrieval_mode": mode,
+        },
+        "metrics": metrics,
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_env(workdir)
+        results = []
+        if "extraction" in args.only:
+            results += bench_extraction(args.sizes_kb, args.density, args.seed, args.repeat)
+        if "retrieval" in args.only:
+            results += bench_retrieval(args.density, args.seed, args.queries, args.k, workdir)
+        if "analyze" in args.only:
+            results.append(
+                bench_analyze(
+                    args.contracts, args.kb, args.density, args.seed, args.concurrency, args.retrieval_mode, workdir
+                )
+            )
+    return {
+        "meta": {
+            **_git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "calibration_ms": _calibration_ms(),
+            "args": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=["extraction", "retrieval", "analyze"], default=["extraction", "retrieval", "analyze"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--contracts", type=int, default=20)
+    parser.add_argument("--kb", type=int, default=50, help="size of each /analyze contract")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--retrieval-mode", choices=["vector", "lexical", "hybrid"], default="vector")
+    parser.add_argument("--output", type=Path, help="write results here instead of stdout")
+    args = parser.parse_args()
+    document = json.dumps(run(args), indent=2)
+    if args.output:
+        args.output.write_text(document + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(document + "\n")
+
+
+if __name__ == "__main__":
+    main()
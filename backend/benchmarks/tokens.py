@@ -0,0 +1,100 @@
+"""
+Token counting throughput: the local tokenizer uncached and cached versus the
+four-characters-per-token estimate it replaces, on prompts shaped like the
+risk-validation prompts the pipeline sends.
+
+    python -m backend.benchmarks.tokens --prompts 2000 --repeat 3
+
+Also reports how far the estimate is from the tokenizer's count.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+
+from backend.app.tokens import TokenCounter
+from backend.benchmarks.corpus import load_templates
+
+
+def synthetic_prompts(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    templates = load_templates()
+    articles = [article.text for article in templates.clause_articles + templates.plain_articles]
+    prompts = []
+    for idx in range(count):
+        article = rng.choice(articles)
+        start = rng.randrange(max(len(article) - 400, 1))
+        prompts.append(
+            f"Clause #{idx}: {article[start : start + 400]}\n"
+            f"Playbook reference: {rng.choice(articles)[:300]}\n"
+            "Explain the deviation and the risk in two sentences."
+        )
+    return prompts
+
+
+def _best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(count: int, repeat: int, tokenizer_path: str | None) -> list[dict]:
+    prompts = synthetic_prompts(count)
+    megabytes = sum(len(p.encode("utf-8")) for p in prompts) / (1024 * 1024)
+
+    counter = TokenCounter(tokenizer_path, cache_size=count)
+    started = time.perf_counter()
+    counter.load()
+    load_s = time.perf_counter() - started
+    if counter.source != "tokenizer":
+        raise SystemExit("no tokenizer available; set --tokenizer-path")
+
+    def uncached() -> None:
+        counter._cache.clear()
+        for prompt in prompts:
+            counter.count(prompt)
+
+    counted = counter.count_many(prompts)
+    rows = {
+        "tokenizer_uncached": _best_of(repeat, uncached),
+        "tokenizer_batch_uncached": _best_of(
+            repeat, lambda: (counter._cache.clear(), counter.count_many(prompts))
+        ),
+        "tokenizer_cached": _best_of(repeat, lambda: [counter.count(p) for p in prompts]),
+        "heuristic": _best_of(repeat, lambda: [len(p) // 4 for p in prompts]),
+    }
+    counter.count_many(prompts)
+    estimated = [len(p) // 4 for p in prompts]
+    error = sum(abs(e - c) / c for e, c in zip(estimated, counted) if c) / len(prompts)
+    return [
+        {
+            "benchmark": "token_count",
+            "method": method,
+            "prompts": count,
+            "load_ms": round(load_s * 1000, 1),
+            "counts_per_s": round(count / seconds, 1),
+            "mb_per_s": round(megabytes / seconds, 2),
+            "us_per_count": round(seconds / count * 1e6, 2),
+            "heuristic_mean_abs_error": round(error, 4),
+        }
+        for method, seconds in rows.items()
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tokenizer-path", help="tokenizer.json to load; defaults to the anthropic SDK's")
+    args = parser.parse_args()
+    for row in run(args.prompts, args.repeat, args.tokenizer_path):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Retrieval backend latency and memory: ``NumpyVectorIndex`` versus a Chroma
+collection holding the same synthetic, normalized embeddings.
+
+    python -m backend.benchmarks.vectors --chunks 100 10000 1000000 --chroma-max 100000
+
+Embeddings are random unit vectors, so the embedding model is never loaded
+and only index build, top-k search and resident memory are measured. Chroma
+is skipped above ``--chroma-max`` chunks because building its HNSW index at
+that scale takes far longer than the benchmark itself.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from backend.app.rag import NumpyVectorIndex
+
+DIM = 384  # all-MiniLM-L6-v2, Chroma's default embedding model
+CHROMA_BATCH = 5000
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as handle:
+            pages = int(handle.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _unit_vectors(count: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, DIM), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def _latencies(fn, queries: np.ndarray, batch: int, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        for start in range(0, len(queries), batch):
+            started = time.perf_counter()
+            fn(queries[start : start + batch])
+            samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        f"batch{batch}_p50_ms": round(statistics.median(samples), 3),
+        f"batch{batch}_p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+    }
+
+
+def bench_numpy(count: int, queries: np.ndarray, k: int, repeat: int, workdir: str) -> dict:
+    embeddings = _unit_vectors(count, seed=count)
+    ids = [f"c{i}" for i in range(count)]
+    index = NumpyVectorIndex(index_dir=workdir, embed_fn=lambda texts: [])
+    started = time.perf_counter()
+    index.write_version("bench", ids, ids, embeddings)
+    build_s = time.perf_counter() - started
+    del embeddings
+
+    rss_before = _rss_mb()
+    matrix = index._load("bench").embeddings
+    search = lambda batch: NumpyVectorIndex.top_k(matrix, batch, k)  # noqa: E731
+    search(queries[:1])  # fault the mapped pages in before timing
+    row = {"backend": "numpy", "chunks": count, "build_s": round(build_s, 3)}
+    row.update(_latencies(search, queries, 1, repeat))
+    row.update(_latencies(search, queries, 32, repeat))
+    row["index_mb"] = round(matrix.nbytes / (1024 * 1024), 2)
+    row["rss_delta_mb"] = round(_rss_mb() - rss_before, 2)
+    return row
+
+
+def bench_chroma(count: int, queries: np.ndarray, k: int, repeat: int, workdir: str) -> dict:
+    import chromadb
+    from chromadb import Settings as ChromaSettings
+
+    rss_before = _rss_mb()
+    client = chromadb.PersistentClient(path=workdir, settings=ChromaSettings(anonymized_telemetry=False))
+    collection = client.get_or_create_collection("bench", embedding_function=None)
+    embeddings = _unit_vectors(count, seed=count)
+    started = time.perf_counter()
+    for start in range(0, count, CHROMA_BATCH):
+        end = min(start + CHROMA_BATCH, count)
+        collection.add(
+            ids=[f"c{i}" for i in range(start, end)],
+            embeddings=embeddings[start:end].tolist(),
+            documents=[f"c{i}" for i in range(start, end)],
+        )
+    build_s = time.perf_counter() - started
+    del embeddings
+
+    search = lambda batch: collection.query(query_embeddings=batch.tolist(), n_results=k)  # noqa: E731
+    search(queries[:1])
+    row = {"backend": "chroma", "chunks": count, "build_s": round(build_s, 3)}
+    row.update(_latencies(search, queries, 1, repeat))
+    row.update(_latencies(search, queries, 32, repeat))
+    row["rss_delta_mb"] = round(_rss_mb() - rss_before, 2)
+    return row
+
+
+def run(chunks: list[int], chroma_max: int, queries: int, k: int, repeat: int) -> list[dict]:
+    query_vectors = _unit_vectors(queries, seed=0)
+    results = []
+    for count in chunks:
+        with tempfile.TemporaryDirectory() as workdir:
+            results.append(bench_numpy(count, query_vectors, k, repeat, workdir))
+        if count <= chroma_max:
+            with tempfile.TemporaryDirectory() as workdir:
+                results.append(bench_chroma(count, query_vectors, k, repeat, workdir))
+        else:
+            results.append({"backend": "chroma", "chunks": count, "skipped": f"above --chroma-max {chroma_max}"})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[100, 10_000, 1_000_000])
+    parser.add_argument("--chroma-max", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for row in run(args.chunks, args.chroma_max, args.queries, args.k, args.repeat):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
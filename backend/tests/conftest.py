@@ -0,0 +1,79 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+# Mirror the environment used by test_api so the settings singleton is the
+# same regardless of which test module is collected first.
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "10")
+os.environ.setdefault("PLAYBOOK_SEED_PATH", os.path.abspath("standard_terms_playbook.md"))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./data/test.db")
+os.environ.setdefault("INLINE_ANALYSIS", "true")
+os.environ.setdefault("BYPASS_DB_FOR_TESTS", "true")
+
+
+@pytest.fixture(autouse=True)
+def offline_llm(monkeypatch):
+    """Keep unit tests off the network even when ANTHROPIC_API_KEY is exported."""
+    from backend.app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "anthropic_api_key", None)
+
+
+class StaticRAG:
+    """Retrieval stand-in that avoids downloading the embedding model."""
+
+    content = "Days from invoice 30-45 days. Retainage 5%. Notice 14-21 days."
+
+    def reset_version(self, version_id, chunks):
+        self.chunks = list(chunks)
+
+    def collection_count(self, version_id):
+        return 1
+
+    def query(self, version_id, text, k=3):
+        return self.query_many(version_id, [text], k)[0]
+
+    def query_many(self, version_id, texts, k=3):
+        from backend.app.schemas import RetrievedChunk
+
+        chunk = RetrievedChunk(
+            chunk_id=f"{version_id}-0",
+            content=self.content,
+            source="playbook",
+            playbook_version_id=version_id,
+        )
+        return [[chunk] for _ in texts]
+
+
+@pytest.fixture
+def static_rag(monkeypatch):
+    from backend.app.playbook import playbook_cache
+
+    rag = StaticRAG()
+    monkeypatch.setattr(playbook_cache, "_rag", rag)
+    return rag
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path, monkeypatch):
+    """Fresh schema in a throwaway SQLite file, used by ``get_session`` for the test."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from backend.app import database as db
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(db, "engine", engine)
+    monkeypatch.setattr(
+        db,
+        "AsyncSessionLocal",
+        async_sessionmaker(engine, expire_on_commit=False, autoflush=False, autocommit=False),
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(db.Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
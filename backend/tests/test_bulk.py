@@ -0,0 +1,32 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+
+from backend.app import database as db
+from backend.app.bulk import run_import
+from backend.app.models import Analysis
+
+SAMPLES = Path(__file__).resolve().parents[2] / "sample_contracts"
+
+
+@pytest.mark.asyncio
+async def test_import_deduplicates_and_resumes(database, static_rag, tmp_path):
+    sample = sorted(SAMPLES.glob("*.txt"))[0].read_text(encoding="utf-8")
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "a.txt").write_text(sample, encoding="utf-8")
+    (tmp_path / "nested" / "copy.txt").write_text(sample, encoding="utf-8")
+    (tmp_path / "b.txt").write_text("Payment within 90 days of invoice. Retain 10% until completion.", encoding="utf-8")
+    (tmp_path / "empty.txt").write_text("", encoding="utf-8")
+
+    first = await run_import(tmp_path, version_id="v1", workers=2, batch_size=1)
+    second = await run_import(tmp_path, version_id="v1", workers=2)
+
+    assert (first.files, first.duplicates, first.imported, first.failed) == (4, 1, 2, 1)
+    assert first.clauses > 0 and first.as_dict()["contracts_per_s"] > 0
+    assert (second.already_imported, second.imported) == (2, 0)
+    async with db.get_session() as session:
+        rows = (await session.execute(select(Analysis))).scalars().all()
+    assert len(rows) == 2
+    assert {row.status for row in rows} == {"completed"}
+    assert all(row.content_hash and row.result_json and row.playbook_version_id == "v1" for row in rows)
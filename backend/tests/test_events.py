@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from backend.app.events import EventBus
+
+
+async def _collect(bus: EventBus, analysis_id: str, count: int) -> list[str]:
+    events = []
+    async for item in bus.subscribe(analysis_id):
+        events.append(item["event"])
+        if len(events) == count:
+            break
+    return events
+
+
+@pytest.mark.asyncio
+async def test_late_subscriber_sees_events_published_before_it_connected():
+    bus = EventBus(replay_analyses=2)
+    bus.publish("a", "status", {})
+    bus.publish("a", "partial_finding", {})
+    subscriber = asyncio.create_task(_collect(bus, "a", 3))
+    await asyncio.sleep(0)
+    bus.publish("a", "final", {})
+
+    assert await asyncio.wait_for(subscriber, 1) == ["status", "partial_finding", "final"]
+    assert not bus.listeners
+
+
+def test_replay_history_is_bounded_to_recent_analyses():
+    bus = EventBus(replay_analyses=2)
+    for analysis_id in ("a", "b", "c"):
+        bus.publish(analysis_id, "final", {})
+
+    assert list(bus._history) == ["b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_terminal_event_survives_a_full_ring(monkeypatch):
+    monkeypatch.setattr(EventBus, "max_events_per_analysis", 3)
+    bus = EventBus(replay_analyses=2)
+    for idx in range(10):
+        bus.publish("a", "partial_finding", {"idx": idx})
+    bus.publish("a", "final", {})
+
+    received = []
+    async for item in bus.subscribe("a"):
+        received.append(item)
+        if item["event"] == "final":
+            break
+    assert [item["data"].get("idx") for item in received] == [7, 8, 9, None]
+
+
+def test_replay_history_is_bounded_by_payload_bytes():
+    bus = EventBus(replay_analyses=10, replay_max_bytes=250)
+    for analysis_id in ("a", "b", "c"):
+        bus.publish(analysis_id, "final", {"text": "x" * 100})
+
+    assert list(bus._history) == ["b", "c"]
+    assert bus._history_bytes == sum(replay.size for replay in bus._history.values()) <= 250
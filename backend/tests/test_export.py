@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app import database as db
+from backend.app.export import AnalysisFilters, decode_cursor, export_csv, export_ndjson, list_analyses
+from backend.app.models import Analysis
+
+
+def _finding(clause_type, mode="risks"):
+    return {
+        "clause_type": clause_type,
+        "extracted_value": "60 days",
+        "risk_level": "high",
+        "recommendation": "Negotiate.",
+        "mode": mode,
+        "retrieved_chunks": [{"chunk_id": "v-0"}, {"chunk_id": "v-1"}],
+    }
+
+
+async def _seed():
+    started = datetime(2024, 1, 1)
+    async with db.get_session() as session:
+        session.add_all(
+            [
+                Analysis(
+                    id=f"a{n}",
+                    created_at=started + timedelta(minutes=n),
+                    analysis_type="risks",
+                    contract_text="x" * 1000,
+                    status="completed",
+                    result_json=json.dumps(
+                        {"overall_risk_score": "high", "findings": [_finding("payment_terms"), _finding("retainage")]}
+                    ),
+                )
+                for n in range(3)
+            ]
+            + [Analysis(id="queued", created_at=started, analysis_type="summary", contract_text="y", status="queued")]
+        )
+
+
+async def _collect(stream):
+    return "".join([chunk async for chunk in stream])
+
+
+@pytest.mark.asyncio
+async def test_listing_pages_with_keyset_cursors(database):
+    await _seed()
+    filters = AnalysisFilters(status="completed", analysis_type="risks")
+    async with db.get_session() as session:
+        first, cursor = await list_analyses(session, filters, None, 2)
+        second, last = await list_analyses(session, filters, decode_cursor(cursor), 2)
+
+    assert [a.analysis_id for a in first] == ["a0", "a1"]
+    assert [a.analysis_id for a in second] == ["a2"] and last is None
+    assert first[0].overall_risk_score == "high"
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_exports_flatten_findings_and_resume_from_a_cursor(database):
+    await _seed()
+    filters = AnalysisFilters(status="completed")
+    lines = [json.loads(line) for line in (await _collect(export_ndjson(filters, None))).splitlines()]
+    analyses = [line for line in lines if line["type"] == "analysis"]
+    assert [line["analysis_id"] for line in analyses] == ["a0", "a1", "a2"]
+    assert len(lines) == 9 and lines[1]["chunk_ids"] == "v-0 v-1"
+
+    resumed = await _collect(export_ndjson(filters, decode_cursor(analyses[0]["cursor"])))
+    assert [json.loads(line)["analysis_id"] for line in resumed.splitlines()][0] == "a1"
+
+    rows = list(csv.DictReader(io.StringIO(await _collect(export_csv(AnalysisFilters(), None)))))
+    assert len(rows) == 7
+    assert rows[0]["analysis_id"] == "a0" and rows[0]["clause_type"] == "payment_terms"
+    assert next(row for row in rows if row["analysis_id"] == "queued")["clause_type"] == ""
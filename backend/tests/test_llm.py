@@ -0,0 +1,218 @@
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+
+from backend.app import llm
+from backend.app.llm import AnthropicClient, PromptCacheSimulator
+from backend.app.models import Analysis
+from backend.app.pipeline import run_analysis_pipeline
+from backend.benchmarks.fake_anthropic import FakeLLMConfig, create_app
+
+SAMPLE = (
+    Path(__file__).resolve().parents[2] / "sample_contracts" / "example_contract_1_subcontractor.txt"
+).read_text(encoding="utf-8")
+PLAYBOOK = Path(__file__).resolve().parents[2].joinpath("standard_terms_playbook.md").read_text(encoding="utf-8")
+
+
+def test_simulator_writes_then_reads_prefixes_above_minimum():
+    cache = PromptCacheSimulator(min_tokens=10, ttl_seconds=60)
+    assert cache.account("short", 5) == (0, 0)
+    assert cache.account("long prefix", 50) == (50, 0)
+    assert cache.account("long prefix", 50) == (0, 50)
+    assert PromptCacheSimulator(10, ttl_seconds=0).account("long prefix", 50) == (50, 0)
+
+
+@pytest.mark.asyncio
+async def test_risks_prompts_share_a_cached_playbook_prefix(static_rag, monkeypatch):
+    monkeypatch.setattr(llm.settings, "prompt_cache_enabled", True)
+    monkeypatch.setattr(llm, "prompt_cache", PromptCacheSimulator(1024, ttl_seconds=60))
+    static_rag.list_chunks = lambda version_id: [(f"{version_id}-0", PLAYBOOK)]
+    analysis = Analysis(id="cached", analysis_type="risks", contract_text=SAMPLE)
+    result = await run_analysis_pipeline(None, analysis, playbook_content_override="playbook")
+
+    usage = result.usage
+    assert usage.cache_creation_input_tokens > 1024
+    assert usage.cache_read_input_tokens >= usage.cache_creation_input_tokens
+    assert usage.input_tokens < usage.cache_read_input_tokens / 4
+
+
+@pytest.mark.asyncio
+async def test_chunks_left_out_of_the_prefix_are_sent_inline(monkeypatch):
+    from backend.app import pipeline
+    from backend.app.pipeline import PendingReview, _build_findings, _review_prompt, _risk_prompt_prefix
+    from backend.app.schemas import RetrievedChunk
+
+    class TwoChunks:
+        def list_chunks(self, version_id):
+            return [("v-0", "Retainage 5%. " * 20), ("v-1", "Notice within 14 days. " * 20)]
+
+    monkeypatch.setattr(pipeline.settings, "prompt_cache_enabled", True)
+    monkeypatch.setattr(pipeline.settings, "prompt_prefix_max_chars", 400)
+    prefix = _risk_prompt_prefix(TwoChunks(), "v")
+    assert "[v-0] " in prefix and "[v-1] " not in prefix
+
+    chunks = [
+        RetrievedChunk(chunk_id=chunk_id, content=text, source="playbook", playbook_version_id="v")
+        for chunk_id, text in TwoChunks().list_chunks("v")
+    ]
+    clause = {"clause_type": "notice", "extracted_value": "7 days", "source_text": "Notice within 7 days."}
+    prompts = []
+
+    class RecordingClient:
+        async def complete(self, prompt, max_tokens=512, cache_prefix=None):
+            prompts.append(prompt)
+            return "", llm.LLMUsage(0, 0)
+
+    await _build_findings(["risks"], clause, chunks, RecordingClient(), llm.LLMUsage(0, 0), prompt_prefix=prefix)
+    review = _review_prompt([PendingReview(clause, chunks, [])], prefix)
+    for prompt in (prompts[0], review):
+        assert "[v-1] Notice within 14 days." in prompt
+        assert "[v-0] Retainage" not in prompt
+
+
+@pytest.mark.asyncio
+async def test_api_path_sends_cache_markers_and_reports_cache_usage(monkeypatch):
+    import anthropic
+
+    monkeypatch.setattr(llm.settings, "anthropic_api_key", "test-key")
+    monkeypatch.setattr(llm.settings, "prompt_cache_enabled", True)
+    client = AnthropicClient()
+    fake = create_app(FakeLLMConfig(latency_ms=0, jitter_ms=0, cache_min_tokens=100))
+    client.client = anthropic.AsyncAnthropic(
+        api_key="test-key",
+        base_url="http://fake",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake"),
+    )
+    prefix = "Playbook excerpt. " * 100
+
+    _, first = await client.complete("Clause one.", max_tokens=32, cache_prefix=prefix)
+    _, second = await client.complete("Clause two.", max_tokens=32, cache_prefix=prefix)
+
+    assert first.cache_creation_input_tokens == len(prefix) // 4
+    assert second.cache_read_input_tokens == len(prefix) // 4
+    assert second.cache_creation_input_tokens == 0
+    assert second.estimated_cost < first.estimated_cost
+
+
+def test_review_batches_split_at_the_context_budget_and_parse_verdicts():
+    from backend.app.pipeline import PendingReview, _parse_review_verdicts, _plan_review_batches
+    from backend.app.schemas import RetrievedChunk
+
+    chunk = RetrievedChunk(chunk_id="v-0", content="Retainage 5%. " * 40, source="playbook", playbook_version_id="v")
+    reviews = [
+        PendingReview({"clause_type": "retainage", "extracted_value": f"{n}%"}, [chunk], []) for n in range(30)
+    ]
+    assert _plan_review_batches(reviews, None, 100_000) == [list(range(30))]
+    batches = _plan_review_batches(reviews, None, 400)
+    assert len(batches) > 1 and sum(batches, []) == list(range(30))
+
+    verdicts = _parse_review_verdicts(
+        'Sure: [{"clause": 1, "risk_level": "High", "rationale": "Above 5%."}, {"clause": 2, "risk_level": "bogus"}]'
+    )
+    assert verdicts == {1: {"risk_level": "high", "rationale": "Above 5%."}}
+    assert _parse_review_verdicts("not json") == {}
+
+
+@pytest.mark.asyncio
+async def test_batched_review_makes_one_call_per_contract(static_rag, monkeypatch):
+    prompts = []
+
+    async def fake_complete(self, prompt, max_tokens=512, cache_prefix=None):
+        prompts.append(prompt)
+        count = prompt.count("Clause type:")
+        rows = [{"clause": n, "risk_level": "high", "rationale": f"Reviewed {n}."} for n in range(1, count + 1)]
+        return json.dumps(rows), llm.LLMUsage(100, 10 * count)
+
+    monkeypatch.setattr(AnthropicClient, "complete", fake_complete)
+    monkeypatch.setattr(llm.settings, "llm_review_mode", "per_clause")
+    per_clause = await run_analysis_pipeline(
+        None, Analysis(id="per-clause", analysis_type="risks", contract_text=SAMPLE), playbook_content_override="pb"
+    )
+    calls = len(prompts)
+    prompts.clear()
+    monkeypatch.setattr(llm.settings, "llm_review_mode", "batched")
+    batched = await run_analysis_pipeline(
+        None, Analysis(id="batched", analysis_type="risks", contract_text=SAMPLE), playbook_content_override="pb"
+    )
+
+    assert calls > 1 and len(prompts) == 1
+    assert prompts[0].count("Clause type:") == calls
+    assert [f.clause_type for f in batched.findings] == [f.clause_type for f in per_clause.findings]
+    assert all("LLM review (high): Reviewed" in f.recommendation for f in batched.findings)
+    assert batched.usage.input_tokens < per_clause.usage.input_tokens
+
+
+@pytest.mark.asyncio
+async def test_streamed_batched_review_shares_one_call_and_emits_reviewed_findings(static_rag, monkeypatch):
+    from backend.app.ingest import iter_windows
+    from backend.app.pipeline import run_streaming_pipeline
+
+    prompts = []
+
+    async def fake_complete(self, prompt, max_tokens=512, cache_prefix=None):
+        prompts.append(prompt)
+        rows = [
+            {"clause": n, "risk_level": "high", "rationale": "Reviewed."}
+            for n in range(1, prompt.count("Clause type:") + 1)
+        ]
+        return json.dumps(rows), llm.LLMUsage(100, 10)
+
+    async def chunks():
+        data = SAMPLE.encode("utf-8")
+        for idx in range(0, len(data), 512):
+            yield data[idx : idx + 512]
+
+    events = []
+    monkeypatch.setattr(AnthropicClient, "complete", fake_complete)
+    monkeypatch.setattr(llm.settings, "llm_review_mode", "batched")
+    await run_streaming_pipeline(
+        None,
+        Analysis(id="streamed-batch", analysis_type="risks", contract_text=""),
+        iter_windows(chunks(), 2000, 400),
+        2000,
+        400,
+        streamer=lambda event, data: events.append((event, data)),
+        playbook_content_override="pb",
+    )
+
+    partials = [data["finding"] for event, data in events if event == "partial_finding"]
+    assert len(prompts) == 1
+    assert partials and all("LLM review (high): Reviewed." in f["recommendation"] for f in partials)
+
+
+@pytest.mark.asyncio
+async def test_batch_mode_submits_many_analyses_as_one_message_batch(static_rag, monkeypatch):
+    import asyncio
+
+    from backend.app.batch import batch_queue
+
+    fake = create_app(FakeLLMConfig(batch_latency_ms=50))
+    monkeypatch.setattr(llm.settings, "anthropic_api_key", "test-key")
+    monkeypatch.setattr(batch_queue, "flush_seconds", 0.2)
+    monkeypatch.setattr(batch_queue, "poll_seconds", 0.02)
+    monkeypatch.setattr(batch_queue, "batches_submitted", 0)
+    batch_queue.http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake")
+    try:
+        results = await asyncio.gather(
+            *(
+                run_analysis_pipeline(
+                    None,
+                    Analysis(id=f"bulk-{n}", analysis_type="risks", contract_text=SAMPLE),
+                    playbook_content_override="pb",
+                    llm_mode="batch",
+                )
+                for n in range(3)
+            )
+        )
+        stats = (await batch_queue.http_client.get("/stats")).json()
+    finally:
+        await batch_queue.close()
+
+    assert batch_queue.batches_submitted == 1
+    assert stats["batches"] == 1 and stats["batch_requests"] == 3
+    assert stats["requests"] == 0
+    for result in results:
+        assert result.findings
+        assert result.usage.output_tokens == FakeLLMConfig().output_tokens
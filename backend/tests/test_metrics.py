@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import httpx
+import pytest
+
+from backend.app.main import app
+from backend.app.metrics import MetricsRegistry, STAGE_SECONDS
+from backend.app.models import Analysis
+from backend.app.pipeline import run_analysis_pipeline
+
+SAMPLE = (
+    Path(__file__).resolve().parents[2] / "sample_contracts" / "example_contract_1_subcontractor.txt"
+).read_text(encoding="utf-8")
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    requests = registry.counter("demo_requests_total", "Requests.", labels=("route",))
+    latency = registry.histogram("demo_seconds", "Latency.", buckets=(0.1, 1.0))
+    registry.gauge("demo_depth", "Depth.", callback=lambda: 3)
+    requests.inc(route='/a"b')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    text = registry.render()
+    assert '# TYPE demo_requests_total counter\ndemo_requests_total{route="/a\\"b"} 1.0' in text
+    assert 'demo_seconds_bucket{le="0.1"} 1\ndemo_seconds_bucket{le="1.0"} 2\ndemo_seconds_bucket{le="+Inf"} 2' in text
+    assert "demo_seconds_count 2" in text
+    assert "demo_depth 3" in text
+
+
+@pytest.mark.asyncio
+async def test_pipeline_records_stage_timings_and_exposes_metrics(static_rag):
+    before = STAGE_SECONDS.count(stage="retrieval")
+    analysis = Analysis(id="timed", analysis_type="risks", contract_text=SAMPLE)
+    result = await run_analysis_pipeline(None, analysis, playbook_content_override="playbook")
+
+    for stage in ("sanitize_ms", "extraction_ms", "reindex_ms", "retrieval_ms", "comparison_ms", "validation_ms"):
+        assert stage in result.timings
+    assert result.timings["total_ms"] >= result.timings["retrieval_ms"]
+    assert STAGE_SECONDS.count(stage="retrieval") - before == len(analysis.get_clause_findings())
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'analyzer_stage_seconds_bucket{stage="extraction",le="+Inf"}' in body
+    assert 'analyzer_llm_tokens_total{direction="input",source="heuristic"}' in body
+    assert 'analyzer_analyses_total{status="completed"}' in body
+    for name in ("analyzer_worker_queue_depth", "analyzer_sse_subscribers", "analyzer_retrieval_cache_lookups_total"):
+        assert f"# TYPE {name}" in body
@@ -0,0 +1,189 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from backend.app.ingest import iter_windows
+from backend.app.models import Analysis
+from backend.app.pipeline import run_analysis_pipeline, run_streaming_pipeline
+
+SAMPLE = (
+    Path(__file__).resolve().parents[2] / "sample_contracts" / "example_contract_1_subcontractor.txt"
+).read_text(encoding="utf-8")
+
+
+async def _byte_chunks(text: str, size: int):
+    data = text.encode("utf-8")
+    for idx in range(0, len(data), size):
+        yield data[idx : idx + size]
+
+
+def test_iter_windows_overlap_and_multibyte_boundaries():
+    text = "€" * 25 + "abc" * 10
+
+    async def collect():
+        return [w async for w in iter_windows(_byte_chunks(text, 7), window_size=20, overlap=5)]
+
+    windows = asyncio.run(collect())
+    assert all(len(w) == 20 for _, w in windows[:-1])
+    assert len(windows[-1][1]) < 20
+    for offset, window in windows:
+        assert text[offset : offset + len(window)] == window
+    assert windows[-1][0] + len(windows[-1][1]) == len(text)
+
+
+@pytest.mark.asyncio
+async def test_streaming_pipeline_matches_batch_findings(static_rag):
+    from backend.app.pipeline import _extract_clauses
+
+    batch = Analysis(id="batch", analysis_type="summary", contract_text=SAMPLE)
+    expected = await run_analysis_pipeline(None, batch, playbook_content_override="playbook")
+
+    events = []
+    streamed = Analysis(id="streamed", analysis_type="summary", contract_text="")
+    result = await run_streaming_pipeline(
+        None,
+        streamed,
+        iter_windows(_byte_chunks(SAMPLE, 1024), 4000, 600),
+        4000,
+        600,
+        streamer=lambda event, data: events.append(event),
+        playbook_content_override="playbook",
+    )
+
+    assert sorted(f.clause_type for f in result.findings) == sorted(
+        f.clause_type for f in expected.findings
+    )
+    assert result.usage == expected.usage
+    assert "partial_finding" in events
+    assert streamed.contract_text == SAMPLE
+    stored = streamed.get_clause_findings()
+    assert sorted(f["clause_type"] for f in stored) == sorted(c["clause_type"] for c in _extract_clauses(SAMPLE))
+    for finding in stored:
+        assert SAMPLE[finding["start"] : finding["end"]] in finding["source_text"]
+
+
+def test_section_index_and_clause_spans():
+    from backend.app.pipeline import _extract_clauses
+    from backend.app.segments import build_section_index
+
+    index = build_section_index(SAMPLE)
+    article = index.get("2")
+    assert article.heading.startswith("ARTICLE 2")
+    assert index.get("2.4").parent_id == "2"
+    assert index.locate(index.get("2.4").start + 5).section_id == "2.4"
+
+    clauses = _extract_clauses(SAMPLE)
+    assert clauses
+    for clause in clauses:
+        assert clause["section_id"] is not None
+        assert SAMPLE[clause["start"] : clause["end"]] in clause["source_text"]
+    # "within 14 days" under "Coordination Requirements" is not a payment term.
+    assert all(
+        index.get(c["section_id"]).parent_id != "1" for c in clauses if c["clause_type"] == "payment_terms"
+    )
+
+
+@pytest.mark.asyncio
+async def test_revision_reuses_unchanged_sections(static_rag):
+    from backend.app.pipeline import run_revision_pipeline
+
+    parent = Analysis(id="parent", analysis_type="risks", contract_text=SAMPLE, playbook_version_id="in-memory")
+    await run_analysis_pipeline(None, parent, playbook_content_override="playbook")
+
+    # Only the liquidated damages section changes, and it shifts later text.
+    revised_text = SAMPLE.replace("€3,500.00 per calendar day", "€75,000.00 per calendar day")
+    revision = Analysis(id="revision", analysis_type="risks", contract_text=revised_text, playbook_version_id="in-memory")
+    result, delta, timings = await run_revision_pipeline(
+        None, revision, parent, playbook_content_override="playbook"
+    )
+
+    assert timings["sections_changed"] == 1
+    assert timings["clauses_rescored"] == 1
+    assert timings["clauses_reused"] == len(parent.get_clause_findings()) - 1
+    assert [f.extracted_value for f in delta.changed] == ["75,000.00 currency"]
+    assert not delta.added and not delta.removed
+    for finding in result.findings:
+        assert revised_text[finding.start : finding.end] in finding.source_text
+
+
+@pytest.mark.asyncio
+async def test_revision_of_parent_without_stored_findings_rescores_everything(static_rag):
+    from backend.app.pipeline import run_revision_pipeline
+
+    parent = Analysis(id="legacy", analysis_type="risks", contract_text=SAMPLE, playbook_version_id="in-memory")
+    expected = await run_analysis_pipeline(None, parent, playbook_content_override="playbook")
+    parent.clause_findings_json = None
+
+    revision = Analysis(id="legacy-revision", analysis_type="risks", contract_text=SAMPLE, playbook_version_id="in-memory")
+    result, delta, timings = await run_revision_pipeline(
+        None, revision, parent, playbook_content_override="playbook"
+    )
+
+    assert timings["clauses_reused"] == 0
+    assert sorted(f.clause_type for f in result.findings) == sorted(f.clause_type for f in expected.findings)
+    assert len(revision.get_clause_findings()) == timings["clauses_rescored"] > 0
+    assert "retrieval_ms" in result.timings
+
+
+@pytest.mark.asyncio
+async def test_multi_mode_analysis_shares_extraction_and_retrieval(static_rag, monkeypatch):
+    calls = []
+    original_query = static_rag.query
+    monkeypatch.setattr(static_rag, "query", lambda *args, **kw: calls.append(args) or original_query(*args, **kw))
+
+    single = Analysis(id="single", analysis_type="summary", contract_text=SAMPLE)
+    await run_analysis_pipeline(None, single, playbook_content_override="playbook")
+    single_calls = len(calls)
+
+    calls.clear()
+    combined = Analysis(id="combined", analysis_type="summary,obligations", contract_text=SAMPLE)
+    result = await run_analysis_pipeline(None, combined, playbook_content_override="playbook")
+
+    assert len(calls) == single_calls
+    assert set(result.findings_by_mode) == {"summary", "obligations"}
+    assert [f.mode for f in result.findings] == ["summary"] * len(result.findings)
+    obligations = result.findings_by_mode["obligations"]
+    assert [f.clause_type for f in obligations] == [f.clause_type for f in result.findings]
+    assert all(f.recommendation.startswith("Action:") for f in obligations)
+
+
+
+@pytest.mark.asyncio
+async def test_failed_analysis_resumes_from_its_checkpoint(static_rag, monkeypatch):
+    from backend.app.llm import AnthropicClient
+
+    prompts, queries = [], []
+    original_complete = AnthropicClient.complete
+    original_query = static_rag.query
+
+    async def flaky_complete(self, prompt, *args, **kwargs):
+        prompts.append(prompt)
+        if len(prompts) == 3:
+            raise TimeoutError("LLM timed out")
+        return await original_complete(self, prompt, *args, **kwargs)
+
+    monkeypatch.setattr(AnthropicClient, "complete", flaky_complete)
+    monkeypatch.setattr(static_rag, "query", lambda *args, **kw: queries.append(args) or original_query(*args, **kw))
+
+    analysis = Analysis(id="flaky", analysis_type="risks", contract_text=SAMPLE)
+    with pytest.raises(TimeoutError):
+        await run_analysis_pipeline(None, analysis, playbook_content_override="playbook")
+    assert analysis.checkpoint_json and len(queries) == 3
+
+    prompts[:] = ["done"] * 3
+    queries.clear()
+    result = await run_analysis_pipeline(None, analysis, playbook_content_override="playbook")
+    resumed_prompts, resumed_queries = len(prompts) - 3, len(queries)
+    reference = await run_analysis_pipeline(
+        None, Analysis(id="clean", analysis_type="risks", contract_text=SAMPLE), playbook_content_override="playbook"
+    )
+    clauses = len(queries) - resumed_queries
+
+    # The two clauses validated before the failure are not retrieved or validated again,
+    # and the third reuses its retrieval.
+    assert clauses > 3
+    assert resumed_prompts == clauses - 2
+    assert resumed_queries == clauses - 3
+    assert [f.dict() for f in result.findings] == [f.dict() for f in reference.findings]
+    assert analysis.checkpoint_json is None
@@ -0,0 +1,119 @@
+import pytest
+from sqlalchemy import update
+
+from backend.app.database import get_session
+from backend.app.models import PlaybookPointer, PlaybookVersion
+from backend.app.playbook import PlaybookVersionCache
+
+
+@pytest.mark.asyncio
+async def test_version_cache_follows_pointer_generation(database):
+    cache = PlaybookVersionCache(ttl_seconds=3600)
+    async with get_session() as session:
+        first = PlaybookVersion(content="Payment within 30 days.", version_label="a")
+        second = PlaybookVersion(content="Payment within 45 days.", version_label="b")
+        session.add_all([first, second])
+        await session.flush()
+
+        published = await cache.publish(session, first.id)
+        assert published.id == first.id
+        assert (await cache.get_current(session)).id == first.id
+        assert cache._current is None  # not until the transaction commits
+    assert cache._current.id == first.id
+
+    async with get_session() as session:
+        # Another process publishes a new version behind our back.
+        await session.execute(
+            update(PlaybookPointer)
+            .where(PlaybookPointer.id == 1)
+            .values(version_id=second.id, generation=PlaybookPointer.generation + 1)
+        )
+        assert (await cache.get_current(session)).id == first.id  # within TTL
+
+        cache.ttl_seconds = 0
+        current = await cache.get_current(session)
+        assert current.id == second.id
+        assert current.generation == published.generation + 1
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_publish_leaves_cache_unchanged(database):
+    cache = PlaybookVersionCache(ttl_seconds=3600)
+    with pytest.raises(RuntimeError):
+        async with get_session() as session:
+            version = PlaybookVersion(content="Payment within 60 days.", version_label="c")
+            session.add(version)
+            await session.flush()
+            await cache.publish(session, version.id)
+            raise RuntimeError("request failed after publishing")
+
+    assert cache._current is None
+    async with get_session() as session:
+        assert await cache.get_current(session) is None
+
+
+@pytest.mark.asyncio
+async def test_rescore_job_links_new_analyses(database, static_rag, monkeypatch):
+    from sqlalchemy import select
+
+    from backend.app.models import Analysis
+    from backend.app.pipeline import run_analysis_pipeline
+    from backend.app.rescore import RescoreJob, resolve_contract_text, run_rescore_job, settings
+
+    monkeypatch.setattr(settings, "rescore_throttle_seconds", 0)
+
+    async with get_session() as session:
+        old_version = PlaybookVersion(content="v1", version_label="v1")
+        new_version = PlaybookVersion(content="v2", version_label="v2")
+        session.add_all([old_version, new_version])
+        await session.flush()
+        sources = []
+        for idx in range(3):
+            analysis = Analysis(
+                analysis_type="risks,summary" if idx == 2 else "summary",
+                contract_text=f"Contractor shall retain 10% of each payment. Ref {idx}.",
+                status="completed",
+                playbook_version_id=old_version.id,
+            )
+            session.add(analysis)
+            await session.flush()
+            await run_analysis_pipeline(session, analysis)
+            sources.append(analysis.id)
+
+    static_rag.content = "Retainage 12% is the new standard."
+    job = RescoreJob(version_id=new_version.id, analysis_type="summary", chunk_size=2)
+    await run_rescore_job(job)
+
+    assert job.status == "completed"
+    assert job.processed == job.total >= 3
+    async with get_session() as session:
+        rescored = (
+            await session.execute(select(Analysis).where(Analysis.parent_id.in_(sources)))
+        ).scalars().all()
+    assert len(rescored) == 3
+    assert {a.playbook_version_id for a in rescored} == {new_version.id}
+    assert all(a.result_json and "12%" in a.result_json for a in rescored)
+    async with get_session() as session:
+        child = rescored[0]
+        source = await session.get(Analysis, child.parent_id)
+        assert child.contract_text == ""
+        assert await resolve_contract_text(session, child) == source.contract_text
+
+    # Sources already re-scored onto the version are not picked up again, and
+    # a later version re-scores each lineage's newest analysis only.
+    again = RescoreJob(version_id=new_version.id)
+    await run_rescore_job(again)
+    assert again.total == again.created == 0
+
+    async with get_session() as session:
+        newer_version = PlaybookVersion(content="v3", version_label="v3")
+        session.add(newer_version)
+        await session.flush()
+    newer = RescoreJob(version_id=newer_version.id)
+    await run_rescore_job(newer)
+    assert newer.created == 3
+    async with get_session() as session:
+        leaves = (
+            await session.execute(select(Analysis.parent_id).where(Analysis.playbook_version_id == newer_version.id))
+        ).scalars().all()
+    assert set(leaves) == {a.id for a in rescored}
@@ -0,0 +1,70 @@
+import httpx
+import pytest
+
+from backend.app.config import get_settings
+from backend.app.main import app
+from backend.app.profiling import profile_slot, profile_store
+
+SAMPLE_TEXT = "Payment shall be made within 75 days of invoice. Retainage of 10% will be withheld."
+
+
+@pytest.fixture
+def debug_client(monkeypatch, tmp_path, static_rag):
+    monkeypatch.setattr(get_settings(), "debug_mode", True)
+    monkeypatch.setattr(profile_store, "directory", tmp_path)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_profiled_analysis_exposes_top_functions(debug_client):
+    async with debug_client as client:
+        created = await client.post(
+            "/analyze", json={"contract_text": SAMPLE_TEXT, "analysis_type": "risks"}, headers={"X-Profile": "1"}
+        )
+        analysis_id = created.json()["analysis_id"]
+        summary = await client.get(f"/analysis/{analysis_id}/profile", params={"sort": "tottime", "limit": 200})
+        raw = await client.get(f"/analysis/{analysis_id}/profile.prof")
+
+    assert summary.status_code == 200
+    body = summary.json()
+    assert body["sort"] == "tottime" and body["total_seconds"] > 0
+    names = {entry["function"] for entry in body["functions"]}
+    # Worker-pool stages run inline while profiling, so they show up.
+    assert {"_extract_clauses", "filter_malicious_segments"} & names
+    tottimes = [entry["tottime"] for entry in body["functions"]]
+    assert tottimes == sorted(tottimes, reverse=True)
+    assert raw.status_code == 200 and raw.content
+
+
+@pytest.mark.asyncio
+async def test_profiling_requires_debug_mode(debug_client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "debug_mode", False)
+    async with debug_client as client:
+        created = await client.post(
+            "/analyze?profile=1", json={"contract_text": SAMPLE_TEXT, "analysis_type": "risks"}
+        )
+        analysis_id = created.json()["analysis_id"]
+        assert (await client.get(f"/analysis/{analysis_id}/profile")).status_code == 404
+    assert profile_store.path(analysis_id) is not None
+    assert not profile_store.path(analysis_id).exists()
+
+
+@pytest.mark.asyncio
+async def test_overlapping_profiled_requests_conflict(debug_client):
+    assert profile_slot.acquire()  # another profiled analysis is running
+    async with debug_client as client:
+        try:
+            busy = await client.post(
+                "/analyze", json={"contract_text": SAMPLE_TEXT, "analysis_type": "risks"}, headers={"X-Profile": "1"}
+            )
+            unprofiled = await client.post("/analyze", json={"contract_text": SAMPLE_TEXT, "analysis_type": "risks"})
+        finally:
+            profile_slot.release()
+        created = await client.post(
+            "/analyze", json={"contract_text": SAMPLE_TEXT, "analysis_type": "risks"}, headers={"X-Profile": "1"}
+        )
+    assert busy.status_code == 409
+    assert unprofiled.status_code == 200
+    assert created.status_code == 200
+    assert profile_slot.acquire()
+    profile_slot.release()
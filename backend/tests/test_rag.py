@@ -0,0 +1,131 @@
+import numpy as np
+
+from backend.app.lexical import LexicalIndexStore
+from backend.app.rag import HybridRetriever, NumpyVectorIndex
+from backend.app.retrieval_cache import RetrievalCache
+from backend.app.schemas import RetrievedChunk
+
+VOCAB = ["retainage", "payment", "days", "insurance", "indemnify", "warranty", "delay"]
+
+
+def bag_of_words(texts):
+    return [[text.lower().count(word) + 0.01 for word in VOCAB] for text in texts]
+
+
+def test_numpy_index_batched_top_k_and_reload(tmp_path):
+    index = NumpyVectorIndex(index_dir=tmp_path, embed_fn=bag_of_words)
+    index.reset_version(
+        "v1",
+        [
+            ("v1-0", "Retainage is capped at 5% retainage."),
+            ("v1-1", "Payment is due within 30 days."),
+            ("v1-2", "Subcontractor shall indemnify and carry insurance."),
+        ],
+    )
+    assert index.collection_count("v1") == 3
+    assert index.collection_count("missing") == 0
+
+    reopened = NumpyVectorIndex(index_dir=tmp_path, embed_fn=bag_of_words)
+    results = reopened.query_many("v1", ["retainage of 10%", "insurance and indemnify"], k=2)
+    assert [chunk.chunk_id for chunk in results[0]][:1] == ["v1-0"]
+    assert [chunk.chunk_id for chunk in results[1]][:1] == ["v1-2"]
+    assert all(len(row) == 2 for row in results)
+    assert isinstance(reopened._load("v1").embeddings, np.memmap)
+    assert reopened.query("missing", "retainage") == []
+
+
+def test_top_k_orders_best_first_across_blocks(monkeypatch):
+    rng = np.random.default_rng(3)
+    matrix = rng.standard_normal((50, 8)).astype(np.float32)
+    queries = rng.standard_normal((7, 8)).astype(np.float32)
+    monkeypatch.setattr(NumpyVectorIndex, "_max_scores_per_block", 100)
+    expected = np.argsort(-(queries @ matrix.T), axis=1)[:, :4].tolist()
+    assert NumpyVectorIndex.top_k(matrix, queries, 4) == expected
+    assert len(NumpyVectorIndex.top_k(matrix[:2], queries, 4)[0]) == 2
+
+
+def test_hybrid_fuses_lexical_and_vector_rankings(tmp_path):
+    chunks = [
+        ("v1-0", "Payment is due within 30 days of invoice."),
+        ("v1-1", "Liquidated damages capped at 10% of contract value."),
+        ("v1-2", "Insurance and indemnify obligations are limited."),
+    ]
+    vector = NumpyVectorIndex(index_dir=tmp_path, embed_fn=bag_of_words)
+    retriever = HybridRetriever(vector, LexicalIndexStore(tmp_path), mode="hybrid")
+    retriever.reset_version("v1", chunks)
+
+    # The toy embedder has no "liquidated" dimension, so only BM25 finds the clause.
+    query = "liquidated damages per calendar day"
+    assert retriever.query_many("v1", [query], k=1, mode="lexical")[0][0].chunk_id == "v1-1"
+    fused = retriever.query("v1", query, k=3)
+    assert fused[0].chunk_id == "v1-1"
+    assert len({chunk.chunk_id for chunk in fused}) == 3
+
+
+def test_hybrid_reports_versions_without_lexical_index_as_empty(tmp_path):
+    vector = NumpyVectorIndex(index_dir=tmp_path, embed_fn=bag_of_words)
+    vector.reset_version("v1", [("v1-0", "Retainage is 5%.")])
+    lexical = LexicalIndexStore(tmp_path / "lexical")
+    assert HybridRetriever(vector, lexical, mode="hybrid").collection_count("v1") == 0
+    assert HybridRetriever(vector, lexical, mode="vector").collection_count("v1") == 1
+    assert HybridRetriever(vector, lexical, mode="hybrid").query("v1", "retainage")[0].chunk_id == "v1-0"
+
+
+def test_retrieval_cache_hits_repeated_clauses_and_drops_reindexed_versions(tmp_path):
+    calls = []
+
+    def counting_embedder(texts):
+        calls.append(list(texts))
+        return bag_of_words(texts)
+
+    cache = RetrievalCache(max_bytes=1_000_000)
+    retriever = HybridRetriever(
+        NumpyVectorIndex(index_dir=tmp_path, embed_fn=counting_embedder),
+        LexicalIndexStore(tmp_path),
+        mode="vector",
+        cache=cache,
+    )
+    retriever.reset_version("v1", [("v1-0", "Retainage is 5%."), ("v1-1", "Payment within 30 days.")])
+    calls.clear()
+
+    first = retriever.query_many("v1", ["Retainage  of 10%", "retainage of 10%", "payment days"])
+    assert calls == [["Retainage  of 10%", "payment days"]]
+    assert [row[0].chunk_id for row in first] == ["v1-0", "v1-0", "v1-1"]
+    assert retriever.query("v1", "RETAINAGE of 10%")[0].chunk_id == "v1-0"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+    retriever.reset_version("v1", [("v1-0", "Payment within 30 days.")])
+    assert cache.stats()["entries"] == 0
+
+
+def test_retrieval_cache_evicts_by_bytes():
+    chunk = RetrievedChunk(chunk_id="c", content="x" * 1000, source="playbook", playbook_version_id="v1")
+    cache = RetrievalCache(max_bytes=3000)
+    for idx in range(3):
+        cache.put(cache.key("v1", "vector", f"clause {idx}", 3), [chunk])
+    stats = cache.stats()
+    assert stats["bytes"] <= 3000
+    assert stats["evictions"] >= 1
+    assert cache.get(cache.key("v1", "vector", "clause 2", 3)) == [chunk]
+    assert cache.get(cache.key("v1", "vector", "clause 0", 3)) is None
+
+
+def test_reindex_by_another_process_is_picked_up(tmp_path):
+    def retriever(cache=None):
+        return HybridRetriever(
+            NumpyVectorIndex(index_dir=tmp_path, embed_fn=bag_of_words),
+            LexicalIndexStore(tmp_path),
+            mode="hybrid",
+            cache=cache,
+        )
+
+    writer, reader = retriever(), retriever(RetrievalCache(max_bytes=1_000_000))
+    writer.reset_version("v1", [("v1-0", "Retainage is 5%.")])
+    assert reader.query("v1", "retainage")[0].content == "Retainage is 5%."
+    assert reader.query("v1", "retainage")[0].content == "Retainage is 5%."
+
+    writer.reset_version("v1", [("v1-0", "Retainage is 10%."), ("v1-1", "Payment within 30 days.")])
+    assert reader.query("v1", "retainage")[0].content == "Retainage is 10%."
+    assert reader.vector.collection_count("v1") == 2
+    assert reader.list_chunks("v1")[1] == ("v1-1", "Payment within 30 days.")
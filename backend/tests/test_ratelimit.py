@@ -0,0 +1,63 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI, Request
+
+from backend.app import ratelimit
+from backend.app.ratelimit import DatabaseBucketStore, MemoryBucketStore, RateLimiter
+
+
+def _app(limiter: RateLimiter, per_minute: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/analyze", dependencies=[Depends(limiter.limit("analyze", per_minute))])
+    async def analyze(request: Request) -> dict:
+        return {"ok": True}
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_requests_are_charged_by_contract_size_and_report_headers(monkeypatch):
+    monkeypatch.setattr(ratelimit.settings, "rate_limit_tokens_per_unit", 100)
+    app = _app(RateLimiter(MemoryBucketStore()), per_minute=10)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        small = await client.post("/analyze", content="x" * 100)
+        large = await client.post("/analyze", content="x" * 2000)  # 500 tokens: 1 + 5 units
+        refused = await client.post("/analyze", content="x" * 2000)
+        other = await client.post("/analyze", content="x", headers={"x-api-key": "unknown"})
+
+    assert small.status_code == 200 and small.headers["RateLimit-Remaining"] == "9"
+    assert large.status_code == 200 and large.headers["RateLimit-Remaining"] == "3"
+    assert large.headers["RateLimit-Limit"] == "10"
+    assert refused.status_code == 429 and int(refused.headers["Retry-After"]) >= 18
+    # Unlisted API keys do not get a bucket of their own.
+    assert other.headers["RateLimit-Remaining"] == "2"
+
+
+@pytest.mark.asyncio
+async def test_listed_api_keys_and_trusted_forwarded_addresses_get_their_own_buckets(monkeypatch):
+    monkeypatch.setattr(ratelimit.settings, "client_api_keys", "team-a")
+    monkeypatch.setattr(ratelimit.settings, "trusted_proxies", "127.0.0.0/8")
+    app = _app(RateLimiter(MemoryBucketStore()), per_minute=1)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app, client=("127.0.0.1", 5000)), base_url="http://test"
+    ) as client:
+        first = await client.post("/analyze", headers={"x-forwarded-for": "198.51.100.7"})
+        spoofed = await client.post("/analyze", headers={"x-forwarded-for": "203.0.113.9, 198.51.100.7"})
+        keyed = await client.post("/analyze", headers={"x-forwarded-for": "198.51.100.7", "x-api-key": "team-a"})
+
+    assert first.status_code == 200
+    assert spoofed.status_code == 429
+    assert keyed.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_database_buckets_are_not_overdrawn_by_concurrent_requests(database):
+    store = DatabaseBucketStore()
+    results = await asyncio.gather(*(store.take("analyze:client", 1, 5, 0.0) for _ in range(8)))
+
+    assert sum(taken for taken, _ in results) == 5
+    taken, left = await store.take("analyze:client", 2, 5, 0.0, force=True)
+    assert taken and left == pytest.approx(-2)
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from backend.app import database as db
+from backend.app import main
+from backend.app.events import event_bus
+from backend.app.models import Analysis
+from backend.app.tasks import ShuttingDown, TaskRegistry
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_quick_tasks_and_cancels_the_rest():
+    registry = TaskRegistry()
+    quick = registry.start("quick", asyncio.sleep(0.01, "done"))
+    slow = registry.start("slow", asyncio.sleep(30))
+
+    assert await registry.drain(0.2) == ["slow"]
+    assert quick.result() == "done" and slow.cancelled()
+    assert len(registry) == 0
+    with pytest.raises(ShuttingDown):
+        registry.start("late", asyncio.sleep(0))
+
+
+@pytest.mark.asyncio
+async def test_unfinished_analyses_are_requeued_and_resumed(database, monkeypatch):
+    async def stuck_pipeline(*args, **kwargs):
+        await asyncio.sleep(30)
+
+    registry = TaskRegistry()
+    monkeypatch.setattr(main, "task_registry", registry)
+    monkeypatch.setattr(main, "run_analysis_pipeline", stuck_pipeline)
+    async with db.get_session() as session:
+        session.add(Analysis(id="a1", analysis_type="risks", contract_text="Net 30.", status="queued"))
+
+    registry.start("a1", main._process_analysis("a1"))
+    await asyncio.sleep(0.05)
+    assert await registry.drain(0.05) == ["a1"]
+
+    async with db.get_session() as session:
+        assert (await session.get(Analysis, "a1")).status == "requeued"
+    terminal = event_bus._history["a1"].terminal[0]
+    assert terminal["event"] == "error" and terminal["data"]["status"] == "requeued"
+
+    resumed = TaskRegistry()
+    monkeypatch.setattr(main, "task_registry", resumed)
+    await main._resume_requeued()
+    await main._resume_requeued()
+    assert len(resumed) == 1
+    await resumed.drain(0)
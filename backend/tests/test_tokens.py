@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+
+from backend.app import tokens
+from backend.app.models import Analysis
+from backend.app.pipeline import run_analysis_pipeline
+from backend.app.tokens import ClientTokenLedger, TokenBudget, TokenBudgetExceeded, TokenCounter
+
+SAMPLE = (
+    Path(__file__).resolve().parents[2] / "sample_contracts" / "example_contract_1_subcontractor.txt"
+).read_text(encoding="utf-8")
+
+
+def test_counter_caches_counts_and_falls_back_without_tokenizer(tmp_path):
+    counter = TokenCounter(cache_size=2)
+    if counter.source == "tokenizer":
+        first = counter.count_many(["Retainage 5%.", "Net 30 days.", "Retainage 5%."])
+        assert first[0] == first[2] > 0
+        assert len(counter._cache) == 2
+        counter.count("Notice 14 days.")
+        assert len(counter._cache) == 2
+
+    missing = TokenCounter(str(tmp_path / "missing.json"))
+    assert missing.source == "heuristic"
+    assert missing.count("x" * 40) == 10
+
+
+def test_budget_refuses_calls_past_analysis_and_client_limits():
+    ledger = ClientTokenLedger(limit=100, window_seconds=60)
+    budget = TokenBudget(limit=150, client_id="10.0.0.1", ledger=ledger)
+    budget.check(80)
+    budget.charge(80)
+    with pytest.raises(TokenBudgetExceeded) as exc:
+        budget.check(40)
+    assert exc.value.scope == "client" and exc.value.remaining == 20
+    assert ledger.usage("10.0.0.1")["used_tokens"] == 80
+    assert ledger.remaining("10.0.0.2") == 100
+
+    budget.ledger = None
+    with pytest.raises(TokenBudgetExceeded) as exc:
+        budget.check(71)
+    assert exc.value.scope == "analysis"
+    assert budget.rejected == 2
+
+
+@pytest.mark.asyncio
+async def test_exhausted_budget_skips_llm_validation_with_warning(static_rag, monkeypatch):
+    monkeypatch.setattr(tokens.settings, "analysis_token_budget", 1)
+    analysis = Analysis(id="budget", analysis_type="risks", contract_text=SAMPLE)
+    result = await run_analysis_pipeline(None, analysis, playbook_content_override="playbook")
+
+    assert result.findings
+    assert result.usage.total_tokens == 0
+    assert [w.type for w in result.guardrail_warnings].count("token_budget") == 1
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from backend.app.warmup import Warmup
+
+
+@pytest.mark.asyncio
+async def test_warmup_reports_progress_until_all_stages_finish():
+    release = asyncio.Event()
+
+    async def slow_stage():
+        await release.wait()
+
+    async def noop():
+        return None
+
+    warmup = Warmup()
+    warmup.start([("database", noop), ("playbook", slow_stage)])
+    await asyncio.sleep(0)
+
+    assert not warmup.ready
+    assert await warmup.wait(0.01) is False
+    assert warmup.status()["stages"]["playbook"]["state"] == "running"
+
+    release.set()
+    assert await warmup.wait(1) is True
+    status = warmup.status()
+    assert status["ready"] is True
+    assert [stage["state"] for stage in status["stages"].values()] == ["done", "done"]
+
+
+@pytest.mark.asyncio
+async def test_failed_stage_ends_warmup_without_ready():
+    async def broken():
+        raise RuntimeError("model download failed")
+
+    async def never_run():
+        raise AssertionError("stages after a failure must not run")
+
+    warmup = Warmup()
+    warmup.start([("embedding_model", broken), ("later", never_run)])
+
+    assert await warmup.wait(1) is False
+    assert warmup.finished
+    stages = warmup.status()["stages"]
+    assert stages["embedding_model"]["state"] == "failed"
+    assert stages["embedding_model"]["error"] == "model download failed"
+    assert stages["later"]["state"] == "pending"
+
+
+def test_unstarted_warmup_is_ready():
+    assert Warmup().ready
+
+
+@pytest.mark.asyncio
+async def test_wait_for_returns_once_the_named_stages_end():
+    release = asyncio.Event()
+
+    async def noop():
+        return None
+
+    async def slow_stage():
+        await release.wait()
+
+    warmup = Warmup()
+    warmup.start([("database", noop), ("embedding_model", slow_stage)])
+
+    assert await warmup.wait_for(("database",), 1) is True
+    assert await warmup.wait_for(("database", "embedding_model"), 0.01) is False
+    release.set()
+    assert await warmup.wait_for(("database", "embedding_model"), 1) is True
+    assert await Warmup().wait_for(("database",), 0) is True
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from backend.app.main import app
+from backend.app.models import Analysis
+from backend.app.pipeline import run_analysis_pipeline
+from backend.app.workers import LoopLagMonitor
+
+SAMPLES = "\n\n".join(
+    path.read_text(encoding="utf-8")
+    for path in sorted((Path(__file__).resolve().parents[2] / "sample_contracts").glob("*.txt"))
+)
+
+
+async def _health_latencies(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/health")
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+@pytest.mark.asyncio
+async def test_health_stays_responsive_during_analysis_and_reindex(static_rag, monkeypatch):
+    def slow_reindex(version_id, chunks):
+        time.sleep(0.3)  # stands in for embedding the playbook
+
+    monkeypatch.setattr(static_rag, "reset_version", slow_reindex)
+    contract = (SAMPLES * (1_000_000 // len(SAMPLES) + 1))[:1_000_000]
+    large = Analysis(id="large", analysis_type="summary", contract_text=contract, playbook_version_id="v1")
+    reindexed = Analysis(id="reindexed", analysis_type="summary", contract_text=SAMPLES)
+
+    stop = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/health")
+        probe = asyncio.create_task(_health_latencies(client, stop))
+        started = time.perf_counter()
+        await asyncio.gather(
+            run_analysis_pipeline(None, large),
+            run_analysis_pipeline(None, reindexed, playbook_content_override="Retainage 5%."),
+        )
+        busy = time.perf_counter() - started
+        stop.set()
+        latencies = await probe
+
+    assert busy > 0.3
+    assert len(latencies) >= 5
+    assert max(latencies) < 0.2
+
+
+def test_loop_lag_monitor_records_stalls():
+    monitor = LoopLagMonitor(interval=0.01, warn_after=1.0)
+
+    async def stall():
+        monitor.start()
+        await asyncio.sleep(0.03)
+        time.sleep(0.1)
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+
+    asyncio.run(stall())
+    assert monitor.max >= 0.05
+    assert monitor.stats()["samples"] >= 2